@@ -17,6 +17,7 @@ import sublime_plugin
 
 from .anaconda_lib import ioloop
 from .anaconda_lib.helpers import get_settings
+from .anaconda_lib.workers.standby import StandbyPool
 
 from .commands import *   # noqa
 from .listeners import *  # noqa
@@ -67,6 +68,8 @@ def plugin_unloaded() -> None:
     if LOOP_RUNNING:
         ioloop.terminate()
 
+    StandbyPool.shutdown()
+
 
 def monitor_plugins():
     """Monitor for any plugin that conflicts with anaconda
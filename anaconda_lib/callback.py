@@ -11,11 +11,13 @@ import uuid
 import logging
 from threading import RLock
 from functools import partial
+from collections import OrderedDict
 
 import sublime
 
 from ..anaconda_lib import aenum as enum
-from ._typing import Callable, Any, Union
+from .ioloop import call_later
+from ._typing import Callable, Any, Union, Dict
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.StreamHandler(sys.stdout))
@@ -159,9 +161,9 @@ class Callback(object):
         if self.timeout > 0:
             self.waiting_for_timeout = True
             callback = self.callbacks.get('timed_out', _timeout_callback)
-            sublime.set_timeout(
-                partial(_on_timeout, callback), self.timeout * 1000
-            )
+            call_later(self.timeout, lambda: sublime.set_timeout(
+                partial(_on_timeout, callback), 0
+            ))
 
     def on(self, success: Callable=None, error: Callable=None, timeout: Callable=None) -> None:  # noqa
         """Another (more semantic) way to initialize the callback object
@@ -217,3 +219,130 @@ class Callback(object):
 
         callback = self.callbacks.get(self._status.value, _panic)
         return callback and callback(*args, **kwargs)
+
+
+class HookedCallback(Callback):
+    """Pass the responses to a hook that decides when the callback runs
+
+    The hook is called as `hook(callback, data)` for every response. The
+    uid and the timeout of the given callback (if it is a Callback) are
+    kept so the request is registered under the same uid and deadline.
+    The callback keeps its own status, hooked callbacks can be called
+    more than once (partial results for example).
+    """
+
+    def __init__(self, callback: Callable, hook: Callable) -> None:
+        super(HookedCallback, self).__init__(
+            timeout=getattr(callback, 'timeout', 0)
+        )
+        self.callback = callback
+        self.hook = hook
+        if isinstance(callback, Callback):
+            self.uid = callback.uid
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        """Give the response and the callback to the hook
+        """
+
+        return self.hook(self.callback, *args, **kwargs)
+
+
+class CallbackRegistry(object):
+    """The callbacks of the requests that are waiting for a response
+
+    Every callback gets a deadline in the I/O loop timer wheel, if the
+    response does not arrive in time the callback is forgotten (Callback
+    objects run their own `on_timeout` independently) so requests lost
+    in a server crash don't stay around forever. Every callback is
+    forgotten when the connection is reset too.
+
+    The uids of the forgotten callbacks are remembered for a while so
+    responses that arrive too late can be told apart from unknown ones.
+    """
+
+    LATE_HISTORY = 256
+
+    def __init__(self, timeout: Union[int, float]) -> None:
+        self.timeout = timeout
+        self.timed_out = 0
+        self.orphaned = 0
+        self.late = 0
+        self._callbacks = {}  # type: Dict[str, Any]
+        self._forgotten = OrderedDict()  # type: Dict[str, bool]
+        self._lock = RLock()
+
+    def __len__(self) -> int:
+        return len(self._callbacks)
+
+    def __contains__(self, hexid: str) -> bool:
+        return hexid in self._callbacks
+
+    def add(self, hexid: str, callback: Callable) -> None:
+        """Register the callback for the request with the given uid
+        """
+
+        timeout = self.timeout
+        if isinstance(callback, Callback) and callback.timeout > timeout:
+            timeout = callback.timeout
+
+        timer = call_later(timeout, partial(self._expire, hexid))
+        with self._lock:
+            self._callbacks[hexid] = (callback, timer)
+
+    def get(self, hexid: str) -> Callable:
+        """Return the callback for the given uid keeping it registered
+        """
+
+        entry = self._callbacks.get(hexid)
+        return entry[0] if entry is not None else None
+
+    def pop(self, hexid: str) -> Callable:
+        """Remove and return the callback for the given uid
+        """
+
+        with self._lock:
+            entry = self._callbacks.pop(hexid, None)
+            if entry is None:
+                if self._forgotten.pop(hexid, False):
+                    self.late += 1
+                return None
+
+        entry[1].cancel()
+        return entry[0]
+
+    def sweep(self) -> None:
+        """Forget every callback, their responses are never going to come
+        """
+
+        with self._lock:
+            callbacks, self._callbacks = self._callbacks, {}
+            for hexid, (_, timer) in callbacks.items():
+                timer.cancel()
+                self._forget(hexid)
+            self.orphaned += len(callbacks)
+
+    def stats(self) -> Dict[str, int]:
+        """Return the counters used for diagnostics
+        """
+
+        return {
+            'in_flight': len(self._callbacks), 'timed_out': self.timed_out,
+            'orphaned': self.orphaned, 'late': self.late
+        }
+
+    def _expire(self, hexid: str) -> None:
+        """Forget the callback for the given uid, its deadline passed
+        """
+
+        with self._lock:
+            if self._callbacks.pop(hexid, None) is not None:
+                self._forget(hexid)
+                self.timed_out += 1
+
+    def _forget(self, hexid: str) -> None:
+        """Remember that the given uid was forgotten
+        """
+
+        self._forgotten[hexid] = True
+        while len(self._forgotten) > self.LATE_HISTORY:
+            self._forgotten.popitem(last=False)
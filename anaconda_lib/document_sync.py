@@ -0,0 +1,140 @@
+# -*- coding: utf8 -*-
+
+# Copyright (C) 2013 - Oscar Campos <oscar.campos@member.fsf.org>
+# This program is Free Software see LICENSE file for details
+
+"""Versioned document synchronization between views and the JsonServer
+
+The full buffer of a view is sent to the JsonServer only once, after that
+only the changes captured by the text change listener are sent with every
+request. If the server can not apply them it replies with `resync` and the
+request is sent again with the whole buffer.
+
+Every view is synced once per key (`source` for Jedi requests and `code` for
+the linters) as they can be served by different JsonServer processes.
+"""
+
+import threading
+
+import sublime
+import sublime_plugin
+
+from .callback import HookedCallback
+from ._typing import Callable, Dict, List, Tuple, Any  # noqa
+
+# if more changes than this are pending is cheaper to send the whole buffer
+MAX_PENDING_CHANGES = 512
+
+
+class Document(object):
+    """Client side state of a synced view
+    """
+
+    def __init__(self, version: int, change_count: int) -> None:
+        self.version = version
+        self.change_count = change_count
+        self.changes = []  # type: List[Tuple[int, int, str]]
+
+
+class DocumentSync(object):
+    """Keeps track of the synced version of every view
+    """
+
+    _documents = {}  # type: Dict[int, Dict[str, Document]]
+    _versions = {}  # type: Dict[int, int]
+    _lock = threading.RLock()
+    enabled = hasattr(sublime_plugin, 'TextChangeListener')
+
+    @classmethod
+    def record(cls, view: sublime.View, changes: Any) -> None:
+        """Record the changes applied to the buffer of the given view
+        """
+
+        with cls._lock:
+            documents = cls._documents.get(view.id(), {})
+            for key, document in list(documents.items()):
+                document.changes.extend(
+                    (change.a.pt, change.b.pt, change.str)
+                    for change in changes
+                )
+                document.change_count = view.change_count()
+                if len(document.changes) > MAX_PENDING_CHANGES:
+                    documents.pop(key, None)
+
+    @classmethod
+    def payload(cls, view: sublime.View, key: str) -> Dict[str, Any]:
+        """Return the data that has to be sent to sync the given view
+        """
+
+        vid = view.id()
+        with cls._lock:
+            document = cls._documents.get(vid, {}).get(key)
+            if document is None or \
+                    document.change_count != view.change_count():
+                # we missed changes or never synced, send the whole buffer
+                version = cls._versions.get(vid, 0) + 1
+                cls._versions[vid] = version
+                cls._documents.setdefault(vid, {})[key] = Document(
+                    version, view.change_count()
+                )
+                return {
+                    key: view.substr(sublime.Region(0, view.size())),
+                    'document': {'key': key, 'version': version, 'full': True}
+                }
+
+            base = document.version
+            if document.changes:
+                document.version = cls._versions[vid] = base + 1
+
+            changes, document.changes = document.changes, []
+            return {'document': {
+                'key': key,
+                'base': base,
+                'version': document.version,
+                'changes': changes,
+                'size': view.size()
+            }}
+
+    @classmethod
+    def invalidate(cls, vid: int, key: str=None) -> None:
+        """Force a full sync of the given view in the next request
+        """
+
+        with cls._lock:
+            if key is None:
+                cls._documents.pop(vid, None)
+            else:
+                cls._documents.get(vid, {}).pop(key, None)
+
+    @classmethod
+    def forget(cls, vid: int) -> None:
+        """Forget everything about the given view
+        """
+
+        with cls._lock:
+            cls._documents.pop(vid, None)
+            cls._versions.pop(vid, None)
+
+    @classmethod
+    def resync_callback(cls, callback: Callable, data: Dict[str, Any], send: Callable) -> Callable:  # noqa
+        """Hook the callback to send the request again if the server lost sync
+        """
+
+        document = data.get('document')
+        if document is None or document.get('full', False):
+            return callback
+
+        def _resync(callback: Callable, response: Dict[str, Any]) -> None:
+            if not response.get('resync', False):
+                return callback(response)
+
+            from .helpers import get_window_view
+            view = get_window_view(data['vid'])
+            if view is None:
+                return callback(response)
+
+            cls.invalidate(view.id(), document['key'])
+            data.update(cls.payload(view, document['key']))
+            send(callback, **data)
+
+        return HookedCallback(callback, _resync)
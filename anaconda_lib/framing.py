@@ -0,0 +1,150 @@
+# -*- coding: utf8 -*-
+
+# Copyright (C) 2013 - Oscar Campos <oscar.campos@member.fsf.org>
+# This program is Free Software see LICENSE file for details
+
+"""Binary framing for the anaconda JsonServer protocol
+
+By default messages are JSON documents terminated by `\\r\\n`. If both ends
+agree (see `negotiate`), messages are sent as frames instead:
+
+    +----------------+-------+---------------+
+    | length (4, BE) | flags | payload       |
+    +----------------+-------+---------------+
+
+The flags tell if the payload is encoded with msgpack (JSON otherwise) and
+if it has been compressed with zlib (only done above a size threshold).
+
+This module is shared by the plugin and the JsonServer so it must not
+import anything from sublime.
+"""
+
+import zlib
+import json
+import struct
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+HEADER = struct.Struct('>IB')
+MSGPACK = 0x01
+ZLIB = 0x02
+COMPRESSION_THRESHOLD = 16 * 1024  # bytes
+
+
+def offer(compression=False):
+    """Return the framing options this end of the connection supports
+    """
+
+    return {
+        'encodings': ['msgpack', 'json'] if msgpack is not None else ['json'],
+        'compression': ['zlib'] if compression else [],
+        'threshold': COMPRESSION_THRESHOLD
+    }
+
+
+def negotiate(options):
+    """Return the Framing that fits the options offered by the other end
+    """
+
+    encoding = 'json'
+    if msgpack is not None and 'msgpack' in options.get('encodings', []):
+        encoding = 'msgpack'
+
+    compression = 'zlib' if 'zlib' in options.get('compression', []) else None
+    threshold = options.get('threshold', COMPRESSION_THRESHOLD)
+    return Framing(encoding, compression, threshold)
+
+
+class Framing(object):
+    """Encodes and decodes frames with the negotiated options
+    """
+
+    def __init__(self, encoding='json', compression=None,
+                 threshold=COMPRESSION_THRESHOLD):
+        self.encoding = encoding
+        self.compression = compression
+        self.threshold = threshold
+
+    @classmethod
+    def from_description(cls, description):
+        """Build a Framing from the description sent by the JsonServer
+        """
+
+        return cls(
+            description.get('encoding', 'json'),
+            description.get('compression'),
+            description.get('threshold', COMPRESSION_THRESHOLD)
+        )
+
+    def describe(self):
+        """Return the description of this framing that is sent to the client
+        """
+
+        return {
+            'encoding': self.encoding,
+            'compression': self.compression,
+            'threshold': self.threshold
+        }
+
+    def encode(self, data):
+        """Return the frame for the given data
+        """
+
+        flags = 0
+        if self.encoding == 'msgpack':
+            payload = msgpack.packb(data, use_bin_type=True)
+            flags |= MSGPACK
+        else:
+            payload = json.dumps(data).encode('utf8')
+
+        if self.compression == 'zlib' and len(payload) > self.threshold:
+            payload = zlib.compress(payload)
+            flags |= ZLIB
+
+        return HEADER.pack(len(payload), flags) + payload
+
+    def decode(self, payload, flags):
+        """Return the data from the given frame payload
+        """
+
+        if flags & ZLIB:
+            payload = zlib.decompress(payload)
+
+        if flags & MSGPACK:
+            return msgpack.unpackb(payload, raw=False)
+
+        return json.loads(payload.decode('utf8'), strict=False)
+
+
+class FrameReader(object):
+    """Splits the incoming bytes in frames
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def feed(self, data):
+        """Add data and return the list of (payload, flags) completed
+        """
+
+        self.buffer.extend(data)
+        frames = []
+        offset = 0
+        while len(self.buffer) - offset >= HEADER.size:
+            length, flags = HEADER.unpack_from(self.buffer, offset)
+            end = offset + HEADER.size + length
+            if len(self.buffer) < end:
+                break
+
+            frames.append(
+                (bytes(self.buffer[offset + HEADER.size:end]), flags)
+            )
+            offset = end
+
+        if offset:
+            del self.buffer[:offset]
+
+        return frames
@@ -8,16 +8,17 @@ Anaconda helpers
 """
 
 import os
-import json
+import copy
 import logging
 import functools
 import traceback
 import subprocess
-from collections import defaultdict
 
 import sublime
 
 from .kite import Integration
+from .document_sync import DocumentSync
+from .settings_cache import SettingsCache
 
 # define if we are in a git installation
 git_installation = False
@@ -32,7 +33,7 @@ ONLY_CODE = 0x01
 NOT_SCRATCH = 0x02
 LINTING_ENABLED = 0x04
 
-ENVIRON_HOOK_INVALID = defaultdict(lambda: False)
+HOOK_SETTINGS = ('python_interpreter', 'extra_paths')
 AUTO_COMPLETION_DOT_VIEWS = []
 
 
@@ -197,68 +198,79 @@ def create_subprocess(args, **kwargs):
 
 def get_settings(view, name, default=None):
     """Get settings
-    """
 
-    global ENVIRON_HOOK_INVALID
+    The python interpreter and the extra paths can be overridden by a
+    .anaconda hook file. Resolved values are cached per view and name
+    (see SettingsCache).
+    """
 
     if view is None:
         return default
 
+    key = (view.id(), name)
+    if name in HOOK_SETTINGS:
+        key += (_hook_directory(view),)
+
+    SettingsCache.watch(view)
+    found, value, hooked = SettingsCache.get(
+        key, lambda: _resolve_settings(view, name, key)
+    )
+    if not found:
+        return _expand_settings(view, name, default, hooked)
+
+    if isinstance(value, (list, dict)):
+        # callers used to get a fresh copy from sublime every time
+        return copy.deepcopy(value)
+
+    return value
+
+
+def _hook_directory(view):
+    """Return the directory where the .anaconda hook file lookup starts
+    """
+
+    window = view.window()
+    if window is None or not window.folders():
+        return None
+
+    if get_settings(view, 'anaconda_allow_project_environment_hooks', False):
+        if view.file_name() is not None:
+            return os.path.dirname(view.file_name())
+
+    return window.folders()[0]
+
+
+def _resolve_settings(view, name, key):
+    """Resolve the given setting for the given view
+
+    Returns if it was found, its value and if a hook file was used
+    """
+
+    hook = None
+    if name in HOOK_SETTINGS and key[2] is not None:
+        hook = SettingsCache.hook(key[2])
+
     plugin_settings = sublime.load_settings('Anaconda.sublime-settings')
+    if hook is not None and name in hook.data:
+        r = hook.data[name]
+    elif view.settings().has(name):
+        r = view.settings().get(name)
+    elif plugin_settings.has(name):
+        r = plugin_settings.get(name)
+    else:
+        return False, None, hook is not None
 
-    if (name in ('python_interpreter', 'extra_paths') and not
-            ENVIRON_HOOK_INVALID[view.id()]):
-        if view.window() is not None and view.window().folders():
-            allow_multiple_env_hooks = get_settings(
-                view,
-                'anaconda_allow_project_environment_hooks',
-                False
-            )
-            if allow_multiple_env_hooks:
-                dirname = os.path.dirname(view.file_name())
-            else:
-                dirname = view.window().folders()[0]
-            while True:
-                environfile = os.path.join(dirname, '.anaconda')
-                if os.path.exists(environfile) and os.path.isfile(environfile):
-                    # print("Environ found on %s" % environfile)
-                    with open(environfile, 'r') as jsonfile:
-                        try:
-                            data = json.loads(jsonfile.read())
-                        except Exception as error:
-                            sublime.error_message(
-                                "Anaconda Message:\n"
-                                "I found an .anaconda environment file in {} "
-                                "path but it doesn't seems to be a valid JSON "
-                                "file.\n\nThat means that your .anaconda "
-                                "hook file is being ignored.".format(
-                                    environfile
-                                )
-                            )
-                            logging.error(error)
-                            ENVIRON_HOOK_INVALID[view.id()] = True
-                            break  # stop loop
-                        else:
-                            r = data.get(
-                                name, view.settings().get(
-                                    name, plugin_settings.get(name, default)
-                                )
-                            )
-                            w = view.window()
-                            if w is not None:
-                                return sublime.expand_variables(
-                                    r, w.extract_variables()
-                                )
-
-                            return r
-                else:
-                    parts = os.path.split(dirname)
-                    if len(parts[1]) > 0:
-                        dirname = os.path.dirname(dirname)
-                    else:
-                        break  # stop loop
+    return True, _expand_settings(view, name, r, hook is not None), \
+        hook is not None
+
+
+def _expand_settings(view, name, r, hooked):
+    """Expand the variables in the given setting value
+    """
+
+    if hooked:
+        return sublime.expand_variables(r, view.window().extract_variables())
 
-    r = view.settings().get(name, plugin_settings.get(name, default))
     if name == 'python_interpreter':
         r = expand(view, r)
     elif name == 'extra_paths':
@@ -306,14 +318,27 @@ def prepare_send_data(location, method, handler):
     """
 
     view = active_view()
-    return {
-        'source': view.substr(sublime.Region(0, view.size())),
+    data = {
+        'vid': view.id(),
         'line': location[0] + 1,
         'offset': location[1],
         'filename': view.file_name() or '',
         'method': method,
         'handler': handler
     }
+    data.update(document_data(view, 'source'))
+    return data
+
+
+def document_data(view, key):
+    """Return the buffer contents (or its sync data) under the given key
+    """
+
+    if DocumentSync.enabled and get_settings(
+            view, 'anaconda_document_sync', False):
+        return DocumentSync.payload(view, key)
+
+    return {key: view.substr(sublime.Region(0, view.size()))}
 
 
 def project_name():
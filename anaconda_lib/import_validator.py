@@ -7,68 +7,351 @@
 Anaconda imports validator
 """
 
+import os
+import sys
+import ast
+import threading
+from collections import OrderedDict
+
 from jedi import Script, get_default_project
+from linting.parsed_source import ParsedSource
+
+try:
+    from importlib.machinery import all_suffixes
+    SUFFIXES = tuple(all_suffixes()) + ('.pyi',)
+except ImportError:
+    SUFFIXES = ('.py', '.pyc', '.pyo', '.so', '.pyd', '.pyi')
+
+MAX_SEARCH_PATHS = 16
+
+
+class ModuleCache(object):
+    """Server wide cache of the modules that can (or can't) be imported
+
+    The listings of the directories where modules are looked for are kept
+    while the directories mtime doesn't change. The modules that are not
+    found in the listings are resolved with jedi (they can live in zip
+    files, be provided by import hooks or not exist at all) and its verdict
+    is kept by search path until the mtime of any of the directories in
+    the search path (site-packages for example) changes. A change in the
+    extra paths is a different search path.
+    """
+
+    def __init__(self, max_search_paths=MAX_SEARCH_PATHS):
+        self.max_search_paths = max_search_paths
+        self._listings = {}  # directory: (mtime, entries)
+        self._verdicts = OrderedDict()  # search path: (stamp, verdicts)
+        self._lock = threading.RLock()
+
+    def listing(self, directory):
+        """Return the entries of the given directory
+        """
+
+        try:
+            mtime = os.stat(directory).st_mtime
+        except OSError:
+            return frozenset()
+
+        with self._lock:
+            cached = self._listings.get(directory)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+
+        try:
+            entries = frozenset(os.listdir(directory))
+        except OSError:
+            entries = frozenset()
+
+        with self._lock:
+            self._listings[directory] = (mtime, entries)
+
+        return entries
+
+    def verdicts(self, search_path):
+        """Return the {module: importable} verdicts of the given search path
+        """
+
+        stamp = []
+        for directory in search_path:
+            try:
+                stamp.append(os.stat(directory).st_mtime)
+            except OSError:
+                stamp.append(None)
+
+        stamp = tuple(stamp)
+        with self._lock:
+            cached = self._verdicts.pop(search_path, None)
+            if cached is None or cached[0] != stamp:
+                cached = (stamp, {})
+            self._verdicts[search_path] = cached
+            while len(self._verdicts) > self.max_search_paths:
+                self._verdicts.popitem(last=False)
+
+            return cached[1]
+
+    def clear(self):
+        """Forget every listing and verdict
+        """
+
+        with self._lock:
+            self._listings.clear()
+            self._verdicts.clear()
+
+
+resolved_modules = ModuleCache()
+
+
+class ModuleResolver(object):
+    """Look for modules in the directories of a search path
+
+    Every directory is listed (or its listing validated) once per resolver
+    so a resolver should live as long as a single validation.
+    """
+
+    def __init__(self, search_path, cache=resolved_modules):
+        self.search_path = tuple(search_path)
+        self.cache = cache
+        self.verdicts = cache.verdicts(self.search_path)
+        self._listings = {}
+
+    def listing(self, directory):
+        """Return the entries of the given directory
+        """
+
+        entries = self._listings.get(directory)
+        if entries is None:
+            entries = self._listings[directory] = self.cache.listing(directory)
+
+        return entries
+
+    def packages(self, module, base=None):
+        """Return the directories of the given package
+        """
+
+        directories = [base] if base is not None else list(self.search_path)
+        for name in module.split('.') if module else ():
+            directories = [
+                os.path.join(directory, name) for directory in directories
+                if name in self.listing(directory) and
+                os.path.isdir(os.path.join(directory, name))
+            ]
+
+        return directories
+
+    def found(self, module, base=None):
+        """Return True if the given module is found in the directories
+
+        Relative modules are looked for in the given base directory
+        """
+
+        if base is None and module in sys.builtin_module_names:
+            return True
+
+        package, _, name = module.rpartition('.')
+        for directory in self.packages(package, base):
+            entries = self.listing(directory)
+            if name in entries and os.path.isdir(
+                    os.path.join(directory, name)):
+                return True
+            if any(name + suffix in entries for suffix in SUFFIXES):
+                return True
+            if not package and base is None and name + '-stubs' in entries:
+                return True
+
+        return False
 
 
 class Validator:
     """Try to import whatever import that is in the given source
+
+    The source can be a ParsedSource shared with other linters. Imported
+    modules are looked for in the search path of the jedi project, jedi
+    is only used for the names imported from modules (that are not
+    submodules) and for the modules that are not found in the search path.
+    Every jedi check of a validation is done with a single Script.
     """
 
-    def __init__(self, source, filename, settings):
-        self.source = source
+    def __init__(self, source, filename, settings, project=None):
+        self.parsed = ParsedSource.of(source, filename)
+        self.source = self.parsed.code
         self.errors = []  # type: List
         self.filename = filename
         self.settings = settings
+        self.project = project
 
     def is_valid(self):
         """Determine if the source imports are valid or not
         """
 
-        for line, lineno in self._extract_imports():
-            error, valid = self._validate_import(line, lineno)
-            if not valid:
-                self.errors.append((error, lineno))
+        resolver = ModuleResolver(self._search_path())
+        failed = OrderedDict()
+        pending = []
+        for node, lineno in self._extract_imports():
+            failed.setdefault(lineno, [])
+            checks = self._validate_import(node, resolver)
+            for position, (word, valid, line, column) in enumerate(checks):
+                item = (position, word)
+                if valid is None:
+                    pending.append((lineno, item, line, column))
+                elif not valid:
+                    failed[lineno].append(item)
+
+        for lineno, item in self._validate_with_jedi(pending, resolver):
+            failed[lineno].append(item)
+
+        for lineno, words in failed.items():
+            if words:
+                self.errors.append(('can\'t import {0}'.format(
+                    ' '.join(word for _, word in sorted(words))
+                ), lineno))
 
         return not self.errors
 
-    def _validate_import(self, module_line, lineno):
-        """Try to validate the given iport line
+    def _validate_import(self, node, resolver):
+        """Validate the given import node
+
+        Returns (word, valid, line, column) for every imported name, valid
+        is None for the names that have to be validated by jedi with the
+        given import `line` at the given `column`
         """
 
-        if 'noqa' in module_line:
-            return True
+        if isinstance(node, ast.Import):
+            return [
+                self._validate_module(alias.name, 0, None, resolver)
+                for alias in node.names
+            ]
+
+        level, module, base = node.level or 0, node.module or '', None
+        if level and self.filename:
+            base = os.path.dirname(os.path.abspath(self.filename))
+            for _ in range(level - 1):
+                base = os.path.dirname(base)
 
-        jedi_project = get_default_project(self.filename)
+        checks = []
+        if module:
+            checks.append(self._validate_module(module, level, base, resolver))
+            if checks[0][1] is False:
+                # the names of a module that can't be imported
+                return checks + [
+                    (alias.name, False, None, None)
+                    for alias in node.names if alias.name != '*'
+                ]
 
-        error = []
-        error_string = 'can\'t import {0}'
-        valid = True
-        for word in module_line.split():
-            if word in ('from', 'import', 'as'):
+        prefix = 'from {0}{1} import '.format('.' * level, module)
+        for alias in node.names:
+            if alias.name == '*':
                 continue
 
-            offset = int(module_line.find(word) + len(word) / 2)
-            s = Script(self.source, lineno, offset, self.filename, project=jedi_project)
-            if not self.filename:
-                s = Script(module_line, 1, offset, project=jedi_project)
+            submodule = '.'.join(part for part in (module, alias.name) if part)
+            found = resolver.found(submodule, base) if not level or base \
+                else False
+            checks.append((
+                alias.name, True if found else None,
+                prefix + alias.name, len(prefix)
+            ))
+
+        return checks
+
+    def _validate_module(self, module, level, base, resolver):
+        """Validate the given (maybe relative) module
+
+        Returns (word, valid, line, column) as `_validate_import` does
+        """
+
+        if level:
+            package, _, name = module.rpartition('.')
+            line = 'from {0}{1} import {2}'.format('.' * level, package, name)
+            found = resolver.found(module, base) if base else False
+            return module, True if found else None, line, len(line) - len(name)
+
+        line = 'import {0}'.format(module)
+        column = len(line) - len(module.rpartition('.')[2])
+        if resolver.found(module):
+            return module, True, line, column
+
+        return module, resolver.verdicts.get(module), line, column
 
-            if not s.goto_assignments():
-                if valid is True:
-                    valid = False
-                error.append(word)
+    def _validate_with_jedi(self, pending, resolver):
+        """Validate the given pending imports with a single jedi Script
 
-        err = '' if valid else error_string.format(' '.join(error))
-        return err, valid
+        Yields the (lineno, item) of every pending check that fails
+        """
+
+        if not pending:
+            return
+
+        project = self.project or get_default_project(self.filename or None)
+        source = '\n'.join(line for _, _, line, _ in pending)
+        script = Script(source, path=self.filename or None, project=project)
+        for row, (lineno, item, line, column) in enumerate(pending, 1):
+            valid = bool(script.goto(row, column))
+            if line.startswith('import '):
+                # only the modules verdicts are worth keeping
+                resolver.verdicts[line[len('import '):]] = valid
+            if not valid:
+                yield lineno, item
+
+    def _search_path(self):
+        """Return the directories where the jedi project looks for modules
+        """
+
+        project = self.project or get_default_project(self.filename or None)
+        path = [str(project.path)]
+        path.extend(
+            entry for entry in project.get_environment().get_sys_path()
+            if entry
+        )
+        path.extend(str(entry) for entry in project.added_sys_path)
+        if self.filename:
+            # the directories of the file up to the project root (that are
+            # not packages) are in the sys.path of the file for jedi
+            directory = os.path.dirname(os.path.abspath(self.filename))
+            parents = []
+            while directory.startswith(path[0] + os.sep):
+                if not os.path.exists(os.path.join(directory, '__init__.py')):
+                    parents.append(directory)
+                directory = os.path.dirname(directory)
+            path.extend(reversed(parents))
+
+        return tuple(OrderedDict.fromkeys(path))
 
     def _extract_imports(self):
-        """Extract imports from the source
+        """Extract the import nodes (and their line) of the source
+
+        Imports marked with `noqa` are not returned
+        """
+
+        try:
+            tree = self.parsed.tree
+        except (SyntaxError, ValueError, TypeError):
+            return self._scan_imports()
+
+        found = [
+            (node, node.lineno)
+            for node in ast.walk(tree)
+            if isinstance(node, (ast.Import, ast.ImportFrom)) and
+            not self._noqa(node)
+        ]
+        return sorted(found, key=lambda item: item[1])
+
+    def _noqa(self, node):
+        """Determine if the given import node is marked with noqa
+        """
+
+        end = getattr(node, 'end_lineno', None) or node.lineno
+        lines = self.parsed.lines[node.lineno - 1:end]
+        return any('noqa' in physical_line for physical_line in lines)
+
+    def _scan_imports(self):
+        """Extract imports from the lines of a source that can't be parsed
         """
 
         found = []
         lineno = 1
         buffer_found = []  # type: List
         in_docstring = False
-        for line in self.source.splitlines():
+        for line in self.parsed.lines:
+            line = line.rstrip('\n')
             if self.__detect_docstring(line):
                 if in_docstring:
                     in_docstring = False
@@ -94,7 +377,17 @@ class Validator:
                     else:
                         found.append((line, lineno))
             lineno += 1
-        return found
+
+        nodes = []
+        for line, lineno in found:
+            if 'noqa' in line:
+                continue
+            try:
+                nodes.append((ast.parse(line).body[0], lineno))
+            except (SyntaxError, ValueError, IndexError):
+                continue
+
+        return nodes
 
     def __detect_docstring(self, line):
         """Detects if there is a docstring
@@ -33,6 +33,7 @@ class TestClient(ioloop.EventHandler):
 
 import os
 import sys
+import math
 import time
 import errno
 import socket
@@ -41,9 +42,169 @@ import logging
 import traceback
 import threading
 
-from ._typing import List, Tuple, Any  # noqa
+try:
+    import selectors
+except ImportError:
+    # Python 3.3 (Sublime Text 3 builds older than 4050) has no selectors
+    selectors = None
+
+from .framing import FrameReader
+from ._typing import List, Tuple, Any, Callable  # noqa
 
 NOT_TERMINATE = True
+USE_SELECTORS = selectors is not None and hasattr(socket, 'socketpair')
+
+
+class Waker(object):
+    """Self-pipe used to wake up the loop from any other thread
+    """
+
+    def __init__(self) -> None:
+        self._reader, self._writer = socket.socketpair()
+        self._reader.setblocking(False)
+        self._writer.setblocking(False)
+
+    def fileno(self) -> int:
+        """Return the file descriptor that has to be watched by the loop
+        """
+
+        return self._reader.fileno()
+
+    def wake(self) -> None:
+        """Wake the loop up
+        """
+
+        try:
+            self._writer.send(b'\0')
+        except socket.error:
+            # the pipe is full so the loop is going to wake up anyway
+            pass
+
+    def consume(self) -> None:
+        """Drain the pending wake ups
+        """
+
+        try:
+            while self._reader.recv(4096):
+                pass
+        except socket.error:
+            pass
+
+    def close(self) -> None:
+        """Close both ends of the pipe
+        """
+
+        self._reader.close()
+        self._writer.close()
+
+
+class Timer(object):
+    """A callable scheduled in the TimerWheel
+    """
+
+    def __init__(self, wheel: 'TimerWheel', deadline: float, callback: Callable) -> None:  # noqa
+        self.wheel = wheel
+        self.deadline = deadline
+        self.callback = callback
+        self.done = False
+
+    def cancel(self) -> None:
+        """Do not call the callable when the deadline is reached
+        """
+
+        self.wheel.cancel(self)
+
+
+class TimerWheel(object):
+    """Hashed timer wheel driven by the I/O loop
+
+    Timers are hashed in slots of `resolution` seconds, the loop wakes up
+    once per tick while there are timers and runs the due ones, so any
+    number of timers costs a single wake up per tick and adding or
+    cancelling one is O(1). Timers never fire early and at most one tick
+    late.
+    """
+
+    def __init__(self, resolution: float=0.25, slots: int=256) -> None:
+        self.resolution = resolution
+        self._slots = [[] for _ in range(slots)]  # type: List[List[Timer]]
+        self._tick = int(time.time() / resolution)
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def schedule(self, delay: float, callback: Callable) -> Timer:
+        """Call the given callable in delay seconds (from the loop thread)
+        """
+
+        timer = Timer(self, time.time() + delay, callback)
+        tick = int(math.ceil(timer.deadline / self.resolution))
+        with self._lock:
+            self._slots[tick % len(self._slots)].append(timer)
+            self._count += 1
+            wake = self._count == 1
+
+        if wake:
+            # the loop may be waiting with no timeout
+            IOHandlers().wake()
+
+        return timer
+
+    def cancel(self, timer: Timer) -> None:
+        """Cancel the given timer (it is removed when its slot is visited)
+        """
+
+        with self._lock:
+            if not timer.done:
+                timer.done = True
+                self._count -= 1
+
+    def next_timeout(self) -> Any:
+        """Return the seconds to wait until the next tick (None if idle)
+        """
+
+        if self._count == 0:
+            return None
+
+        deadline = (self._tick + 1) * self.resolution
+        return max(deadline - time.time(), 0)
+
+    def advance(self) -> None:
+        """Run every timer that is due
+        """
+
+        now = time.time()
+        due = []  # type: List[Timer]
+        with self._lock:
+            current = int(now / self.resolution)
+            ticks = min(current - self._tick + 1, len(self._slots))
+            for tick in range(current - ticks + 1, current + 1):
+                slot = self._slots[tick % len(self._slots)]
+                if not slot:
+                    continue
+                pending = []
+                for timer in slot:
+                    if timer.done:
+                        continue
+                    elif timer.deadline <= now:
+                        timer.done = True
+                        due.append(timer)
+                        self._count -= 1
+                    else:
+                        # due in a later round of the wheel
+                        pending.append(timer)
+                slot[:] = pending
+            self._tick = current
+
+        for timer in due:
+            try:
+                timer.callback()
+            except Exception as error:
+                logging.error(error)
+                for traceback_line in traceback.format_exc().splitlines():
+                    logging.error(traceback_line)
 
 
 class IOHandlers(object):
@@ -58,7 +219,10 @@ class IOHandlers(object):
             return
 
         self._handler_pool = {}  # type: Dict[int, EventHandler]
-        self._lock = threading.Lock()
+        self._lock = threading.RLock()
+        self._selector = None
+        self._waker = None  # type: Waker
+        self.wheel = TimerWheel()
         self.instanced = True  # type: bool
 
     def ready_to_read(self) -> List['EventHandler']:
@@ -73,6 +237,25 @@ class IOHandlers(object):
 
         return [h for h in self._handler_pool.values() if h.ready_to_write()]
 
+    def selector(self):
+        """Return the selector of the loop (None if select has to be used)
+        """
+
+        if not USE_SELECTORS:
+            return None
+
+        with self._lock:
+            if self._selector is None:
+                self._selector = selectors.DefaultSelector()
+                self._waker = Waker()
+                self._selector.register(
+                    self._waker.fileno(), selectors.EVENT_READ, None
+                )
+                for handler in self._handler_pool.values():
+                    self._watch(handler)
+
+            return self._selector
+
     def register(self, handler):
         """Register a new handler
         """
@@ -83,6 +266,9 @@ class IOHandlers(object):
         with self._lock:
             if handler.fileno() not in self._handler_pool:
                 self._handler_pool.update({handler.fileno(): handler})
+                if self._selector is not None:
+                    self._watch(handler)
+                    self.wake()
 
     def unregister(self, handler):
         """Unregister the given handler
@@ -91,6 +277,59 @@ class IOHandlers(object):
         with self._lock:
             if handler.fileno() in self._handler_pool:
                 self._handler_pool.pop(handler.fileno())
+                if self._selector is not None:
+                    try:
+                        self._selector.unregister(handler.sock)
+                    except (KeyError, ValueError):
+                        pass
+
+    def update(self, handler):
+        """Watch for write events on the handler only while it has data
+        """
+
+        with self._lock:
+            if self._selector is None or \
+                    handler.fileno() not in self._handler_pool:
+                return
+
+            events = self._events(handler)
+            if self._selector.get_key(handler.sock).events != events:
+                self._selector.modify(handler.sock, events, handler)
+                self.wake()
+
+    def wake(self):
+        """Wake the loop up if it is waiting in the selector
+        """
+
+        if self._waker is not None:
+            self._waker.wake()
+
+    def reset(self):
+        """Forget every registered handler and close the selector
+        """
+
+        with self._lock:
+            self._handler_pool = {}
+            if self._selector is not None:
+                self._selector.close()
+                self._waker.close()
+                self._selector = self._waker = None
+
+    def _watch(self, handler):
+        """Register the handler in the selector
+        """
+
+        self._selector.register(handler.sock, self._events(handler), handler)
+
+    def _events(self, handler):
+        """Return the events mask that the handler is interested in
+        """
+
+        events = selectors.EVENT_READ
+        if handler.outbuffer and handler.ready_to_write():
+            events |= selectors.EVENT_WRITE
+
+        return events
 
 
 class EventHandler(object):
@@ -103,6 +342,7 @@ class EventHandler(object):
         self.address = address
         self.outbuffer = b''
         self.inbuffer = b''
+        self.reader = None  # type: FrameReader
         self.sock = sock
         if sock is None:
             self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
@@ -132,8 +372,9 @@ class EventHandler(object):
                     sent = self.sock.send(self.outbuffer)
                     self.outbuffer = self.outbuffer[sent:]
                 except socket.error as error:
-                    if error.args[0] == errno.EAGAIN:
-                        time.sleep(0.1)
+                    if error.args[0] in (errno.EAGAIN, errno.EWOULDBLOCK):
+                        # the loop will call us again when it's writable
+                        break
                     elif error.args[0] in (
                         errno.ECONNRESET, errno.ENOTCONN, errno.ESHUTDOWN,
                         errno.ECONNABORTED, errno.EPIPE
@@ -155,6 +396,8 @@ class EventHandler(object):
                     else:
                         raise
 
+            IOHandlers().update(self)
+
     def recv(self) -> None:
         """Receive some data
         """
@@ -174,6 +417,10 @@ class EventHandler(object):
             self.close()
             return None
 
+        if self.reader is not None:
+            self.read_frames(data)
+            return None
+
         self.inbuffer += data
 
         while self.inbuffer:
@@ -185,6 +432,11 @@ class EventHandler(object):
 
                 self.inbuffer = self.inbuffer[index+len(match):]
                 self.process_message()
+                if self.reader is not None:
+                    # framing was negotiated, the rest are frames
+                    data, self.inbuffer = self.inbuffer, b''
+                    self.read_frames(data)
+                    break
             else:
                 index = len(match) - 1
                 while index and not self.inbuffer.endswith(match[:index]):
@@ -199,11 +451,27 @@ class EventHandler(object):
                     self.handle_read(self.inbuffer)
                     self.inbuffer = b''
 
+    def enable_framing(self) -> None:
+        """Read length prefixed frames instead of lines from now on
+        """
+
+        self.reader = FrameReader()
+
+    def read_frames(self, data: bytes) -> None:
+        """Feed the frame reader and handle every completed frame
+        """
+
+        for payload, flags in self.reader.feed(data):
+            self.handle_frame(payload, flags)
+
     def push(self, data: bytes) -> None:
-        """Push some bytes into the write buffer
+        """Push some bytes into the write buffer and wake the loop up
         """
 
-        self.outbuffer += data
+        with self._write_lock:
+            self.outbuffer += data
+
+        IOHandlers().update(self)
 
     def handle_read(self, data: bytes) -> None:
         """Handle data readign from select
@@ -217,6 +485,12 @@ class EventHandler(object):
 
         raise RuntimeError('You have to implement this method')
 
+    def handle_frame(self, payload: bytes, flags: int) -> None:
+        """Process a full frame
+        """
+
+        raise RuntimeError('You have to implement this method')
+
     def ready_to_read(self) -> bool:
         """This handler is ready to read
         """
@@ -240,8 +514,37 @@ class EventHandler(object):
         self.connected = False
 
 
-def poll() -> None:
-    """Poll the select
+def poll(timeout: float=0) -> None:
+    """Wait for events in the selector (or select) and dispatch them
+    """
+
+    selector = IOHandlers().selector()
+    if selector is None:
+        return select_poll()
+
+    try:
+        events = selector.select(timeout)
+    except (OSError, select.error) as error:
+        if error.args[0] == errno.EINTR:
+            return
+        raise
+
+    for key, mask in events:
+        handler = key.data
+        if handler is None:
+            IOHandlers()._waker.consume()
+            continue
+
+        if mask & selectors.EVENT_READ and handler.ready_to_read() is True:
+            handler.recv()
+
+        if mask & selectors.EVENT_WRITE and handler.connected and \
+                handler.ready_to_write() is True:
+            handler.send()
+
+
+def select_poll() -> None:
+    """Poll the select (used where selectors is not available)
     """
 
     recv = send = []  # type: List[bytes]
@@ -275,7 +578,7 @@ def poll() -> None:
         handler.send()
 
 
-def loop() -> None:
+def loop() -> threading.Thread:
     """Main event loop
     """
 
@@ -287,16 +590,20 @@ def loop() -> None:
             logging.error(traceback_line)
 
         with IOHandlers()._lock:
-            for handler in IOHandlers()._handler_pool.values():
+            for handler in list(IOHandlers()._handler_pool.values()):
                 handler.close()
-            IOHandlers()._handler_pool = {}
+            IOHandlers().reset()
 
     def inner_loop() -> None:
 
         while NOT_TERMINATE:
             try:
-                poll()
-                time.sleep(0.01)
+                if IOHandlers().selector() is not None:
+                    poll(IOHandlers().wheel.next_timeout())
+                else:
+                    poll()
+                    time.sleep(0.01)
+                IOHandlers().wheel.advance()
             except OSError as error:
                 if os.name != 'posix' and error.errno == os.errno.WSAENOTSOCK:
                     msg = (
@@ -315,10 +622,20 @@ def loop() -> None:
                 restart_poll(error)
 
         # cleanup
-        for handler in IOHandlers()._handler_pool.values():
+        for handler in list(IOHandlers()._handler_pool.values()):
             handler.close()
+        IOHandlers().reset()
+
+    thread = threading.Thread(target=inner_loop)
+    thread.start()
+    return thread
+
+
+def call_later(delay: float, callback: Callable) -> Timer:
+    """Call the given callable from the loop thread in delay seconds
+    """
 
-    threading.Thread(target=inner_loop).start()
+    return IOHandlers().wheel.schedule(delay, callback)
 
 
 def terminate() -> None:
@@ -327,6 +644,7 @@ def terminate() -> None:
 
     global NOT_TERMINATE
     NOT_TERMINATE = False
+    IOHandlers().wake()
 
 
 def restart() -> None:
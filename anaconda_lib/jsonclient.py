@@ -7,6 +7,7 @@
 """
 
 import sys
+import time
 import uuid
 import socket
 import logging
@@ -22,30 +23,42 @@ try:
 except ImportError:
     import json
 
-from .callback import Callback
-from .ioloop import EventHandler
+from .callback import Callback, CallbackRegistry
+from .framing import Framing, offer
+from .ioloop import EventHandler, call_later
 from ._typing import Callable, Any
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.StreamHandler(sys.stdout))
 logger.setLevel(logging.DEBUG)
 
+# seconds to wait for a response before forgetting its callback
+REQUEST_TIMEOUT = 300
+# seconds to wait for the JsonServer to answer a framing negotiation
+NEGOTIATION_TIMEOUT = 5
+
 
 class AsynClient(EventHandler):
 
     """Asynchronous JSON connection to anaconda server
     """
 
-    def __init__(self, port: int, host: str='localhost') -> None:
+    def __init__(self, port: int, host: str='localhost', sock: socket.socket=None) -> None:  # noqa
         if port == 0:
             # use an Unix Socket Domain
             EventHandler.__init__(
                 self, host, socket.socket(socket.AF_UNIX, socket.SOCK_STREAM))
         else:
-            EventHandler.__init__(self, (host, port))
+            EventHandler.__init__(self, (host, port), sock)
 
-        self.callbacks = {}
+        self.callbacks = CallbackRegistry(REQUEST_TIMEOUT)
         self.rbuffer = []
+        self.framing = None
+        self.negotiating = False
+        self.negotiation = None
+        self.pending = []
+        self.superseding = {}
+        self.last_activity = time.time()
 
     def ready_to_write(self) -> bool:
         """I am ready to send some data?
@@ -72,7 +85,7 @@ class AsynClient(EventHandler):
         else:
             hexid = callback.hexid
 
-        self.callbacks[hexid] = callback
+        self.callbacks.add(hexid, callback)
         return hexid
 
     def pop_callback(self, hexid: str) -> Callable:
@@ -93,12 +106,31 @@ class AsynClient(EventHandler):
         except (NameError, ValueError):
             data = json.loads(message.replace(b'\t', b' ' * 8).decode('utf8'))
 
-        callback = self.pop_callback(data.pop('uid'))
+        self.dispatch(data)
+
+    def handle_frame(self, payload: bytes, flags: int) -> None:
+        """Called when a full frame has been read from the socket
+        """
+
+        self.dispatch(self.framing.decode(payload, flags))
+
+    def dispatch(self, data: Any) -> None:
+        """Run the callback registered for the given message
+        """
+
+        self.last_activity = time.time()
+        if data.get('partial', False):
+            # more messages are coming for this callback, keep it around
+            callback = self.callbacks.get(data.pop('uid'))
+        else:
+            callback = self.pop_callback(data.pop('uid'))
         if callback is None:
-            logger.error(
+            # late response for a superseded or cancelled request
+            logger.debug(
                 'Received {} from the JSONServer but there is not callback '
-                'to handle it. Aborting....'.format(message)
+                'to handle it. Dropping....'.format(data)
             )
+            return
 
         try:
             callback(data)
@@ -107,10 +139,115 @@ class AsynClient(EventHandler):
             for traceback_line in traceback.format_exc().splitlines():
                 logging.error(traceback_line)
 
+    def negotiate_framing(self, compression: bool=False) -> None:
+        """Ask the JsonServer to switch to length prefixed binary frames
+
+        Commands sent while the negotiation is going on are queued and
+        flushed once the server answers, if the server doesn't understand
+        the request or doesn't answer it in NEGOTIATION_TIMEOUT seconds
+        the connection keeps using the line based protocol
+        """
+
+        self.negotiating = True
+        self.negotiation = call_later(
+            NEGOTIATION_TIMEOUT, self._negotiation_expired
+        )
+        self.push_data({
+            'method': 'negotiate_framing',
+            'handler': 'jsonserver',
+            'framing': offer(compression),
+            'uid': self.add_callback(self._framing_negotiated)
+        })
+
+    def _framing_negotiated(self, data: Any) -> None:
+        """Switch the framing (if accepted) and flush pending commands
+        """
+
+        accepted = data.get('success') and data.get('framing')
+        if not self.negotiating:
+            if accepted:
+                # too late, the commands sent meanwhile were lines that
+                # the server would take as frames, start over
+                logger.warning(
+                    'JsonServer accepted the binary framing too late, '
+                    'closing the connection'
+                )
+                self.close()
+            return
+
+        self.negotiation.cancel()
+        if accepted:
+            self.framing = Framing.from_description(data['framing'])
+            self.enable_framing()
+        else:
+            logger.info(
+                'JsonServer does not support binary framing: {}'.format(
+                    data.get('error'))
+            )
+
+        self._flush_pending()
+
+    def _negotiation_expired(self) -> None:
+        """The JsonServer didn't answer, keep using the line protocol
+        """
+
+        if not self.negotiating:
+            return
+
+        logger.info(
+            'JsonServer did not answer the binary framing negotiation in '
+            '{} seconds, using the line based protocol'.format(
+                NEGOTIATION_TIMEOUT)
+        )
+        self._flush_pending()
+
+    def _flush_pending(self) -> None:
+        """End the negotiation sending the commands queued meanwhile
+        """
+
+        self.negotiating = False
+        pending, self.pending = self.pending, []
+        for command in pending:
+            self.push_data(command)
+
     def send_command(self, callback: Callable, **data: Any) -> None:
         """Send the given command that should be handled bu the given callback
         """
         data['uid'] = self.add_callback(callback)
+        if data.get('supersede', False):
+            # the result of the previous request is not useful anymore
+            key = (data['method'], data.get('vid'))
+            self.pop_callback(self.superseding.get(key, ''))
+            self.superseding[key] = data['uid']
+
+        self._send(data)
+
+    def cancel(self, uid: str) -> None:
+        """Cancel the request with the given uid if it is still pending
+        """
+
+        if self.pop_callback(uid) is not None:
+            self._send(
+                {'method': 'cancel', 'handler': 'jsonserver', 'uid': uid}
+            )
+
+    def _send(self, data: Any) -> None:
+        """Push the given data or queue it while negotiating the framing
+        """
+
+        if self.negotiating:
+            self.pending.append(data)
+            return
+
+        self.push_data(data)
+
+    def push_data(self, data: Any) -> None:
+        """Encode the given data with the current framing and push it
+        """
+
+        if self.framing is not None:
+            self.push(self.framing.encode(data))
+            return
 
         try:
             self.push(
@@ -119,11 +256,26 @@ class AsynClient(EventHandler):
         except NameError:
             self.push(bytes('{}\r\n'.format(json.dumps(data)), 'utf8'))
 
+    def close(self) -> None:
+        """Close the connection forgetting the callbacks waiting on it
+        """
+
+        EventHandler.close(self)
+        if self.negotiation is not None:
+            self.negotiation.cancel()
+        self.callbacks.sweep()
+        self.superseding = {}
+
     def __repr__(self):
         """String representation of the client
         """
 
-        return '{}:{} ({})'.format(
-            self.address[0], self.address[1],
-            'connected' if self.connected else 'disconnected'
+        address = self.address
+        if not isinstance(address, str):
+            address = '{}:{}'.format(*address)
+
+        return '{} ({}, {})'.format(
+            address, 'connected' if self.connected else 'disconnected',
+            ', '.join('{}: {}'.format(name, count) for name, count in sorted(
+                self.callbacks.stats().items()))
         )
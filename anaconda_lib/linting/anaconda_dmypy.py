@@ -0,0 +1,173 @@
+# Copyright (C) 2013 - 2016 - Oscar Campos <oscar.campos@member.fsf.org>
+# This program is Free Software see LICENSE file for details
+
+"""
+Anaconda MyPy daemon (dmypy) wrapper
+"""
+
+import os
+import re
+import sys
+import logging
+import hashlib
+import tempfile
+import threading
+from subprocess import PIPE, Popen
+
+from .anaconda_mypy import MyPy
+
+PROJECT_MARKERS = (
+    'setup.py', 'setup.cfg', 'pyproject.toml', 'mypy.ini', '.mypy.ini', '.git'
+)
+# flags that the daemon doesn't understand or that make no sense for it
+IGNORED_FLAGS = ('--incremental', '--fast-parser', '')
+ERROR_LINE = re.compile(r'^.+:\d+:')
+
+
+class DaemonError(Exception):
+    """Raised when the daemon can not be used to check the source
+    """
+
+
+def project_root(filename):
+    """Return the nearest parent directory of filename that looks a project
+    """
+
+    directory = os.path.dirname(os.path.abspath(filename))
+    current = directory
+    while True:
+        for marker in PROJECT_MARKERS:
+            if os.path.exists(os.path.join(current, marker)):
+                return current
+
+        parent = os.path.dirname(current)
+        if parent == current:
+            return directory
+        current = parent
+
+
+class Daemon(object):
+    """A supervised dmypy daemon for a given project root
+    """
+
+    def __init__(self, root, flags, mypypath):
+        self.root = root
+        self.flags = flags
+        self.mypypath = mypypath
+        self.status_file = os.path.join(
+            tempfile.gettempdir(), 'anaconda-dmypy-{0}.json'.format(
+                hashlib.md5(
+                    '{0}{1}'.format(sys.executable, root).encode('utf8')
+                ).hexdigest()
+            )
+        )
+
+    def start(self, popen_kwargs):
+        """Start (or restart if it is already running) the daemon
+        """
+
+        self._command(['restart', '--'] + list(self.flags), popen_kwargs)
+
+    def check(self, filename, popen_kwargs):
+        """Check the given file returning back the mypy output
+
+        The daemon looks for changes in every file of its build so the
+        edits of the modules imported by the file are seen too
+        """
+
+        return self._command(['check', filename], popen_kwargs)
+
+    def stop(self):
+        """Stop the daemon
+        """
+
+        try:
+            self._command(['stop'], {'cwd': self.root})
+        except Exception as error:
+            logging.info('dmypy could not be stopped: {0}'.format(error))
+
+    def _command(self, args, popen_kwargs):
+        """Run the given dmypy command and return back its output
+        """
+
+        popen_kwargs = dict(popen_kwargs, cwd=self.root)
+        proc = Popen(
+            [sys.executable, '-m', 'mypy.dmypy',
+             '--status-file', self.status_file] + args,
+            stdout=PIPE, stderr=PIPE, **popen_kwargs
+        )
+        out, err = proc.communicate()
+        if sys.version_info >= (3,):
+            out, err = out.decode('utf8'), err.decode('utf8')
+
+        # dmypy exits with 1 when there are type errors, 2 is a failure
+        if proc.returncode not in (0, 1) or err.strip():
+            raise DaemonError(err.strip() or out.strip())
+
+        return out
+
+
+class DMyPy(MyPy):
+    """MyPy class for Anaconda that uses a long running dmypy daemon
+
+    There is a daemon for every project root, they are restarted if the
+    mypy settings or the mypypath change and if the daemon can not be used
+    the one shot mypy process is used as fallback
+    """
+
+    daemons = {}
+    _lock = threading.Lock()
+
+    def check_source(self):
+        """Check the source using the project daemon
+        """
+
+        if MyPy.VERSION < (0, 600, 0) or not self.filename:
+            return super(DMyPy, self).check_source()
+
+        try:
+            with DMyPy._lock:
+                out = self._check_with_daemon()
+        except (DaemonError, OSError) as error:
+            logging.info(
+                'dmypy failed, falling back to mypy: {0}'.format(error)
+            )
+            return super(DMyPy, self).check_source()
+
+        return self.parse_output('\n'.join(
+            line for line in out.splitlines() if ERROR_LINE.match(line)
+        ))
+
+    def _check_with_daemon(self):
+        """Check the file in the daemon (re)starting it when needed
+        """
+
+        flags = tuple(
+            ['--no-error-summary', '--hide-error-context',
+             '--follow-imports', 'silent'] +
+            [f for f in self.settings[:-1] if f not in IGNORED_FLAGS]
+        )
+        root = project_root(self.filename)
+        popen_kwargs = self.popen_kwargs()
+        daemon = DMyPy.daemons.get(root)
+        if daemon is None or (daemon.flags, daemon.mypypath) != (
+                flags, self.mypypath):
+            daemon = DMyPy.daemons[root] = Daemon(root, flags, self.mypypath)
+            daemon.start(popen_kwargs)
+
+        try:
+            return daemon.check(self.filename, popen_kwargs)
+        except DaemonError:
+            # the daemon could have died, give it a second chance
+            daemon.start(popen_kwargs)
+            return daemon.check(self.filename, popen_kwargs)
+
+
+def shutdown_daemons():
+    """Stop every running dmypy daemon
+    """
+
+    with DMyPy._lock:
+        for daemon in DMyPy.daemons.values():
+            daemon.stop()
+        DMyPy.daemons.clear()
@@ -7,29 +7,30 @@
 Anaconda McCabe
 """
 
-import ast
-
 from .mccabe import McCabeChecker
+from .parsed_source import ParsedSource
 
 
 class AnacondaMcCabe(object):
     """Wrapper object around McCabe python script
+
+    The code can be a ParsedSource shared with other linters
     """
 
     checker = McCabeChecker
 
     def __init__(self, code, filename):
-        self.code = code
+        self.source = ParsedSource.of(code, filename)
+        self.code = self.source.code
         self.filename = filename
 
     @property
     def tree(self):
-        """Compile and send back an AST if buffer is able to be parsed
+        """Send back the AST if buffer is able to be parsed
         """
 
         try:
-            code = self.code.encode('utf8') + b'\n'
-            return compile(code, self.filename, 'exec', ast.PyCF_ONLY_AST)
+            return self.source.tree
         except SyntaxError:
             return None
 
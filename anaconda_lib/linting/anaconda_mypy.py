@@ -87,6 +87,23 @@ class MyPy(object):
             sys.executable, err_sum, err_ctx, dont_follow_imports,
             ' '.join(self.settings[:-1]), self.filename)
         )
+
+        proc = Popen(args, stdout=PIPE, stderr=PIPE, **self.popen_kwargs())
+        out, err = proc.communicate()
+        if err is not None and len(err) > 0:
+            if sys.version_info >= (3,):
+                err = err.decode('utf8')
+            raise RuntimeError(err)
+
+        if sys.version_info >= (3,):
+            out = out.decode('utf8')
+
+        return self.parse_output(out)
+
+    def popen_kwargs(self):
+        """Return the keyword arguments used to spawn mypy processes
+        """
+
         env = os.environ.copy()
         if self.mypypath is not None and self.mypypath != "":
             env['MYPYPATH'] = self.mypypath
@@ -101,15 +118,11 @@ class MyPy(object):
             startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
             kwargs['startupinfo'] = startupinfo
 
-        proc = Popen(args, stdout=PIPE, stderr=PIPE, **kwargs)
-        out, err = proc.communicate()
-        if err is not None and len(err) > 0:
-            if sys.version_info >= (3,):
-                err = err.decode('utf8')
-            raise RuntimeError(err)
+        return kwargs
 
-        if sys.version_info >= (3,):
-            out = out.decode('utf8')
+    def parse_output(self, out):
+        """Parse the mypy output lines into anaconda errors
+        """
 
         errors = []
         for line in out.splitlines():
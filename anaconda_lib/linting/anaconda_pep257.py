@@ -9,14 +9,18 @@ Anaconda PyDocStyle wrapper
 
 try:
     import pydocstyle
+    from linting.parsed_source import ParsedSource
 
     class PEP257(object):
 
         """PEP-257 class for Anaconda
+
+        The code can be a ParsedSource shared with other linters
         """
 
         def __init__(self, code, filename, ignore):
-            self.code = code
+            self.source = ParsedSource.of(code, filename)
+            self.code = self.source.code
             self.filename = filename
             self.ignore = [] if ignore is None else ignore
 
@@ -25,9 +29,15 @@ try:
             """
 
             errors = []
+            try:
+                self.source.tree
+            except (SyntaxError, ValueError, TypeError):
+                # pydocstyle can not parse invalid code
+                return errors
+
             try:
                 for error in pydocstyle.ConventionChecker().check_source(
-                    self.code, self.filename
+                    self.code, self.filename, tokens=self.source.tokens
                 ):
                     error_code = getattr(error, 'code', None)
                     if error_code is not None and error_code not in self.ignore:  # noqa
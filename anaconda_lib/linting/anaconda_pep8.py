@@ -4,9 +4,15 @@
 # This program is Free Software see LICENSE file for details
 
 import os
+import tokenize
 
 import pycodestyle as pep8
 from linting import linter
+from linting.parsed_source import ParsedSource
+
+MAX_STYLE_OPTIONS = 16
+MAX_MEMOIZED_LINES = 50000
+STYLE_OPTIONS = {}
 
 
 class Pep8Error(linter.LintError):
@@ -33,6 +39,274 @@ class Pep8Warning(linter.LintError):
         )
 
 
+class AnacondaReport(pep8.BaseReport):
+    """Helper class to report PEP8 problems
+    """
+
+    def __init__(self, options, filename, levels):
+        super(AnacondaReport, self).__init__(options)
+        self.lint_errors = []
+        self.lint_filename = filename
+        self.levels = levels
+
+    def error(self, line_number, offset, text, check):
+        """Report an error, according to options
+        """
+
+        col = line_number
+        code = text[:4]
+        message = text[5:]
+
+        if self._ignore_code(code):
+            return
+
+        if code in self.counters:
+            self.counters[code] += 1
+        else:
+            self.counters[code] = 1
+            self.messages[code] = message
+
+        if code in self.expected:
+            return
+
+        self.file_errors += 1
+        self.total_errors += 1
+
+        pep8_error = code.startswith('E')
+        klass = Pep8Error if pep8_error else Pep8Warning
+        self.lint_errors.append(klass(
+            self.lint_filename, col, offset, code, message,
+            self.levels[code[0]]
+        ))
+
+        return code
+
+
+class IncrementalChecker(pep8.Checker):
+    """pycodestyle Checker that memoizes the results of logical lines
+
+    The results (and the checker state they leave behind) of every logical
+    line are stored keyed by the physical lines that form it and by the
+    checker state it has been checked with (blank lines, previous logical
+    line, indentation and plugins state), so in a file that is being
+    edited only the logical lines that changed (or which context changed)
+    are checked again. Definitions are always checked as the blank_lines
+    check looks at lines outside of the logical line for them. Physical
+    lines are memoized in the same way.
+
+    If a ParsedSource is given its tokens and AST are used instead of
+    tokenizing and parsing the lines again.
+    """
+
+    def __init__(self, memo, *args, **kwargs):
+        self.source = kwargs.pop('source', None)
+        super(IncrementalChecker, self).__init__(*args, **kwargs)
+        self.memo = memo
+
+    def generate_tokens(self):
+        """Replay the shared tokens running the physical line checks
+        """
+
+        if self.source is None:
+            for token in super(IncrementalChecker, self).generate_tokens():
+                yield token
+            return
+
+        try:
+            prev_physical = ''
+            for token in self.source.partial_tokens:
+                if token[2][0] > self.total_lines:
+                    return
+                # the physical checks expect the lines of the token read
+                while self.line_number < token[3][0] and self.readline():
+                    pass
+                self.noqa = token[4] and pep8.noqa(token[4])
+                self.maybe_check_physical(token, prev_physical)
+                yield token
+                prev_physical = token[4]
+            # raise the error that stopped the tokenizer (if any)
+            self.source.tokens
+        except (SyntaxError, tokenize.TokenError) as error:
+            # the tokenizer read every line up to the one with the error
+            last = getattr(error, 'lineno', None) or self.total_lines
+            while self.line_number < last and self.readline():
+                pass
+            self.report_invalid_syntax()
+
+    def check_ast(self):
+        """Run the AST checks over the shared AST
+        """
+
+        if self.source is None:
+            return super(IncrementalChecker, self).check_ast()
+
+        try:
+            tree = self.source.tree
+        except (ValueError, SyntaxError, TypeError):
+            return self.report_invalid_syntax()
+
+        for name, cls, __ in self._ast_checks:
+            checker = cls(tree, self.filename)
+            for lineno, offset, text, check in checker.run():
+                if not self.lines or not pep8.noqa(self.lines[lineno - 1]):
+                    self.report_error(lineno, offset, text, check)
+
+    def check_physical(self, line):
+        """Replay the memoized results or check and memoize the line
+        """
+
+        if self.line_number >= self.total_lines:
+            # trailing_blank_lines looks at the position of the line
+            return super(IncrementalChecker, self).check_physical(line)
+
+        key = (
+            line, self.indent_char, self.multiline, bool(self.noqa),
+            self.line_number == 1
+        )
+        cached = self.memo.get(key)
+        if cached is not None:
+            self.physical_line = line
+            for offset, text, check in cached:
+                self.report_error(self.line_number, offset, text, check)
+                if text[:4] == 'E101':
+                    self.indent_char = line[0]
+            return
+
+        errors = []
+        report_error = self.report_error
+
+        def record(line_number, offset, text, check):
+            errors.append((offset, text, check))
+            return report_error(line_number, offset, text, check)
+
+        self.report_error = record
+        try:
+            super(IncrementalChecker, self).check_physical(line)
+        finally:
+            self.report_error = report_error
+
+        self._memoize(key, tuple(errors))
+
+    def check_logical(self):
+        """Replay the memoized results or check and memoize the line
+        """
+
+        if not self.tokens:
+            return super(IncrementalChecker, self).check_logical()
+
+        start_row = self.tokens[0][2][0]
+        lines = tuple(self.lines[start_row - 1:self.tokens[-1][3][0]])
+        if any(pep8.STARTSWITH_TOP_LEVEL_REGEX.match(line.lstrip())
+               for line in lines):
+            return super(IncrementalChecker, self).check_logical()
+
+        key = (lines, self._context())
+        cached = self.memo.get(key)
+        if cached is not None:
+            self.report.increment_logical_line()
+            errors, state = cached
+            for row, offset, text, check in errors:
+                self.report_error(start_row + row, offset, text, check)
+            self._restore(state)
+            return
+
+        errors = []
+        report_error = self.report_error
+
+        def record(line_number, offset, text, check):
+            errors.append((line_number - start_row, offset, text, check))
+            return report_error(line_number, offset, text, check)
+
+        self.report_error = record
+        try:
+            super(IncrementalChecker, self).check_logical()
+        finally:
+            self.report_error = report_error
+
+        self._memoize(key, (tuple(errors), self._state()))
+
+    def _memoize(self, key, value):
+        """Store the results of a line keeping the memo bounded
+        """
+
+        if len(self.memo) >= MAX_MEMOIZED_LINES:
+            self.memo.clear()
+        self.memo[key] = value
+
+    def _context(self):
+        """Return the checker state that logical checks depend on
+        """
+
+        return (
+            self.blank_lines, self.blank_before, self.indent_char,
+            self.previous_logical, self.previous_indent_level,
+            self.previous_unindented_logical_line, self._plugins_state()
+        )
+
+    def _state(self):
+        """Return the checker state left behind by a logical line
+        """
+
+        return (
+            self.blank_lines, self.blank_before, self.indent_level,
+            self.previous_logical, self.previous_indent_level,
+            self.previous_unindented_logical_line, self._plugins_state()
+        )
+
+    def _plugins_state(self):
+        """Return an immutable copy of the check plugins custom state
+        """
+
+        return tuple(sorted(
+            (name, tuple(sorted(state.items())))
+            for name, state in self._checker_states.items()
+        ))
+
+    def _restore(self, state):
+        """Restore the checker state left by a memoized logical line
+        """
+
+        (self.blank_lines, self.blank_before, self.indent_level,
+         self.previous_logical, self.previous_indent_level,
+         self.previous_unindented_logical_line, checker_states) = state
+        self._checker_states = dict(
+            (name, dict(values)) for name, values in checker_states
+        )
+        self.tokens = []
+
+
+def style_options(rcfile, ignore, max_line_length):
+    """Return the (cached) pycodestyle options for the given settings
+
+    The logical lines memo used with the options is returned with them
+    """
+
+    rcfile = os.path.expanduser(rcfile) if rcfile else None
+    try:
+        mtime = os.path.getmtime(rcfile) if rcfile else None
+    except OSError:
+        mtime = None
+
+    key = (rcfile, mtime, tuple(ignore or ()), max_line_length)
+    cached = STYLE_OPTIONS.get(key)
+    if cached is None:
+        params = {}
+        if not rcfile:
+            params['ignore'] = ignore
+        else:
+            params['config_file'] = rcfile
+
+        options = pep8.StyleGuide(**params).options
+        if not rcfile:
+            options.max_line_length = max_line_length
+
+        if len(STYLE_OPTIONS) >= MAX_STYLE_OPTIONS:
+            STYLE_OPTIONS.clear()
+        cached = STYLE_OPTIONS[key] = (options, {})
+
+    return cached
+
+
 class Pep8Linter(linter.Linter):
     """Linter for pep8 Linter
     """
@@ -60,67 +334,25 @@ class Pep8Linter(linter.Linter):
 
     def check(self, code, filename, rcfile, ignore, max_line_length, levels):
         """Check the code with pyflakes to find errors
-        """
-
-        messages = []
-        _lines = code.split('\n')
-
-        if _lines:
-            class AnacondaReport(pep8.BaseReport):
-                """Helper class to report PEP8 problems
-                """
 
-                def error(self, line_number, offset, text, check):
-                    """Report an error, according to options
-                    """
-
-                    col = line_number
-                    code = text[:4]
-                    message = text[5:]
-
-                    if self._ignore_code(code):
-                        return
-
-                    if code in self.counters:
-                        self.counters[code] += 1
-                    else:
-                        self.counters[code] = 1
-                        self.messages[code] = message
-
-                    if code in self.expected:
-                        return
-
-                    self.file_errors += 1
-                    self.total_errors += 1
-
-                    pep8_error = code.startswith('E')
-                    klass = Pep8Error if pep8_error else Pep8Warning
-                    messages.append(klass(
-                        filename, col, offset, code, message, levels[code[0]]
-                    ))
-
-                    return code
-
-            params = {'reporter': AnacondaReport}
-            if not rcfile:
-                _ignore = ignore
-                params['ignore'] = _ignore
-            else:
-                params['config_file'] = os.path.expanduser(rcfile)
-
-            options = pep8.StyleGuide(**params).options
-            if not rcfile:
-                options.max_line_length = max_line_length
+        The code can be a ParsedSource shared with other linters
+        """
 
-            good_lines = [l + '\n' for l in _lines]
-            good_lines[-1] = good_lines[-1].rstrip('\n')
+        source = ParsedSource.of(code, filename)
+        options, memo = style_options(rcfile, ignore, max_line_length)
+        report = AnacondaReport(options, filename, levels)
 
-            if not good_lines[-1]:
-                good_lines = good_lines[:-1]
+        lines = list(source.lines)
+        if lines and lines[0][:1] == '\ufeff':
+            # the checker strips the BOM so the shared tokens don't match
+            source = None
 
-            pep8.Checker(filename, good_lines, options=options).check_all()
+        IncrementalChecker(
+            memo, filename, lines, options=options, report=report,
+            source=source
+        ).check_all()
 
-        return messages
+        return report.lint_errors
 
     def parse(self, errors):
         errors_list = []
@@ -4,9 +4,9 @@
 # This program is Free Software see LICENSE file for details
 
 import re
-import _ast
 
 from linting import linter
+from linting.parsed_source import ParsedSource
 import pyflakes.checker as pyflakes
 
 
@@ -47,19 +47,18 @@ class PyFlakesLinter(linter.Linter):
 
     def check(self, code, filename, ignore=None):
         """Check the code with pyflakes to find errors
+
+        The code can be a ParsedSource shared with other linters
         """
 
         class FakeLoc:
             lineno = 0
 
+        source = ParsedSource.of(code, filename)
         try:
-            fname = ''
-            if filename is not None:
-                fname = filename.encode('utf8') or ''
-            code = code.encode('utf8') + b'\n'
-            tree = compile(code, fname, 'exec', _ast.PyCF_ONLY_AST)
+            tree = source.tree
         except (SyntaxError, IndentationError):
-            return self._handle_syntactic_error(code, filename)
+            return self._handle_syntactic_error(source.code, filename)
         except ValueError as error:
             return [PyFlakesError(filename, FakeLoc(), 'E', error.args[0]), []]
         else:
@@ -7,9 +7,12 @@
 Anaconda PyLint wrapper
 """
 
+import io
 import os
 import sys
+import time
 import logging
+import threading
 import subprocess
 
 if sys.version_info >= (3, 0):
@@ -117,14 +120,13 @@ class PyLinter(object):
                         # doesn't
                         pass
 
-                errors[self._map_code(code)[0]].append(
+                level, code = self._map_code(code)
+                errors[level].append(
                     {
                         'line': int(line),
                         'offset': offset,
-                        'code': self._map_code(code)[1],
-                        'message': '[{0}] {1}'.format(
-                            self._map_code(code)[1], message
-                        ),
+                        'code': code,
+                        'message': '[{0}] {1}'.format(code, message),
                     }
                 )
 
@@ -135,3 +137,100 @@ class PyLinter(object):
 
         mapping = {'C': 'V', 'E': 'E', 'F': 'E', 'I': 'V', 'R': 'W', 'W': 'W'}
         return (mapping[code[0]], code[1:])
+
+
+class WarmPyLinter(PyLinter):
+    """PyLinter that runs pylint inside the JsonServer process
+
+    The pylint linter (and the astroid cache of the imported modules) is
+    kept alive between runs and the unsaved buffer is linted through the
+    pylint --from-stdin option, messages are collected by a reporter so
+    there is no need to parse pylint output. The linter is configured
+    again only if the rcfile changes. Requires pylint 2.5 or higher
+    """
+
+    _linter = None
+    _config = None
+    _last_run = 0
+    _lock = threading.Lock()
+
+    def __init__(self, filename, rcfile, code=None):
+        self.code = code
+        self.messages = []
+        super(WarmPyLinter, self).__init__(filename, rcfile)
+
+    def execute(self):
+        """Lint the buffer in the warm pylint linter"""
+
+        if self.code is None:
+            with open(self.filename, 'r') as source:
+                self.code = source.read()
+
+        rcfile = os.path.expanduser(self.rcfile) if self.rcfile else None
+        try:
+            config = (rcfile, os.path.getmtime(rcfile) if rcfile else None)
+        except OSError:
+            config = (rcfile, None)
+
+        with WarmPyLinter._lock:
+            stdin = sys.stdin
+            sys.stdin = io.TextIOWrapper(
+                io.BytesIO(self.code.encode('utf8')), encoding='utf8'
+            )
+            try:
+                self.messages = self._lint(config)
+            finally:
+                sys.stdin = stdin
+
+    def _lint(self, config):
+        """Run the linter (re)configuring it if needed"""
+
+        from pylint.lint import Run
+        from pylint.reporters import CollectingReporter
+
+        cls = WarmPyLinter
+        if cls._linter is None or cls._config != config:
+            args = ['--from-stdin', '-r', 'n']
+            if config[0] is not None:
+                args.append('--rcfile={0}'.format(config[0]))
+
+            reporter = CollectingReporter()
+            cls._last_run = time.time()
+            run = Run(args + [self.filename], reporter=reporter, exit=False)
+            cls._linter, cls._config = run.linter, config
+            return reporter.messages
+
+        self._forget_modified_modules()
+        cls._linter.reporter.reset()
+        cls._linter.check([self.filename])
+        return cls._linter.reporter.messages
+
+    def _forget_modified_modules(self):
+        """Drop from the astroid cache the modules modified since last run"""
+
+        from astroid import MANAGER
+
+        last_run, WarmPyLinter._last_run = WarmPyLinter._last_run, time.time()
+        for name, module in list(MANAGER.astroid_cache.items()):
+            try:
+                if module.file and os.path.getmtime(module.file) > last_run:
+                    MANAGER.astroid_cache.pop(name, None)
+            except (OSError, TypeError):
+                continue
+
+    def parse_errors(self):
+        """Convert the collected pylint messages to anaconda errors"""
+
+        errors = {'E': [], 'W': [], 'V': []}
+        for message in self.messages:
+            level, code = self._map_code(message.msg_id)
+            errors[level].append(
+                {
+                    'line': int(message.line),
+                    'offset': message.column,
+                    'code': code,
+                    'message': '[{0}] {1}'.format(code, message.msg),
+                }
+            )
+
+        return errors
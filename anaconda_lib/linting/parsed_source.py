@@ -0,0 +1,146 @@
+# -*- coding: utf8 -*-
+
+# Copyright (C) 2013 - Oscar Campos <oscar.campos@member.fsf.org>
+# This program is Free Software see LICENSE file for details
+
+"""
+Anaconda parsed source shared by the linters of a lint request
+"""
+
+import ast
+import time
+import tokenize
+import threading
+from contextlib import contextmanager
+
+
+class ParsedSource(object):
+    """The source of a lint request and everything derived from it
+
+    The encoded source, the physical lines, the tokens and the AST are
+    computed once (the first time that a linter asks for them) and shared
+    by every linter that runs for the request, even when the linters run
+    in parallel. Errors found tokenizing or parsing the source are cached
+    as well and raised again to every linter that asks for the result.
+
+    The time spent in every stage (and in every linter that is wrapped
+    with `timed`) is recorded in milliseconds in `timings`.
+    """
+
+    def __init__(self, code, filename=None):
+        self.code = code
+        self.filename = filename or ''
+        self.timings = {}
+        self._lock = threading.RLock()
+        self._encoded = None
+        self._lines = None
+        self._tokens = None
+        self._token_error = None
+        self._tree = None
+        self._tree_error = None
+
+    @classmethod
+    def of(cls, code, filename=None):
+        """Return the given ParsedSource or a new one for the given code
+        """
+
+        if isinstance(code, cls):
+            return code
+
+        return cls(code, filename)
+
+    @contextmanager
+    def timed(self, stage):
+        """Record the time spent in the given stage
+        """
+
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.timings[stage] = round((time.time() - start) * 1000, 3)
+
+    @property
+    def encoded(self):
+        """The source encoded as utf8 and ended by a new line
+        """
+
+        with self._lock:
+            if self._encoded is None:
+                with self.timed('encode'):
+                    self._encoded = self.code.encode('utf8') + b'\n'
+
+            return self._encoded
+
+    @property
+    def lines(self):
+        """The physical lines of the source (with their line endings)
+        """
+
+        with self._lock:
+            if self._lines is None:
+                with self.timed('lines'):
+                    lines = [line + '\n' for line in self.code.split('\n')]
+                    lines[-1] = lines[-1].rstrip('\n')
+                    if not lines[-1]:
+                        lines = lines[:-1]
+                    self._lines = lines
+
+            return self._lines
+
+    @property
+    def tokens(self):
+        """The tokens of the source
+
+        If the source can't be tokenized the error is raised after the
+        tokens found before the error are stored in `partial_tokens`
+        """
+
+        with self._lock:
+            if self._tokens is None:
+                lines = self.lines
+                with self.timed('tokenize'):
+                    self._tokens = []
+                    remaining = iter(lines)
+                    readline = lambda: next(remaining, '')  # noqa
+                    try:
+                        for token in tokenize.generate_tokens(readline):
+                            self._tokens.append(token)
+                    except (SyntaxError, tokenize.TokenError) as error:
+                        self._token_error = error
+
+            if self._token_error is not None:
+                raise self._token_error
+
+            return self._tokens
+
+    @property
+    def partial_tokens(self):
+        """The tokens found before a tokenizing error (or every token)
+        """
+
+        try:
+            return self.tokens
+        except (SyntaxError, tokenize.TokenError):
+            return self._tokens
+
+    @property
+    def tree(self):
+        """The AST of the source, raises SyntaxError if it is not valid
+        """
+
+        with self._lock:
+            if self._tree is None and self._tree_error is None:
+                encoded = self.encoded
+                with self.timed('parse'):
+                    try:
+                        self._tree = compile(
+                            encoded, self.filename, 'exec', ast.PyCF_ONLY_AST
+                        )
+                    except (SyntaxError, ValueError, TypeError) as error:
+                        self._tree_error = error
+
+            if self._tree_error is not None:
+                raise self._tree_error
+
+            return self._tree
@@ -60,8 +60,9 @@ class ConventionChecker(object):
                      'Attributes',
                      'Methods']
 
-    def check_source(self, source, filename, ignore_decorators=None):
-        module = parse(StringIO(source), filename)
+    def check_source(self, source, filename, ignore_decorators=None,
+                     tokens=None):
+        module = parse(StringIO(source), filename, tokens)
         for definition in module:
             for this_check in self.checks:
                 terminate = False
@@ -231,8 +231,11 @@ class TokenStream(object):
     # The token will be tk.NL, not tk.NEWLINE.
     LOGICAL_NEWLINES = {tk.NEWLINE, tk.INDENT, tk.DEDENT}
 
-    def __init__(self, filelike):
-        self._generator = tk.generate_tokens(filelike.readline)
+    def __init__(self, filelike, tokens=None):
+        if tokens is not None:
+            self._generator = iter(tokens)
+        else:
+            self._generator = tk.generate_tokens(filelike.readline)
         self.current = Token(*next(self._generator, None))
         self.line = self.current.start[0]
         self.log = log
@@ -278,16 +281,21 @@ class Token(Value):
 class Parser(object):
     """A Python source code parser."""
 
-    def parse(self, filelike, filename):
-        """Parse the given file-like object and return its Module object."""
+    def parse(self, filelike, filename, tokens=None):
+        """Parse the given file-like object and return its Module object.
+
+        If the tokens of the (already compiled) source are given they are
+        used instead of tokenizing the source again.
+        """
         self.log = log
         self.source = filelike.readlines()
         src = ''.join(self.source)
-        try:
-            compile(src, filename, 'exec')
-        except SyntaxError as error:
-            six.raise_from(ParseError(), error)
-        self.stream = TokenStream(StringIO(src))
+        if tokens is None:
+            try:
+                compile(src, filename, 'exec')
+            except SyntaxError as error:
+                six.raise_from(ParseError(), error)
+        self.stream = TokenStream(StringIO(src), tokens)
         self.filename = filename
         self.all = None
         self.future_imports = set()
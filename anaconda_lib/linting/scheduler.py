@@ -0,0 +1,206 @@
+# Copyright (C) 2013 - Oscar Campos <oscar.campos@member.fsf.org>
+# This program is Free Software see LICENSE file for details
+
+"""Per view background linting scheduler
+"""
+
+import time
+import threading
+
+import sublime
+
+from ..helpers import get_settings
+from .._typing import Any, Callable, Dict  # noqa
+
+# weight of the last measured round trip in the round trip estimation
+RTT_WEIGHT = 0.3
+# the debounce delay is never shorter than this many round trips
+RTT_FACTOR = 2
+# a lint without answer after this many seconds is taken as lost
+LOST_AFTER = 60
+
+
+class ViewSchedule(object):
+    """The linting state of a single view
+    """
+
+    def __init__(self, view: sublime.View) -> None:
+        self.view = view
+        self.deadline = 0.0
+        self.armed = False
+        self.started = None  # type: float
+        self.pending = False
+        self.hook = None  # type: Callable
+        self.rtt = None  # type: float
+
+    @property
+    def in_flight(self) -> bool:
+        """Return True while we are waiting for the results of a lint
+        """
+
+        if self.started is None:
+            return False
+
+        return time.time() - self.started < LOST_AFTER
+
+    def measured(self, rtt: float) -> None:
+        """Add the given round trip to the round trip estimation
+        """
+
+        if self.rtt is None:
+            self.rtt = rtt
+        else:
+            self.rtt = RTT_WEIGHT * rtt + (1 - RTT_WEIGHT) * self.rtt
+
+
+class LintScheduler(object):
+    """Debounces the background linting of every view on its own
+
+    Nothing runs while the views are not modified. Every modification
+    moves the deadline of its view and arms a single timer for it, the
+    view is linted once the deadline is reached. The debounce delay is
+    `anaconda_linter_delay` or twice the measured lint round trip of the
+    view (up to `anaconda_linter_max_delay`) so slow files are linted less
+    often. There is never more than one lint in flight for a view, lints
+    requested meanwhile are coalesced into a single pending lint that is
+    started when the results of the one in flight arrive.
+
+    The `lint` callable starts the lint of the given view (with the given
+    hook) and must call the given `done` callable when its results arrive,
+    it returns False if nothing has been sent (so nothing is in flight).
+    """
+
+    def __init__(self, lint: Callable[..., bool]) -> None:
+        self.lint = lint
+        self.views = {}  # type: Dict[int, ViewSchedule]
+        self._lock = threading.RLock()
+
+    def delay(self, view: sublime.View) -> float:
+        """Return the debounce delay for the given view
+        """
+
+        delay = get_settings(view, 'anaconda_linter_delay', 0.5)
+        schedule = self.views.get(view.id())
+        if schedule is None or schedule.rtt is None:
+            return delay
+
+        max_delay = get_settings(view, 'anaconda_linter_max_delay', 5)
+        return max(delay, min(schedule.rtt * RTT_FACTOR, max_delay))
+
+    def modified(self, view: sublime.View) -> None:
+        """The given view has been modified, lint it once it is idle
+        """
+
+        delay = self.delay(view)
+        with self._lock:
+            schedule = self._schedule(view)
+            schedule.deadline = time.time() + delay
+            if schedule.armed:
+                return
+
+            schedule.armed = True
+
+        self._arm(view.id(), delay)
+
+    def lint_now(self, view: sublime.View, hook: Callable=None) -> None:
+        """Lint the given view now (or once the lint in flight is done)
+        """
+
+        with self._lock:
+            schedule = self._schedule(view)
+            if hook is not None:
+                schedule.hook = hook
+            if schedule.in_flight:
+                schedule.pending = True
+                return
+
+            hook, schedule.hook = schedule.hook, None
+            schedule.started = time.time()
+
+        self._start(schedule, hook)
+
+    def forget(self, view_id: int) -> None:
+        """Forget the given (closed) view
+        """
+
+        with self._lock:
+            self.views.pop(view_id, None)
+
+    def _schedule(self, view: sublime.View) -> ViewSchedule:
+        """Return the schedule of the given view creating it if needed
+        """
+
+        schedule = self.views.get(view.id())
+        if schedule is None:
+            schedule = self.views[view.id()] = ViewSchedule(view)
+        else:
+            schedule.view = view
+
+        return schedule
+
+    def _arm(self, view_id: int, delay: float) -> None:
+        """Check the deadline of the given view in delay seconds
+        """
+
+        sublime.set_timeout(
+            lambda: self._expired(view_id), int(delay * 1000) + 1
+        )
+
+    def _expired(self, view_id: int) -> None:
+        """The timer of the given view fired, lint it if it is idle
+        """
+
+        with self._lock:
+            schedule = self.views.get(view_id)
+            if schedule is None:
+                return
+
+            remaining = schedule.deadline - time.time()
+            if remaining > 0:
+                # modified again since the timer was armed
+                self._arm(view_id, remaining)
+                return
+
+            schedule.armed = False
+            view = schedule.view
+
+        if view.is_valid():
+            self.lint_now(view)
+        else:
+            self.forget(view_id)
+
+    def _start(self, schedule: ViewSchedule, hook: Callable) -> None:
+        """Start the lint of the given view
+        """
+
+        started = schedule.started
+
+        def done(data: Dict[str, Any]=None) -> None:
+            with self._lock:
+                if schedule.started != started:
+                    return
+
+                schedule.measured(time.time() - started)
+                schedule.started = None
+                if not schedule.pending:
+                    return
+
+                schedule.pending = False
+
+            # start the pending lint from the main thread
+            sublime.set_timeout(lambda: self._restart(schedule), 0)
+
+        if not self.lint(schedule.view, hook, done):
+            # nothing to wait for (the view did not change for example)
+            with self._lock:
+                if schedule.started == started:
+                    schedule.started = None
+                    schedule.pending = False
+
+    def _restart(self, schedule: ViewSchedule) -> None:
+        """Start the pending lint of the given view if it is still open
+        """
+
+        if self.views.get(schedule.view.id()) is schedule and \
+                schedule.view.is_valid():
+            self.lint_now(schedule.view)
@@ -4,19 +4,21 @@
 
 import os
 import re
-import time
-from functools import partial
+import json
+import bisect
 
 import sublime
 
 from . import pycodestyle as pep8
 from ..worker import Worker
-from ..callback import Callback
+from ..callback import Callback, HookedCallback
 from ..persistent_list import PersistentList
 from ..helpers import (
-    get_settings, is_code, get_view, check_linting, LINTING_ENABLED
+    get_settings, is_code, get_view, check_linting, document_data,
+    LINTING_ENABLED
 )
 from ..phantoms import Phantom
+from .._typing import Dict, List, Tuple, Any  # noqa
 
 
 sublime_api = sublime.sublime_api
@@ -26,29 +28,202 @@ ANACONDA = {
     'WARNINGS': {},
     'VIOLATIONS': {},
     'UNDERLINES': {},
-    'LAST_PULSE': time.time(),
-    'ALREADY_LINTED': False,
     'DISABLED': PersistentList(),
-    'DISABLED_BUFFERS': []
+    'DISABLED_BUFFERS': [],
+    'LINTED': {}
 }
 
+# linters that look at files other than the linted buffer, if any of them
+# is enabled the buffer is linted again even if it was not modified
+ENVIRONMENT_LINTERS = ('use_pylint', 'use_mypy', 'validate_imports')
+
 marks = {
     'warning': 'dot',
     'violation': 'dot',
     'illegal': 'circle'
 }
 
+# what is taken as code when underlining, scopes are matched once
+CODE_SELECTOR = 'source.python - string - comment'
+CODE_SCOPES = {}  # type: Dict[str, bool]
+
+# underlines are spans of code, drawn as an underline (empty regions are
+# drawn as the overwrite cursor that the single character marks used)
+UNDERLINE_FLAGS = (
+    sublime.DRAW_NO_FILL | sublime.DRAW_NO_OUTLINE |
+    sublime.DRAW_SOLID_UNDERLINE | sublime.DRAW_EMPTY_AS_OVERWRITE
+)
+
 
 ###############################################################################
 # Classes
 ###############################################################################
+class LineTable:
+
+    """The lines of a view read from the buffer in one go
+
+    Linting results address thousands of lines, reading them (and their
+    positions) from the buffer once is a lot cheaper than asking the view
+    for every one of them
+    """
+
+    def __init__(self, view):
+        self.view = view
+        self._lines = None
+        self._starts = None
+        self._last = 0
+
+    @property
+    def lines(self):
+        """The text of every line of the view (without the line ending)
+        """
+
+        if self._lines is None:
+            self._read()
+
+        return self._lines
+
+    @property
+    def starts(self):
+        """The position where every line of the view begins
+        """
+
+        if self._starts is None:
+            self._read()
+
+        return self._starts
+
+    @property
+    def noqa(self):
+        """The (zero-based) numbers of the lines that contain # noqa
+        """
+
+        return set(
+            lineno for lineno, line in enumerate(self.lines)
+            if '# noqa' in line
+        )
+
+    def row(self, lineno):
+        """Clamp the given (zero-based) line number to the view lines
+        """
+
+        if self._lines is None:
+            self._read()
+
+        return 0 if lineno < 0 else min(lineno, self._last)
+
+    def text(self, lineno):
+        """Return the text of the given (zero-based) line with its ending
+        """
+
+        row = self.row(lineno)
+        text = self._lines[row]
+        return text if row == self._last else text + '\n'
+
+    def begin(self, lineno):
+        """Return the position where the given (zero-based) line begins
+        """
+
+        row = self.row(lineno)
+        return self._starts[row]
+
+    def row_of(self, point):
+        """Return the (zero-based) line that contains the given point
+        """
+
+        return max(0, bisect.bisect_right(self.starts, point) - 1)
+
+    def full_line(self, lineno):
+        """Return the region of the given (zero-based) line and its ending
+        """
+
+        begin = self.begin(lineno)
+        return sublime.Region(begin, begin + len(self.text(lineno)))
+
+    def _read(self):
+        """Read the lines of the view and where they begin
+        """
+
+        text = self.view.substr(sublime.Region(0, self.view.size()))
+        self._lines = text.split('\n')
+        self._last = len(self._lines) - 1
+        self._starts = []
+        position = 0
+        for line in self._lines:
+            self._starts.append(position)
+            position += len(line) + 1
+
+
+class MarksRenderer:
+
+    """Draws the lint marks of the views touching only what changed
+
+    The regions of every mark key are compared with the ones that the
+    view has right now (that follow the edits of the buffer) and with the
+    style they were drawn with, only the keys that changed are drawn
+    again and only the keys that are gone are erased. Phantoms are only
+    updated when the messages that they show change.
+    """
+
+    drawn = {}  # type: Dict[int, Dict[str, Tuple]]
+    phantoms = {}  # type: Dict[int, List[Dict[str, Any]]]
+    stats = {'updated': 0, 'skipped': 0, 'erased': 0}
+
+    @classmethod
+    def update(cls, view, marks, phantoms=None):
+        """Draw the given marks (key -> (regions, scope, icon, flags))
+        """
+
+        vid = view.id()
+        drawn = cls.drawn.setdefault(vid, {})
+        for key in [key for key in drawn if key not in marks]:
+            view.erase_regions(key)
+            del drawn[key]
+            cls.stats['erased'] += 1
+
+        for key, (regions, scope, icon, flags) in marks.items():
+            regions = [
+                sublime.Region(a, b) for a, b in
+                sorted(set((region.a, region.b) for region in regions))
+            ]
+            style = (scope, icon, flags)
+            if drawn.get(key) == style and view.get_regions(key) == regions:
+                cls.stats['skipped'] += 1
+                continue
+
+            view.add_regions(key, regions, scope, icon, flags)
+            drawn[key] = style
+            cls.stats['updated'] += 1
+
+        if phantoms is None:
+            phantoms = []
+        if cls.phantoms.get(vid, []) != phantoms:
+            phantom = Phantom()
+            if phantoms:
+                phantom.update_phantoms(view, phantoms)
+            else:
+                phantom.clear_phantoms(view)
+            cls.phantoms[vid] = phantoms
+
+    @classmethod
+    def forget(cls, view):
+        """Forget what was drawn in the given (erased or closed) view
+        """
+
+        cls.drawn.pop(view.id(), None)
+        cls.phantoms.pop(view.id(), None)
+
+
 class Linter:
 
     """Linter class that can interacts with Sublime Linter GUI
     """
 
-    def __init__(self, view):
+    def __init__(self, view, table=None):
         self.view = view
+        self.table = LineTable(view) if table is None else table
+        self._code_points = {}
+        self._scanned = set()
 
     def add_message(self, lineno, lines, message, messages):
         # assume lineno is one-based, ST3 wants zero-based line numbers
@@ -69,13 +244,20 @@ class Linter:
         # assume lineno is one-based, ST3 wants zero-based line numbers
 
         lineno -= 1
-        line = self.view.full_line(self.view.text_point(lineno, 0))
-        position += line.begin()
+        position += self.table.begin(lineno)
+
+        # contiguous characters of code are merged in a single span
+        start = None
+        for point in range(position, position + length):
+            if self.is_that_code(point):
+                if start is None:
+                    start = point
+            elif start is not None:
+                underlines.append(sublime.Region(start, point))
+                start = None
 
-        for i in range(length):
-            region = sublime.Region(position + i)
-            if self.is_that_code(region.begin()):
-                underlines.append(sublime.Region(position + i))
+        if start is not None:
+            underlines.append(sublime.Region(start, position + length))
 
     def underline_regex(self, **kwargs):
         # assume lineno is one-based, ST3 wants zero-based line numbers
@@ -83,8 +265,7 @@ class Linter:
         offset = 0
         lineno = kwargs.get('lineno', 1) - 1
         kwargs.get('lines', set()).add(lineno)
-        line = self.view.full_line(self.view.text_point(lineno, 0))
-        line_text = self.view.substr(line)
+        line_text = self.table.text(lineno)
 
         if kwargs.get('linematch') is not None:
             match = re.match(kwargs['linematch'], line_text)
@@ -112,10 +293,39 @@ class Linter:
 
     def is_that_code(self, point):
         """Determines if the given region is valid Python code
+
+        The scopes of the whole line are read at once if the view can
+        do it (Sublime Text 4) instead of matching every point
+        """
+
+        if point not in self._code_points:
+            self._scan_scopes(self.table.row_of(point))
+
+        if point not in self._code_points:
+            self._code_points[point] = self.view.match_selector(
+                point, CODE_SELECTOR
+            )
+
+        return self._code_points[point]
+
+    def _scan_scopes(self, row):
+        """Record which points of the given line are code
         """
 
-        matcher = 'source.python - string - comment'
-        return self.view.match_selector(point, matcher)
+        if row in self._scanned or not hasattr(
+                self.view, 'extract_tokens_with_scopes'):
+            return
+
+        self._scanned.add(row)
+        line = self.table.full_line(row)
+        for region, scope in self.view.extract_tokens_with_scopes(line):
+            if scope not in CODE_SCOPES:
+                CODE_SCOPES[scope] = sublime.score_selector(
+                    scope, CODE_SELECTOR
+                ) > 0
+            self._code_points.update(dict.fromkeys(
+                range(region.begin(), region.end()), CODE_SCOPES[scope]
+            ))
 
     def parse_errors(self, errors):
         """Parse errors returned from the PyFlakes and pep8 libraries
@@ -137,15 +347,10 @@ class Linter:
 
         ignore_star = get_settings(self.view, 'pyflakes_ignore_import_*', True)
 
+        noqa = self.table.noqa
         for error in errors:
-            try:
-                line_text = self.view.substr(self.view.full_line(
-                    self.view.text_point(error['lineno']-1, 0)
-                ))
-                if '# noqa' in line_text:
-                    continue
-            except Exception as e:
-                print(e)
+            if self.table.row(error['lineno'] - 1) in noqa:
+                continue
 
             error_level = error.get('level', 'W')
             messages = errors_level[error_level]['messages']
@@ -183,6 +388,7 @@ class Linter:
 def erase_lint_marks(view):
     """Erase all the lint marks
     """
+    ANACONDA['LINTED'].pop(view.id(), None)
     if get_settings(view, 'anaconda_linter_phantoms', False):
         Phantom().clear_phantoms(view)
 
@@ -191,12 +397,16 @@ def erase_lint_marks(view):
         view.erase_regions('anaconda-lint-underline-{}'.format(t))
         view.erase_regions('anaconda-lint-outlines-{}'.format(t))
 
+    MarksRenderer.forget(view)
+
 
-def add_lint_marks(view, lines, **errors):
+def add_lint_marks(view, lines, table=None, **errors):
     """Adds lint marks to view on the given lines.
+
+    Only the marks that changed since the last time are drawn again
     """
 
-    erase_lint_marks(view)
+    lint_marks = {}
     types = {
         'warning': errors['warning_underlines'],
         'illegal': errors['error_underlines'],
@@ -207,12 +417,12 @@ def add_lint_marks(view, lines, **errors):
     if show_underlines:
         for type_name, underlines in types.items():
             if len(underlines) > 0:
-                view.add_regions(
-                    'anaconda-lint-underline-{}'.format(type_name), underlines,
-                    'anaconda.underline.{}'.format(type_name),
-                    flags=sublime.DRAW_EMPTY_AS_OVERWRITE
+                lint_marks['anaconda-lint-underline-{}'.format(type_name)] = (
+                    underlines, 'anaconda.underline.{}'.format(type_name),
+                    '', UNDERLINE_FLAGS
                 )
 
+    phantoms = []
     if len(lines) > 0:
         outline_style = {
             'solid_underline': sublime.DRAW_NO_FILL | sublime.DRAW_NO_OUTLINE | sublime.DRAW_SOLID_UNDERLINE,        # noqa
@@ -220,7 +430,7 @@ def add_lint_marks(view, lines, **errors):
             'squiggly_underline': sublime.DRAW_NO_FILL | sublime.DRAW_NO_OUTLINE | sublime.DRAW_SQUIGGLY_UNDERLINE,  # noqa
             'outline': sublime.DRAW_OUTLINED,
             'none': sublime.HIDDEN,
-            'fill': None
+            'fill': 0
         }
         gutter_theme = get_settings(
             view, 'anaconda_gutter_theme', 'basic').lower()
@@ -231,9 +441,7 @@ def add_lint_marks(view, lines, **errors):
         )
 
         if get_settings(view, 'anaconda_linter_phantoms', False):
-            phantom = Phantom()
             vid = view.id()
-            phantoms = []
             for level in ['ERRORS', 'WARNINGS', 'VIOLATIONS']:
                 for line, messages in ANACONDA.get(level)[vid].items():
                     for message in messages:
@@ -242,9 +450,8 @@ def add_lint_marks(view, lines, **errors):
                             "level": level.lower(),
                             "messages": message
                         })
-            phantom.update_phantoms(view, phantoms)
 
-        for lint_type, lints in get_outlines(view).items():
+        for lint_type, lints in get_outlines(view, table).items():
             if len(lints) > 0:
                 if get_settings(view, 'anaconda_gutter_marks', False):
                     if gutter_theme == 'basic':
@@ -255,20 +462,16 @@ def add_lint_marks(view, lines, **errors):
                 else:
                     gutter_marks = ''
 
-                args = [
-                    'anaconda-lint-outlines-{}'.format(lint_type),
-                    lints,
-                    'anaconda.outline.{}'.format(lint_type),
-                    gutter_marks
-                ]
                 draw_style = outline_style.get(style, sublime.DRAW_OUTLINED)
-                if draw_style is not None:
-                    args.append(draw_style)
+                lint_marks['anaconda-lint-outlines-{}'.format(lint_type)] = (
+                    lints, 'anaconda.outline.{}'.format(lint_type),
+                    gutter_marks, draw_style
+                )
 
-                view.add_regions(*args)
+    MarksRenderer.update(view, lint_marks, phantoms)
 
 
-def get_outlines(view):
+def get_outlines(view, table=None):
     """Return outlines for the given view
     """
 
@@ -276,17 +479,14 @@ def get_outlines(view):
     WARNINGS = ANACONDA.get('WARNINGS')
     VIOLATIONS = ANACONDA.get('VIOLATIONS')
 
+    if table is None:
+        table = LineTable(view)
+
     vid = view.id()
     return {
-        'warning': [
-            view.full_line(view.text_point(l, 0)) for l in WARNINGS[vid]
-        ],
-        'illegal': [
-            view.full_line(view.text_point(l, 0)) for l in ERRORS[vid]
-        ],
-        'violation': [
-            view.full_line(view.text_point(l, 0)) for l in VIOLATIONS[vid]
-        ]
+        'warning': [table.full_line(l) for l in WARNINGS[vid]],
+        'illegal': [table.full_line(l) for l in ERRORS[vid]],
+        'violation': [table.full_line(l) for l in VIOLATIONS[vid]]
     }
 
 
@@ -330,8 +530,11 @@ def get_lineno_msgs(view, lineno):
     return errors_msg
 
 
-def run_linter(view=None, hook=None):
+def run_linter(view=None, hook=None, on_done=None):
     """Run the linter for the given view
+
+    If given, on_done is called with the response once the results have
+    been drawn (or the lint failed). Returns False if nothing was sent
     """
 
     if view is None:
@@ -341,7 +544,7 @@ def run_linter(view=None, hook=None):
     if (view.file_name() in ANACONDA['DISABLED']
             or window_view in ANACONDA['DISABLED_BUFFERS']):
         erase_lint_marks(view)
-        return
+        return False
 
     settings = {
         'pep8': get_settings(view, 'pep8', True),
@@ -359,28 +562,77 @@ def run_linter(view=None, hook=None):
         'pep8_rcfile': get_settings(view, 'pep8_rcfile'),
         'pylint_rcfile': get_settings(view, 'pylint_rcfile'),
         'pylint_ignores': get_settings(view, 'pylint_ignore'),
+        'pylint_in_process': get_settings(view, 'pylint_in_process', False),
         'pyflakes_explicit_ignore': get_settings(
             view, 'pyflakes_explicit_ignore', []),
         'use_mypy': get_settings(view, 'mypy', False),
         'mypy_settings': get_mypy_settings(view),
         'mypypath': get_settings(view, 'mypy_mypypath', ''),
+        'mypy_daemon': get_settings(view, 'mypy_daemon', False),
         'python_interpreter': get_settings(view, 'python_interpreter', ''),
+        'parallel_linting': get_settings(
+            view, 'anaconda_linting_parallel', False),
+        'stream_linting': hook is None,
     }
 
-    text = view.substr(sublime.Region(0, view.size()))
+    lint_key = (view.change_count(), json.dumps(settings, sort_keys=True))
+    environment = any(settings[name] for name in ENVIRONMENT_LINTERS)
+    if hook is None and not environment:
+        if ANACONDA['LINTED'].get(view.id()) == lint_key:
+            # nothing changed since the last lint, marks are still valid
+            return False
+
     data = {
         'vid': view.id(),
-        'code': text,
         'settings': settings,
         'filename': view.file_name(),
         'method': 'lint',
         'handler': 'python_linter'
     }
+    data.update(document_data(view, 'code'))
+
+    def done(data):
+        if on_done is not None:
+            on_done(data)
+
+    def linted(data):
+        parse_results(data)
+        ANACONDA['LINTED'][view.id()] = lint_key
+        done(data)
+
+    def hooked(data):
+        hook(parse_results, data)
+        done(data)
 
     if hook is None:
-        Worker().execute(Callback(on_success=parse_results), **data)
+        callback = Callback(on_success=linted, on_failure=done)
+        if settings['parallel_linting']:
+            callback = stream_results(callback, parse_results)
+        Worker().execute(callback, **data)
     else:
-        Worker().execute(Callback(partial(hook, parse_results)), **data)
+        Worker().execute(Callback(on_success=hooked, on_failure=done), **data)
+
+    return True
+
+
+def stream_results(callback, on_partial):
+    """Accumulate the partial results streamed by the parallel linting
+
+    Every partial message is drawn with all the errors received so far,
+    the final message (that contains all of them) goes to the callback
+    """
+
+    errors = []
+
+    def _stream(callback, data):
+        if not data.get('partial', False):
+            return callback(data)
+
+        errors.extend(data['errors'])
+        data['errors'] = errors[:]
+        on_partial(data)
+
+    return HookedCallback(callback, _stream)
 
 
 def get_mypy_settings(view):
@@ -440,7 +692,8 @@ def parse_results(data, code='python'):
     ANACONDA['WARNINGS'][vid] = {}
     ANACONDA['VIOLATIONS'][vid] = {}
 
-    results = Linter(view).parse_errors(data['errors'])
+    table = LineTable(view)
+    results = Linter(view, table).parse_errors(data['errors'])
     errors = results['results']
     lines = results['lines']
 
@@ -453,5 +706,5 @@ def parse_results(data, code='python'):
         'warning_underlines': errors['W']['underlines'],
         'violation_underlines': errors['V']['underlines']
     }
-    add_lint_marks(view, lines, **errors)
+    add_lint_marks(view, lines, table, **errors)
     update_statusbar(view)
@@ -0,0 +1,211 @@
+# Copyright (C) 2013 - Oscar Campos <oscar.campos@member.fsf.org>
+# This program is Free Software see LICENSE file for details
+
+"""Cache of the resolved anaconda settings and .anaconda hook files
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+
+import sublime
+
+from ._typing import Any, Callable, Dict, Set, Tuple  # noqa
+
+HOOK_FILE = '.anaconda'
+WATCH_KEY = 'anaconda_settings_cache'
+
+
+class HookFile(object):
+    """A parsed .anaconda environment hook file
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.mtime = os.path.getmtime(path)
+        self.data = None  # type: Dict[str, Any]
+        try:
+            with open(path, 'r') as jsonfile:
+                self.data = json.loads(jsonfile.read())
+        except Exception as error:
+            sublime.error_message(
+                "Anaconda Message:\n"
+                "I found an .anaconda environment file in {} "
+                "path but it doesn't seems to be a valid JSON "
+                "file.\n\nThat means that your .anaconda "
+                "hook file is being ignored.".format(path)
+            )
+            logging.error(error)
+
+    @property
+    def valid(self) -> bool:
+        """Return True if the file could be parsed
+        """
+
+        return self.data is not None
+
+
+class SettingsCache(object):
+    """Resolved settings per view and hook files per directory
+
+    Settings are resolved once per view and name, the entries of a view
+    are dropped when its settings change and every entry is dropped when
+    the anaconda settings or the project change. The hook file that
+    applies to every directory is resolved walking up once, the known
+    directories and hook files are checked again (for new, removed or
+    modified .anaconda files) at most every CHECK_INTERVAL seconds.
+    """
+
+    CHECK_INTERVAL = 2
+
+    hits = 0
+    misses = 0
+    _values = {}  # type: Dict[Tuple, Any]
+    _directories = {}  # type: Dict[str, str]
+    _files = {}  # type: Dict[str, HookFile]
+    _watched = set()  # type: Set[int]
+    _generation = 0
+    _checked = time.time()
+    _lock = threading.RLock()
+
+    @classmethod
+    def get(cls, key: Tuple, resolve: Callable) -> Any:
+        """Return the value cached for key resolving it if needed
+        """
+
+        cls._check_hooks()
+        with cls._lock:
+            if key in cls._values:
+                cls.hits += 1
+                return cls._values[key]
+
+            cls.misses += 1
+            generation = cls._generation
+
+        value = resolve()
+        with cls._lock:
+            if generation == cls._generation:
+                # nothing has been invalidated while we were resolving
+                cls._values[key] = value
+
+        return value
+
+    @classmethod
+    def watch(cls, view: sublime.View) -> None:
+        """Drop the cached values of the view when its settings change
+        """
+
+        view_id = view.id()
+        if view_id in cls._watched:
+            return
+
+        with cls._lock:
+            if not cls._watched:
+                sublime.load_settings('Anaconda.sublime-settings')\
+                    .add_on_change(WATCH_KEY, cls.invalidate)
+            cls._watched.add(view_id)
+
+        view.settings().add_on_change(
+            WATCH_KEY, lambda: cls.invalidate(view_id)
+        )
+
+    @classmethod
+    def forget(cls, view_id: int) -> None:
+        """Drop everything cached for the given (closed) view
+        """
+
+        with cls._lock:
+            cls._watched.discard(view_id)
+            cls.invalidate(view_id)
+
+    @classmethod
+    def invalidate(cls, view_id: int=None) -> None:
+        """Drop the values cached for the given view (or for every view)
+        """
+
+        with cls._lock:
+            cls._generation += 1
+            if view_id is None:
+                cls._values = {}
+                return
+
+            for key in [k for k in cls._values if k[0] == view_id]:
+                del cls._values[key]
+
+    @classmethod
+    def hook(cls, directory: str) -> HookFile:
+        """Return the hook file for the given directory (or None)
+
+        The hook file is the nearest valid .anaconda file walking up from
+        the directory to the root of the file system
+        """
+
+        with cls._lock:
+            if directory not in cls._directories:
+                cls._directories[directory] = cls._find_hook(directory)
+
+            path = cls._directories[directory]
+            if path is None:
+                return None
+
+            if path not in cls._files:
+                cls._files[path] = HookFile(path)
+
+            hook = cls._files[path]
+            return hook if hook.valid else None
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        """Return the cache counters and its hit rate
+        """
+
+        total = cls.hits + cls.misses
+        return {
+            'hits': cls.hits, 'misses': cls.misses, 'size': len(cls._values),
+            'hit_rate': float(cls.hits) / total if total else 0.0
+        }
+
+    @classmethod
+    def _find_hook(cls, directory: str) -> str:
+        """Walk up from the given directory looking for a .anaconda file
+        """
+
+        while True:
+            path = os.path.join(directory, HOOK_FILE)
+            if os.path.isfile(path):
+                return path
+
+            parent = os.path.dirname(directory)
+            if parent == directory or not os.path.split(directory)[1]:
+                return None
+            directory = parent
+
+    @classmethod
+    def _check_hooks(cls) -> None:
+        """Invalidate everything if a known hook file changed
+        """
+
+        if time.time() - cls._checked < cls.CHECK_INTERVAL:
+            return
+
+        with cls._lock:
+            cls._checked = time.time()
+            changed = any(
+                cls._find_hook(directory) != path
+                for directory, path in cls._directories.items()
+            )
+            for path, hook in list(cls._files.items()):
+                try:
+                    modified = os.path.getmtime(path) != hook.mtime
+                except OSError:
+                    modified = True
+
+                if modified:
+                    del cls._files[path]
+                    changed = True
+
+            if changed:
+                cls._directories = {}
+                cls.invalidate()
@@ -3,12 +3,13 @@
 # This program is Free Software see LICENSE file for details
 
 import os
+import time
 import threading
 import subprocess
 
 from .logger import Log
 from .contexts import vagrant_root
-from .helpers import create_subprocess
+from .helpers import create_subprocess, get_settings, active_view
 
 PIPE = subprocess.PIPE
 
@@ -211,6 +212,106 @@ class VagrantMachineGlobalInfo(object):
                 break
 
 
+class VagrantCache(object):
+    """Cache of the vagrant global status and guest IP address lookups
+
+    Both lookups spawn vagrant processes that take seconds so they are
+    cached per machine and shared by every worker. Entries older than
+    `vagrant_cache_ttl` seconds are still returned but refreshed in a
+    background thread, only missing entries are looked up synchronously.
+    """
+
+    _entries = {}
+    _refreshing = set()
+    _lock = threading.Lock()
+
+    @classmethod
+    def global_info(cls, machine, fresh=False):
+        """Return the VagrantMachineGlobalInfo of the given machine
+        """
+
+        return cls._get(
+            ('global', machine), lambda: VagrantMachineGlobalInfo(machine),
+            fresh
+        )
+
+    @classmethod
+    def ip_address(cls, machine, iface='eth1', fresh=False):
+        """Return the IP address of the given interface in the given machine
+        """
+
+        def lookup():
+            return VagrantIPAddressGlobal(
+                cls.global_info(machine).machine_id, iface
+            ).ip_address
+
+        return cls._get(('ip', machine, iface), lookup, fresh)
+
+    @classmethod
+    def invalidate(cls, machine):
+        """Forget everything cached for the given machine
+        """
+
+        with cls._lock:
+            for key in [k for k in cls._entries if k[1] == machine]:
+                del cls._entries[key]
+
+    @classmethod
+    def _get(cls, key, lookup, fresh):
+        """Return the cached value for key looking it up if needed
+        """
+
+        with cls._lock:
+            entry = cls._entries.get(key)
+
+        if entry is None or fresh:
+            return cls._store(key, lookup)
+
+        value, stamp = entry
+        ttl = get_settings(active_view(), 'vagrant_cache_ttl', 60)
+        if time.time() - stamp > ttl:
+            cls._refresh(key, lookup)
+
+        return value
+
+    @classmethod
+    def _store(cls, key, lookup):
+        """Look the value up and cache it (failed lookups are not cached)
+        """
+
+        value = lookup()
+        if value is not None:
+            with cls._lock:
+                cls._entries[key] = (value, time.time())
+
+        return value
+
+    @classmethod
+    def _refresh(cls, key, lookup):
+        """Refresh the given key in a background thread
+        """
+
+        with cls._lock:
+            if key in cls._refreshing:
+                return
+            cls._refreshing.add(key)
+
+        def refresh():
+            try:
+                cls._store(key, lookup)
+            except Exception as error:
+                Log.warning('could not refresh vagrant {}: {}'.format(
+                    key, error
+                ))
+            finally:
+                with cls._lock:
+                    cls._refreshing.discard(key)
+
+        thread = threading.Thread(target=refresh)
+        thread.daemon = True
+        thread.start()
+
+
 class VagrantStartMachine(object):
     """Start a vagrant machine using it's global ID
     """
@@ -0,0 +1,272 @@
+# Copyright (C) 2013 - 2016 - Oscar Campos <oscar.campos@member.fsf.org>
+# This program is Free Software see LICENSE file for details
+
+import time
+import socket
+import threading
+
+import sublime
+
+from ..logger import Log
+from ..jsonclient import AsynClient
+from ..helpers import get_settings, active_view
+
+MIN_BACKOFF = 0.5
+MAX_BACKOFF = 30
+CONNECT_TIMEOUT = 5
+
+
+class RemoteLink(object):
+    """Persistent connection to a remote minserver shared by many windows
+
+    Requests of every window are pipelined over the same connection and
+    their responses are routed back by `uid`. If the connection is lost
+    it is re-established in the background (waiting longer after every
+    failed attempt) and the requests sent meanwhile are queued and sent
+    once it is up again. While idle a ping is sent every
+    `remote_keepalive` seconds, if a server that answered pings before
+    stops answering them the connection is taken as dead and renewed.
+    """
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.users = 0
+        self.client = None
+        self.queue = []
+        self.closed = False
+        self.backoff = MIN_BACKOFF
+        self.pings = False
+        self.ping_pending = False
+        self._scheduled = False
+        self._connecting = False
+        self._keeping_alive = False
+        self._lock = threading.RLock()
+
+    @property
+    def connected(self):
+        """Return True if the connection is up right now
+        """
+
+        return self.client is not None and self.client.connected
+
+    def send_command(self, callback, **data):
+        """Send the given command or queue it until we are connected
+        """
+
+        with self._lock:
+            if not self.connected:
+                self.queue.append((callback, data))
+                self._schedule(0)
+                return
+
+            self.client.send_command(callback, **data)
+
+    def cancel(self, uid):
+        """Cancel the request with the given uid if it is still pending
+        """
+
+        with self._lock:
+            if self.connected:
+                self.client.cancel(uid)
+
+    def connect(self):
+        """Try to connect now, schedule a new attempt if we can't
+
+        The socket is connected (with a timeout) without holding the lock
+        so commands sent meanwhile are just queued instead of waiting
+        """
+
+        with self._lock:
+            self._scheduled = False
+            if self.closed or self.connected or self._connecting:
+                return
+            self._connecting = True
+
+        timeout = get_settings(
+            active_view(), 'remote_connect_timeout', CONNECT_TIMEOUT
+        )
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        try:
+            client = AsynClient(self.port, host=self.host, sock=sock)
+        except (socket.error, OSError) as error:
+            sock.close()
+            with self._lock:
+                self._connecting = False
+                Log.info('can not connect to {}:{} ({}), retry in {}s'.format(
+                    self.host, self.port, error, self.backoff
+                ))
+                self._schedule(self.backoff)
+                self.backoff = min(self.backoff * 2, MAX_BACKOFF)
+            return
+
+        with self._lock:
+            self._connecting = False
+            if self.closed:
+                client.close()
+                return
+
+            self.client = client
+            self.client.sock.setsockopt(
+                socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1
+            )
+            if get_settings(
+                    active_view(), 'jsonserver_binary_framing', False):
+                self.client.negotiate_framing(compression=True)
+
+            self.backoff = MIN_BACKOFF
+            self.ping_pending = False
+            queue, self.queue = self.queue, []
+            for callback, data in queue:
+                self.client.send_command(callback, **data)
+
+            if self._keeping_alive:
+                return
+            self._keeping_alive = True
+
+        self._keepalive()
+
+    def close(self):
+        """Close the connection for good
+        """
+
+        with self._lock:
+            self.closed = True
+            self.queue = []
+            if self.client is not None:
+                self.client.close()
+
+    def _schedule(self, delay):
+        """Schedule a connection attempt in the given seconds
+        """
+
+        if not self._scheduled and not self.closed:
+            self._scheduled = True
+            sublime.set_timeout_async(self.connect, int(delay * 1000))
+
+    def _keepalive(self):
+        """Ping the server when the connection is idle
+        """
+
+        interval = get_settings(active_view(), 'remote_keepalive', 30)
+        if self.closed or not interval:
+            self._keeping_alive = False
+            return
+
+        with self._lock:
+            if self.connected and self.ping_pending and self.pings:
+                Log.warning('{}:{} does not answer, reconnecting'.format(
+                    self.host, self.port
+                ))
+                self.client.close()
+
+            if not self.connected:
+                self._schedule(0)
+            elif time.time() - self.client.last_activity >= interval:
+                self.ping_pending = True
+                self.client.send_command(
+                    self._pong, method='ping', handler='jsonserver'
+                )
+
+        sublime.set_timeout_async(self._keepalive, int(interval * 1000))
+
+    def _pong(self, data):
+        """The server answered our ping
+        """
+
+        self.pings = True
+        self.ping_pending = False
+
+
+class RemoteConnection(object):
+    """The view of a shared RemoteLink that a single worker has
+    """
+
+    def __init__(self, link):
+        self.link = link
+        self.closed = False
+
+    def __repr__(self):
+        """String representation of the connection
+        """
+
+        return '{} shared by {} workers'.format(
+            self.link.client, self.link.users
+        )
+
+    @property
+    def connected(self):
+        """Return True while this worker is using the link
+
+        The link may be reconnecting, the requests are queued meanwhile
+        """
+
+        return not self.closed
+
+    def send_command(self, callback, **data):
+        """Send the given command through the shared link
+        """
+
+        self.link.send_command(callback, **data)
+
+    def cancel(self, uid):
+        """Cancel the request with the given uid
+        """
+
+        self.link.cancel(uid)
+
+    def close(self):
+        """Stop using the shared link
+        """
+
+        if not self.closed:
+            self.closed = True
+            ConnectionManager.release(self.link)
+
+
+class ConnectionManager(object):
+    """Keeps one RemoteLink per remote server address
+    """
+
+    _links = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def acquire(cls, host, port):
+        """Return a connection to the given server sharing its link
+        """
+
+        with cls._lock:
+            link = cls._links.get((host, port))
+            if link is None:
+                link = RemoteLink(host, port)
+                cls._links[(host, port)] = link
+            link.users += 1
+
+        if not link.connected:
+            link.connect()
+
+        return RemoteConnection(link)
+
+    @classmethod
+    def release(cls, link):
+        """Close the given link if nobody else is using it
+        """
+
+        with cls._lock:
+            link.users -= 1
+            if link.users > 0:
+                return
+
+            cls._links.pop((link.host, link.port), None)
+
+        link.close()
+
+    @classmethod
+    def connected(cls, host, port):
+        """Return True if there is a live link to the given server
+        """
+
+        link = cls._links.get((host, port))
+        return link is not None and link.connected
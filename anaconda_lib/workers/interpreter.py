@@ -4,6 +4,7 @@
 
 import os
 import socket
+import hashlib
 
 from urllib.parse import urlparse, parse_qs
 
@@ -13,16 +14,38 @@ from ..logger import Log
 from ..unix_socket import UnixSocketPath
 from ..helpers import project_name, debug_enabled
 from ..helpers import get_settings, active_view, get_interpreter
-from ..vagrant import VagrantIPAddressGlobal, VagrantMachineGlobalInfo
+from ..vagrant import VagrantCache
+
+
+def extra_paths(view):
+    """Return the list of paths to be added to jedi for the given view
+    """
+
+    extra = get_settings(view, 'extra_paths', [])
+    paths = [os.path.expanduser(os.path.expandvars(p)) for p in extra]
+
+    try:
+        paths.extend(sublime.active_window().folders())
+    except AttributeError:
+        Log.warning(
+            'Your `extra_paths` configuration is a string but we are '
+            'expecting a list of strings.'
+        )
+        paths = paths.split(',')
+        paths.extend(sublime.active_window().folder())
+
+    return paths
 
 
 class Interpreter(object):
     """Parses a configured Python Interpreter
     """
 
-    def __init__(self, interpreter_string):
+    def __init__(self, interpreter_string, role='', shared=False):
         self.__data = {}
         self.__raw_interpreter = interpreter_string
+        self.__role = role
+        self.__shared = shared
         self.__parse_raw_interpreter()
         self.__project_name = ''
 
@@ -67,6 +90,52 @@ class Interpreter(object):
 
         return self.__project_name
 
+    @property
+    def host(self):
+        """Return the host of the JsonServer
+
+        Vagrant hosts are resolved the first time they are used as the
+        public network needs to ask the guest for its IP address
+        """
+
+        if 'host' not in self.__data and self.for_vagrant:
+            self.__data['host'] = self.__resolve_vagrant_host()
+
+        return self.__data.get('host')
+
+    @property
+    def role(self):
+        """Return the role of the JsonServer (empty if it serves everything)
+        """
+
+        return self.__role
+
+    @property
+    def shared(self):
+        """Return True if the JsonServer is shared by several windows
+        """
+
+        return self.__shared
+
+    @property
+    def server_name(self):
+        """Return the name used for the JsonServer socket and caches
+
+        Shared servers are named after the interpreter so every window
+        that uses it finds the same server
+        """
+
+        name = self.project_name
+        if self.__shared:
+            name = 'shared-{}'.format(hashlib.md5(
+                self.__raw_interpreter.encode('utf8')).hexdigest()[:12]
+            )
+
+        if not self.__role:
+            return name
+
+        return '{}-{}'.format(name, self.__role)
+
     def renew_interpreter(self):
         """Renew the whole intrepreter
         """
@@ -86,17 +155,34 @@ class Interpreter(object):
         self.__extract_python_interpreter(view)
         self.__extract_script()
 
-        args = [self.python, '-B', self.script_file, '-p', self.project_name]
+        args = [self.python, '-B', self.script_file, '-p', self.server_name]
         if self.port is not None:
             args.append(str(self.port))
-        if len(self.paths) > 0:
+        if self.__shared:
+            # the paths of every window are sent in its session
+            args.append('-s')
+        elif len(self.paths) > 0:
             paths = [p for p in self.paths if os.path.exists(p)]
             args.extend(['-e', ','.join(paths)])
+        args.extend(['-w', str(get_settings(view, 'jsonserver_workers', 4))])
+        weights = get_settings(view, 'jsonserver_lane_weights', {})
+        if weights:
+            args.extend(['-l', ','.join(
+                '{}:{}'.format(lane, weight) for lane, weight in sorted(
+                    weights.items())
+            )])
+        if self.__role.startswith('standby'):
+            args.append('-W')
+        if self.__role == 'qa':
+            max_memory = get_settings(view, 'jsonserver_qa_max_memory', 1024)
+            if max_memory:
+                args.extend(['-m', str(max_memory)])
         args.extend([str(os.getpid())])
 
         kwargs = {}
         folders = sublime.active_window().folders()
-        if len(folders) > 0 and os.path.exists(folders[0]):
+        if not self.__shared and len(folders) > 0 and \
+                os.path.exists(folders[0]):
             kwargs['cwd'] = folders[0]
 
         self.__data['arguments'] = (args, kwargs)
@@ -126,20 +212,7 @@ class Interpreter(object):
         """Extract a list of paths to be added to jedi
         """
 
-        extra = get_settings(view, 'extra_paths', [])
-        paths = [os.path.expanduser(os.path.expandvars(p)) for p in extra]
-
-        try:
-            paths.extend(sublime.active_window().folders())
-        except AttributeError:
-            Log.warning(
-                'Your `extra_paths` configuration is a string but we are '
-                'expecting a list of strings.'
-            )
-            paths = paths.split(',')
-            paths.extend(sublime.active_window().folder())
-
-        self.__data['paths'] = paths
+        self.__data['paths'] = extra_paths(view)
 
     def __extract_python_interpreter(self, view):
         """Extract the configured python interpreter
@@ -185,7 +258,19 @@ class Interpreter(object):
         if sublime.platform() != 'linux':
             return 'localhost'
 
-        return UnixSocketPath(self.project_name).socket
+        return UnixSocketPath(self.server_name).socket
+
+    def __resolve_vagrant_host(self):
+        """Return the host of the vagrant guest for the configured network
+        """
+
+        if self.network == 'private':
+            return self.address
+
+        if self.network == 'public':
+            return VagrantCache.ip_address(self.machine, self.dev)
+
+        return 'localhost'
 
     def __parse_raw_interpreter(self):
         """Parses the raw interpreter string for later simple use
@@ -226,14 +311,6 @@ class Interpreter(object):
             self.__data['interpreter'] = (
                 self.__data.get('interpreter', 'python')
             )
-            _vagrant_hosts = {
-                'forwarded': 'localhost',
-                'private': self.address,
-                'public': VagrantIPAddressGlobal(
-                    VagrantMachineGlobalInfo(self.machine).machine_id, self.dev
-                ).ip_address
-            }
-            self.__data['host'] = _vagrant_hosts[self.network]
 
         pathmap = {}
         for map_data in self.__data.get('pathmap', []):
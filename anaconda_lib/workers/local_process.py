@@ -3,7 +3,11 @@
 # This program is Free Software see LICENSE file for details
 
 import os
+import json
+import time
+import select
 
+from ..logger import Log
 from ..helpers import create_subprocess
 from ..helpers import debug_enabled, active_view
 
@@ -15,9 +19,20 @@ class LocalProcess(object):
     def __init__(self, interpreter):
         self.interpreter = interpreter
         self._process = None
+        self._ready = None
+        self.prestarted = False
+        self.capabilities = None
+        self.started = None
         self.error = ''
         self.tip = ''
 
+    @property
+    def running(self):
+        """Return True if the process has been started and is running
+        """
+
+        return self._process is not None and self._process.poll() is None
+
     @property
     def healthy(self):
         """Checks if the jsonserver process is healthy
@@ -44,23 +59,108 @@ class LocalProcess(object):
             # if we are in debug mode the JsonServer is handled manually
             return True
 
+        if self.prestarted and self.running:
+            # started in advance by the standby pool
+            self.prestarted = False
+            return True
+
         args, kwargs = self.interpreter.arguments
+        args, kwargs, write = self._ready_pipe(list(args), dict(kwargs))
+        self.started = time.time()
         self._process = create_subprocess(args, **kwargs)
+        if write is not None:
+            # the server has its own copy now, we only read
+            os.close(write)
+
         if self._process is None:
             # we can't spawn a new process for jsonserver, Wrong config?
+            self._close_ready()
             self._set_wrong_config_error()
             return False
 
         return True
 
+    def wait_ready(self, timeout):
+        """Wait until the server reports that it is listening
+
+        Returns None if the server can not report it (the caller has to
+        probe the socket) or True/False if it did before the timeout
+        """
+
+        if self._ready is None:
+            return self.capabilities is not None or None
+
+        line = b''
+        deadline = time.time() + timeout
+        while not line.endswith(b'\n'):
+            remaining = deadline - time.time()
+            readable, _, _ = select.select([self._ready], [], [], max(
+                remaining, 0
+            ))
+            if not readable:
+                self.error = 'the jsonserver was not ready after {}s'.format(
+                    timeout
+                )
+                self.tip = 'check the anaconda jsonserver log file'
+                self._close_ready()
+                return False
+
+            chunk = os.read(self._ready, 4096)
+            if not chunk:
+                self.error = 'the jsonserver exited before being ready'
+                self.tip = 'check the anaconda jsonserver log file'
+                self._close_ready()
+                return False
+            line += chunk
+
+        self._close_ready()
+        try:
+            message = json.loads(line.decode('utf8'))
+        except ValueError:
+            self.error = 'unexpected jsonserver ready message {}'.format(line)
+            return False
+
+        self.capabilities = message.get('capabilities', {})
+        Log.info('JsonServer {} listening in {} after {:.0f} ms'.format(
+            message.get('pid'), message.get('address'),
+            (time.time() - self.started) * 1000
+        ))
+        return True
+
     def stop(self):
         """Stop the current process
         """
 
+        self._close_ready()
         if self._process is not None and self._process.poll() is None:
             self._process.kill()
             self._process = None
 
+    def _ready_pipe(self, args, kwargs):
+        """Add the pipe where the server reports that it is ready
+
+        Only POSIX systems can pass the pipe to the child process, in
+        other systems the worker probes the socket instead
+        """
+
+        self._close_ready()
+        self.capabilities = None
+        if os.name != 'posix':
+            return args, kwargs, None
+
+        self._ready, write = os.pipe()
+        kwargs['pass_fds'] = (write,)
+        args.extend(['-r', str(write)])
+        return args, kwargs, write
+
+    def _close_ready(self):
+        """Close our end of the ready pipe if it is still open
+        """
+
+        if self._ready is not None:
+            os.close(self._ready)
+            self._ready = None
+
     def _set_wrong_config_error(self):
         """Set the local error and tip for bad python interpreter configuration
         """
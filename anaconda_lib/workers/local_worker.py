@@ -2,6 +2,7 @@
 # Copyright (C) 2013 - 2016 - Oscar Campos <oscar.campos@member.fsf.org>
 # This program is Free Software see LICENSE file for details
 
+import os
 import time
 import platform
 
@@ -9,18 +10,51 @@ import sublime
 
 from ..logger import Log
 from .worker import Worker
+from .standby import StandbyPool
+from .interpreter import Interpreter, extra_paths
 from ..helpers import project_name, get_socket_timeout
+from ..helpers import get_settings, active_view, debug_enabled
 from ..constants import WorkerStatus
 from ..builder.python_builder import AnacondaSetPythonBuilder
 
 
 class LocalWorker(Worker):
     """This class implements a local worker that uses a local jsonserver
+
+    If `jsonserver_split_processes` is enabled, the linters, QA and
+    autoformat requests are sent to a second JsonServer process (the QA
+    worker) so they don't compete with Jedi and the QA process can be
+    recycled without losing the warm Jedi caches.
+
+    Workers with a shared interpreter are used by every window configured
+    with the same python interpreter, each window opens a session with its
+    own extra paths and project root in the server.
     """
 
+    QA_HANDLERS = ('python_linter', 'qa', 'autoformat')
+
     def __init__(self, interpreter):
         self.reconnecting = False
+        self.qa_worker = None
+        self.sessions = set()
         super(LocalWorker, self).__init__(interpreter)
+        view = active_view()
+        if not interpreter.role and not debug_enabled(view) and \
+                get_settings(view, 'jsonserver_split_processes', False):
+            self.qa_worker = LocalWorker(Interpreter(
+                interpreter.raw_interpreter, role='qa',
+                shared=interpreter.shared
+            ))
+
+    def route(self, data):
+        """Return the worker that has to handle the given request
+        """
+
+        if self.qa_worker is not None and \
+                data.get('handler') in self.QA_HANDLERS:
+            return self.qa_worker
+
+        return self
 
     def check(self):
         """Perform required checks to conclude if it is safe to operate
@@ -32,6 +66,13 @@ class LocalWorker(Worker):
             return False
 
         timeout = get_socket_timeout(0.2)
+        ready = self.process.wait_ready(timeout * 10)
+        if ready is not None:
+            # the server told us it is listening (or why it never will)
+            self.error = self.process.error
+            self.tip = self.process.tip
+            return ready
+
         start = time.time()
         times = 1
         interval = timeout * 10
@@ -53,15 +94,88 @@ class LocalWorker(Worker):
         if self.reconnecting:
             self.interpreter.renew_interpreter()
 
+        standbys = self.interpreter.role != 'qa' and StandbyPool.enabled()
+        if standbys:
+            self._adopt(StandbyPool.take(self.interpreter.raw_interpreter))
+
         super(LocalWorker, self).start()
+        if standbys:
+            raw_interpreter = self.interpreter.raw_interpreter
+            sublime.set_timeout_async(
+                lambda: StandbyPool.replenish(raw_interpreter), 5000
+            )
+
+    def _adopt(self, standby):
+        """Use the given standby server instead of spawning a new one
+        """
+
+        if standby is None:
+            return
+
+        Log.info('Using standby JsonServer {}'.format(
+            standby.interpreter.server_name
+        ))
+        self.interpreter = standby.interpreter
+        self.process = standby.process
+        self.process.prestarted = True
+
+    def open_session(self, window):
+        """Open the session of the given window in a shared server if needed
+        """
+
+        session = str(window.id())
+        if (self.client, session) in self.sessions:
+            return session
+
+        folders = window.folders()
+        self.client.send_command(
+            lambda data: None,
+            method='open_session',
+            handler='jsonserver',
+            session=session,
+            paths=[p for p in extra_paths(window.active_view())
+                   if os.path.exists(p)],
+            root=folders[0] if folders else None
+        )
+        self.sessions.add((self.client, session))
+        return session
+
+    def close_session(self, window_id):
+        """Close the session of the given window in a shared server
+        """
+
+        session = str(window_id)
+        if (self.client, session) in self.sessions:
+            self.sessions.discard((self.client, session))
+            self.client.send_command(
+                lambda data: None,
+                method='close_session',
+                handler='jsonserver',
+                session=session
+            )
+
+        if self.qa_worker is not None:
+            self.qa_worker.close_session(window_id)
+
+    def _execute(self, callback, **data):
+        """Execute the given method in the remote server
+        """
+
+        if self.interpreter.shared:
+            data['session'] = self.open_session(sublime.active_window())
+
+        super(LocalWorker, self)._execute(callback, **data)
 
     def stop(self):
         """Stop it now please
         """
 
         self.process.stop()
-        self.client.close()
+        if self.client is not None:
+            self.client.close()
         self.status = WorkerStatus.incomplete
+        if self.qa_worker is not None:
+            self.qa_worker.stop()
 
     def on_python_interpreter_switch(self, raw_python_interpreter):
         """This method is called when there is a python interpreter switch
@@ -87,6 +201,9 @@ class LocalWorker(Worker):
 
             self.reconnecting = True
             self.stop()
+            if self.qa_worker is not None:
+                self.qa_worker.renew_interpreter(raw_python_interpreter)
+                self.qa_worker.reconnecting = True
 
     def _update_python_builder(self):
         """Update the python builder in the config file
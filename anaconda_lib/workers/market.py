@@ -13,7 +13,8 @@ from .interpreter import Interpreter
 from .local_worker import LocalWorker
 from .remote_worker import RemoteWorker
 from .vagrant_worker import VagrantWorker
-from ..helpers import active_view, get_interpreter
+from ..helpers import active_view, get_interpreter, get_settings
+from ..helpers import debug_enabled
 
 
 class Market(object, metaclass=Repr):
@@ -23,13 +24,30 @@ class Market(object, metaclass=Repr):
     _worker_pool = {}
     _lock = threading.RLock()
     _workers_type = {'tcp': RemoteWorker, 'vagrant': VagrantWorker}
+    _starting = {}  # worker: commands waiting for it to start
 
     def hire(self):
         """Hire the right worker from the market pool
+
+        When `jsonserver_shared` is enabled, windows with the same local
+        python interpreter share the worker (and the JsonServer)
         """
 
-        raw_interpreter = get_interpreter(active_view())
-        itprt = Interpreter(raw_interpreter)
+        view = active_view()
+        raw_interpreter = get_interpreter(view)
+        shared = get_settings(view, 'jsonserver_shared', False) and \
+            not debug_enabled(view)
+        itprt = Interpreter(raw_interpreter, shared=shared)
+        if shared and itprt.for_local:
+            with self._lock:
+                for worker in self._worker_pool.values():
+                    interpreter = worker.interpreter
+                    if interpreter.shared and \
+                            interpreter.raw_interpreter == raw_interpreter:
+                        return worker
+        else:
+            itprt = Interpreter(raw_interpreter)
+
         return self._workers_type.get(itprt.scheme, LocalWorker)(itprt)
 
     def add(self, window_id, worker):
@@ -67,45 +85,94 @@ class Market(object, metaclass=Repr):
             return
 
     @classmethod
-    def execute(cls, callback, **data):
-        """Execute the given method remotely and call the callback with result
+    def release(cls, window_id):
+        """Release the worker of a window that is being closed
         """
 
-        def _start_worker(wk, cb, **d):
-            wk.start()
-            if wk.status == WorkerStatus.healthy:
-                wk._execute(cb, **d)
-                return
+        with cls._lock:
+            worker = cls._worker_pool.pop(window_id, None)
 
-            sublime.set_timeout_async(lambda: _start_worker(wk, cb, **d), 5000)
+        if worker is not None and hasattr(worker, 'close_session'):
+            worker.close_session(window_id)
+
+    @classmethod
+    def execute(cls, callback, **data):
+        """Execute the given method remotely and call the callback with result
+        """
 
         window_id = sublime.active_window().id()
         worker = cls.get(cls, window_id)
+        if worker is not None and worker.interpreter.shared and \
+                worker.interpreter.raw_interpreter != get_interpreter(
+                    active_view()):
+            # the window moved to another interpreter, leave the shared one
+            cls.release(window_id)
+            worker = None
+
         if worker is None:
             # hire a new worker
             worker = cls.hire(cls)
             cls.add(cls, window_id, worker)
 
-        if worker.status == WorkerStatus.faulty:
-            return
+        hired = worker
+        if hasattr(worker, 'route'):
+            # split processes mode, every process is supervised on its own
+            worker = worker.route(data)
 
-        if worker.status == WorkerStatus.quiting:
+        if WorkerStatus.quiting in (hired.status, worker.status):
             cls.fire(cls, window_id)
             return
 
+        if worker.status == WorkerStatus.faulty:
+            return
+
         if worker.client is not None:
             if not worker.client.connected:
                 worker.reconnecting = True
                 worker.state = WorkerStatus.incomplete
-                _start_worker(worker, callback, **data)
+                cls._start_worker(worker, callback, **data)
             else:
                 worker._append_context_data(data)
                 worker._execute(callback, **data)
-                if worker.status == WorkerStatus.quiting:
+                if WorkerStatus.quiting in (hired.status, worker.status):
                     # that means that we need to let the worker go
                     cls.fire(cls, window_id)
         else:
-            _start_worker(worker, callback, **data)
+            cls._start_worker(worker, callback, **data)
+
+    @classmethod
+    def _start_worker(cls, worker, callback, **data):
+        """Start the given worker and execute the command once it is healthy
+
+        There is a single start in progress for every worker, the commands
+        given meanwhile wait for it instead of starting the worker again
+        """
+
+        with cls._lock:
+            waiting = cls._starting.get(worker)
+            if waiting is not None:
+                waiting.append((callback, data))
+                return
+
+            cls._starting[worker] = [(callback, data)]
+
+        cls._retry_start(worker)
+
+    @classmethod
+    def _retry_start(cls, worker):
+        """Try to start the given worker, try again in 5 seconds if it fails
+        """
+
+        worker.start()
+        if worker.status != WorkerStatus.healthy:
+            sublime.set_timeout_async(lambda: cls._retry_start(worker), 5000)
+            return
+
+        with cls._lock:
+            waiting = cls._starting.pop(worker, [])
+
+        for callback, data in waiting:
+            worker._execute(callback, **data)
 
     @classmethod
     def lookup(cls, window_id):
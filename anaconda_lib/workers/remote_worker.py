@@ -4,12 +4,16 @@
 
 from ..logger import Log
 from .worker import Worker
+from .connection import ConnectionManager
 from ..helpers import project_name
 from ..constants import WorkerStatus
 
 
 class RemoteWorker(Worker):
     """This class implements a remote worker
+
+    Every window that uses the same remote server shares one connection
+    to it (see ConnectionManager)
     """
 
     def __init__(self, interpreter):
@@ -32,8 +36,21 @@ class RemoteWorker(Worker):
             self.tip = 'Fix your `python_interpreter` configuration'
             return False
 
+        host, port = self.interpreter.host, int(self.interpreter.port)
+        if ConnectionManager.connected(host, port):
+            # another window is already talking with the server
+            return True
+
         return self._status()
 
+    def connect(self):
+        """Return a connection to the remote server sharing its link
+        """
+
+        return ConnectionManager.acquire(
+            self.interpreter.host, int(self.interpreter.port)
+        )
+
     def on_python_interpreter_switch(self, raw_python_interpreter):
         """This method is called when there is a python interpreter change
         """
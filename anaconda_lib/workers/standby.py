@@ -0,0 +1,152 @@
+# Copyright (C) 2013 - 2016 - Oscar Campos <oscar.campos@member.fsf.org>
+# This program is Free Software see LICENSE file for details
+
+import uuid
+import time
+import threading
+from collections import OrderedDict
+
+import sublime
+
+from ..logger import Log
+from .interpreter import Interpreter
+from .local_process import LocalProcess
+from ..helpers import active_view, get_settings, debug_enabled
+
+
+class Standby(object):
+    """A JsonServer process that is running but not used by any window yet
+    """
+
+    def __init__(self, interpreter, process):
+        self.interpreter = interpreter
+        self.process = process
+        self.started = time.time()
+
+    @property
+    def alive(self):
+        """Return True if the process is still running
+        """
+
+        return self.process.running
+
+
+class StandbyPool(object):
+    """Pre-spawned JsonServers for the recently used python interpreters
+
+    Standby servers are shared servers (see `jsonserver_shared`) that
+    already imported everything and warmed Jedi up, when a worker starts
+    it takes one and opens its session in it instead of spawning a new
+    server and waiting for it. Only the last `jsonserver_standby_interpreters`
+    interpreters keep standby servers and they are killed when they are
+    not used for `jsonserver_standby_ttl` seconds.
+    """
+
+    _standbys = OrderedDict()
+    _lock = threading.RLock()
+
+    @classmethod
+    def enabled(cls):
+        """Return True if standby servers are configured
+        """
+
+        view = active_view()
+        return get_settings(view, 'jsonserver_standby_servers', 0) > 0 and \
+            not debug_enabled(view)
+
+    @classmethod
+    def take(cls, raw_interpreter):
+        """Return a running standby for the given interpreter (or None)
+        """
+
+        cls.reap()
+        with cls._lock:
+            standbys = cls._standbys.get(raw_interpreter, [])
+            while standbys:
+                standby = standbys.pop(0)
+                if standby.alive:
+                    cls._standbys.move_to_end(raw_interpreter)
+                    return standby
+
+        return None
+
+    @classmethod
+    def replenish(cls, raw_interpreter):
+        """Spawn the standby servers missing for the given interpreter
+        """
+
+        size = get_settings(active_view(), 'jsonserver_standby_servers', 0)
+        limit = get_settings(
+            active_view(), 'jsonserver_standby_interpreters', 2
+        )
+        with cls._lock:
+            standbys = cls._standbys.pop(raw_interpreter, [])
+            cls._standbys[raw_interpreter] = standbys
+            while len(standbys) < size:
+                standby = cls._spawn(raw_interpreter)
+                if standby is None:
+                    break
+                standbys.append(standby)
+
+            while len(cls._standbys) > limit:
+                _, evicted = cls._standbys.popitem(last=False)
+                cls._kill(evicted)
+
+        ttl = get_settings(active_view(), 'jsonserver_standby_ttl', 600)
+        sublime.set_timeout_async(cls.reap, ttl * 1000 + 1000)
+
+    @classmethod
+    def reap(cls):
+        """Kill the standby servers that have not been used for too long
+        """
+
+        ttl = get_settings(active_view(), 'jsonserver_standby_ttl', 600)
+        now = time.time()
+        with cls._lock:
+            for standbys in cls._standbys.values():
+                expired = [
+                    s for s in standbys
+                    if not s.alive or now - s.started > ttl
+                ]
+                for standby in expired:
+                    standbys.remove(standby)
+                cls._kill(expired)
+
+    @classmethod
+    def shutdown(cls):
+        """Kill every standby server
+        """
+
+        with cls._lock:
+            for standbys in cls._standbys.values():
+                cls._kill(standbys)
+            cls._standbys.clear()
+
+    @classmethod
+    def _spawn(cls, raw_interpreter):
+        """Start a new standby server for the given interpreter
+        """
+
+        interpreter = Interpreter(
+            raw_interpreter, 'standby-{}'.format(uuid.uuid4().hex[:8]),
+            shared=True
+        )
+        if not interpreter.for_local:
+            return None
+
+        process = LocalProcess(interpreter)
+        if not process.start():
+            Log.error('standby server could not start: {}'.format(
+                process.error
+            ))
+            return None
+
+        return Standby(interpreter, process)
+
+    @staticmethod
+    def _kill(standbys):
+        """Stop the processes of the given standby servers
+        """
+
+        for standby in standbys:
+            standby.process.stop()
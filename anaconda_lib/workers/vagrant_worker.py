@@ -7,10 +7,11 @@ import time
 import sublime
 
 from .worker import Worker
+from .connection import ConnectionManager
 from ..helpers import project_name
 from ..constants import WorkerStatus
 from ..progress_bar import ProgressBar
-from ..vagrant import VagrantMachineGlobalInfo, VagrantStartMachine
+from ..vagrant import VagrantCache, VagrantStartMachine
 
 
 class VagrantWorker(Worker):
@@ -93,6 +94,8 @@ class VagrantWorker(Worker):
                     sublime.error_message(str(error))
                     return False
                 else:
+                    # the status and the guest addresses may have changed
+                    VagrantCache.invalidate(self.interpreter.machine)
                     pbar.terminate()
                     sublime.message_dialog('Machine {} started.'.format(
                         self.interpreter.machine
@@ -113,6 +116,11 @@ class VagrantWorker(Worker):
                 self.tip = self.process.tip
                 return False
 
+        host, port = self.interpreter.host, int(self.interpreter.port)
+        if ConnectionManager.connected(host, port):
+            # another window is already talking with the minserver
+            return True
+
         start = time.time()
         while not self._status():
             if time.time() - start >= 2:  # 2s
@@ -125,6 +133,14 @@ class VagrantWorker(Worker):
 
         return True
 
+    def connect(self):
+        """Return a connection to the minserver sharing its link
+        """
+
+        return ConnectionManager.acquire(
+            self.interpreter.host, int(self.interpreter.port)
+        )
+
     def stop(self):
         """Stop it now please
         """
@@ -162,7 +178,12 @@ class VagrantWorker(Worker):
         """
 
         try:
-            vagrant_info = VagrantMachineGlobalInfo(self.interpreter.machine)
+            vagrant_info = VagrantCache.global_info(self.interpreter.machine)
+            if vagrant_info.status != 'running':
+                # the machine may have been started since it was cached
+                vagrant_info = VagrantCache.global_info(
+                    self.interpreter.machine, fresh=True
+                )
         except RuntimeError as error:
             self.errr = error
             self.tip = 'Install vagrant or add it to your path'
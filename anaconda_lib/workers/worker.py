@@ -2,6 +2,7 @@
 # Copyright (C) 2013 - 2016 - Oscar Campos <oscar.campos@member.fsf.org>
 # This program is Free Software see LICENSE file for details
 
+import time
 import errno
 import socket
 
@@ -10,7 +11,9 @@ import sublime
 from ..logger import Log
 from ..helpers import get_settings
 from ..jsonclient import AsynClient
+from ..callback import HookedCallback
 from ..constants import WorkerStatus
+from ..document_sync import DocumentSync
 from ..decorators import auto_project_switch_ng
 from ..helpers import debug_enabled, active_view, is_remote_session
 
@@ -27,6 +30,18 @@ class Worker(object):
         self.interpreter = interpreter
         self.process = WorkerProcess(interpreter).take()
         self.client = None
+        self.started = None
+        self.ready = None
+        self.first_completion = None
+
+    def __repr__(self):
+        """String representation of the worker (used in Market diagnostics)
+        """
+
+        return '{} {} ({}): {}'.format(
+            self.__class__.__name__, self.interpreter.raw_interpreter,
+            self.status.name, self.client
+        )
 
     @property
     def unix_socket(self):
@@ -40,6 +55,8 @@ class Worker(object):
         """Start the worker
         """
 
+        self.started = time.time()
+        self.ready = self.first_completion = None
         if not debug_enabled(active_view()):
             if self.process is None:
                 Log.fatal('Worker process is None!!')
@@ -75,14 +92,28 @@ class Worker(object):
                 self.status = WorkerStatus.faulty
             return
 
-        host, port = self.interpreter.host, self.interpreter.port
-        if self.unix_socket:
-            port = 0
-        self.client = AsynClient(int(port), host=host)
+        self.client = self.connect()
         self.status = WorkerStatus.healthy
+        self.ready = time.time()
         if hasattr(self, 'reconnecting') and self.reconnecting:
             self.reconnecting = False
 
+    def connect(self):
+        """Return a new client connected to the JsonServer
+        """
+
+        host, port = self.interpreter.host, self.interpreter.port
+        if self.unix_socket:
+            port = 0
+        client = AsynClient(int(port), host=host)
+        if get_settings(active_view(), 'jsonserver_binary_framing', False):
+            # compression only pays off when the server is not local
+            client.negotiate_framing(
+                compression=not self.interpreter.for_local
+            )
+
+        return client
+
     def stop(self):
         """Stop the worker
         """
@@ -98,7 +129,9 @@ class Worker(object):
         """Renew the interpreter object (as it has changed in the configuration)
         """
 
-        self.interpreter = Interpreter(raw_interpreter)
+        self.interpreter = Interpreter(
+            raw_interpreter, self.interpreter.role, self.interpreter.shared
+        )
         self.process.interpreter = self.interpreter
 
     @auto_project_switch_ng
@@ -106,8 +139,37 @@ class Worker(object):
         """Execute the given method in the remote server
         """
 
+        if data.get('method') == 'autocomplete' and \
+                self.first_completion is None:
+            callback = self._time_first_completion(callback)
+
+        callback = DocumentSync.resync_callback(
+            callback, data, self.client.send_command
+        )
         self.client.send_command(callback, **data)
 
+    def _time_first_completion(self, callback):
+        """Record and report the time from start to the first completion
+
+        The first completion pays for the whole cold start (spawning the
+        server, importing and warming Jedi up) so it is what we track
+        """
+
+        def _record(callback, data):
+            if self.first_completion is None and self.started is not None:
+                self.first_completion = time.time()
+                Log.info(
+                    'cold start of {}: ready after {:.0f} ms, first '
+                    'completion after {:.0f} ms'.format(
+                        self.interpreter.server_name,
+                        (self.ready - self.started) * 1000,
+                        (self.first_completion - self.started) * 1000
+                    )
+                )
+            callback(data)
+
+        return HookedCallback(callback, _record)
+
     def _get_service_socket(self, timeout=0.05):
         """Helper function that returns a socket to the JsonServer process
         """
@@ -1,4 +1,3 @@
-
 # Copyright (C) 2013 - Oscar Campos <oscar.campos@member.fsf.org>
 # This program is Free Software see LICENSE file for details
 
@@ -10,13 +9,18 @@ from .base import Command
 
 
 class Rename(Command):
-    """Get back a python definition where to go
+    """Rename the object under the cursor in every file of the project
+
+    The given rename engine computes the changes of every file, they are
+    sent back (tagged as partial) as soon as the file is done and the last
+    message just closes the rename.
     """
 
-    def __init__(self, callback, uid, script, directories, new_word, refactor):
+    def __init__(self, callback, line, col, uid, script, directories, engine):
         self.script = script
-        self.new_word = new_word
-        self.jedi_refactor = refactor
+        self.line = line
+        self.col = col
+        self.engine = engine
         self.directories = directories
         super(Rename, self).__init__(callback, uid)
 
@@ -24,25 +28,23 @@ class Rename(Command):
         """Run the command
         """
 
-        renames = {}
+        files = 0
         try:
-            usages = self.script.usages()
-            proposals = self.jedi_refactor.rename(self.script, self.new_word)
-            for u in usages:
-                path = os.path.dirname(u.module_path)
-                if self.is_same_path(path):
-                    if u.module_path not in renames:
-                        renames[u.module_path] = []
-
-                    thefile = proposals.new_files().get(u.module_path)
-                    if thefile is None:
-                        continue
-
-                    lineno = u.line - 1
-                    line = thefile.splitlines()[lineno]
-                    renames[u.module_path].append({
-                        'lineno': lineno, 'line': line
-                    })
+            usages = self.script.get_references(
+                line=self.line, column=self.col, include_builtins=False
+            )
+            usages = [
+                u for u in usages if u.module_path is None or
+                self.is_same_path(os.path.dirname(str(u.module_path)))
+            ]
+            for filename, changes in self.engine.files(usages):
+                files += 1
+                self.callback({
+                    'success': True,
+                    'renames': {filename: changes},
+                    'partial': True,
+                    'uid': self.uid
+                })
             success = True
         except Exception as error:
             logging.error(error)
@@ -50,7 +52,8 @@ class Rename(Command):
             success = False
 
         self.callback({
-            'success': success, 'renames': renames, 'uid': self.uid
+            'success': success, 'renames': {}, 'files': files,
+            'occurrences': self.engine.renamed, 'uid': self.uid
         })
 
     def is_same_path(self, path):
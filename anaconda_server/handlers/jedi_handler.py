@@ -5,13 +5,17 @@
 
 import logging
 
-import jedi
 from lib.anaconda_handler import AnacondaHandler
-from jedi.api import refactoring as jedi_refactor
+from lib.executor import lane_for
+from lib.jedi_cache import jedi_cache
+from lib import symbol_index
+from lib.symbol_index import symbol_indexes
+from lib.rename_engine import RenameEngine
 from commands import Doc, Goto, GotoAssignment, Rename, FindUsages
 from commands import CompleteParameters, AutoComplete
 
 logger = logging.getLogger('')
+symbol_index.install()
 
 
 class JediHandler(AnacondaHandler):
@@ -24,41 +28,61 @@ class JediHandler(AnacondaHandler):
     def run(self):
         """Call the specific method (override base class)"""
         self.real_callback = self.callback
-        self.callback = self.handle_result_and_purge_cache
-        super(JediHandler, self).run()
+        self.callback = self.handle_result_and_check_memory
+        with jedi_cache.locks[self.lane]:
+            super(JediHandler, self).run()
 
-    def handle_result_and_purge_cache(self, result):
-        """Handle the result from the call and purge in memory jedi cache"""
+    def handle_result_and_check_memory(self, result):
+        """Handle the result from the call and keep the jedi cache bounded
+        """
 
-        try:
-            jedi.cache.clear_time_caches()
-        except:
-            jedi.cache.clear_caches()
+        jedi_cache.check_memory()
         self.real_callback(result)
 
+    @property
+    def lane(self):
+        """Return the executor lane of the request
+        """
+
+        return lane_for(self.command)
+
     @property
     def script(self):
         """Generates a new valid Jedi Script and return it back"""
         return self.jedi_script(**self.data)
 
     def jedi_script(
-        self, source, line, offset, filename='', encoding='utf8', **kw
+        self, source, line, offset, filename='', encoding='utf8',
+        extra_paths=(), project_root=None, **kw
     ):
-        """Generate an usable Jedi Script"""
-        jedi_project = jedi.get_default_project(filename)
+        """Generate an usable Jedi Script (reused while the source is equal)
+        """
+
+        return jedi_cache.script(
+            source, filename, extra_paths, project_root, self.lane
+        )
+
+    def invalidate_cache(self, filename=None):
+        """Drop the cached jedi scripts of the project the file belongs to
+        """
 
-        return jedi.Script(source, project=jedi_project)
+        jedi_cache.invalidate(filename)
+        symbol_indexes.invalidate(filename)
+        self.callback({'success': True, 'uid': self.uid})
 
     def rename(self, directories, new_word):
         """Rename the object under the cursor by the given word"""
 
         Rename(
             self.callback,
+            self.data.get("line", 1),
+            self.data.get("offset", 0),
             self.uid,
             self.script,
             directories,
-            new_word,
-            jedi_refactor,
+            RenameEngine(
+                new_word, self.data.get('filename'), self.data.get('source')
+            ),
         )
 
     def autocomplete(self):
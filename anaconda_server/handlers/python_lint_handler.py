@@ -5,6 +5,8 @@
 
 import os
 import sys
+import json
+import logging
 from functools import partial
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '../../anaconda_lib'))
@@ -12,20 +14,66 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '../'))
 
 from import_validator import Validator
 from linting.anaconda_pep8 import Pep8Linter
+from linting.parsed_source import ParsedSource
+from lib.cache import LRUCache
+from lib.jedi_cache import jedi_cache
 from lib.anaconda_handler import AnacondaHandler
 from linting.anaconda_pyflakes import PyFlakesLinter
 from linting.anaconda_mypy import MyPy as AnacondaMyPy
+from linting.anaconda_dmypy import DMyPy as AnacondaDMyPy
 from linting.anaconda_pep257 import PEP257 as AnacondaPep257
 from commands import PyFlakes, PEP257, PEP8, PyLint, ImportValidator, MyPy
 
 try:
-    from linting.anaconda_pylint import PyLinter
+    from linting.anaconda_pylint import PyLinter, WarmPyLinter
     from linting.anaconda_pylint import numversion
 
     PYLINT_AVAILABLE = True
 except ImportError:
     PYLINT_AVAILABLE = False
 
+try:
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+except ImportError:
+    # Python 2 interpreters without the futures backport installed
+    ThreadPoolExecutor = None
+
+LINT_WORKERS = 6
+_lint_executor = None
+
+# linters which results depend only on the code, filename and settings,
+# mypy, pylint and the import validator look at other files and modules
+CACHEABLE_LINTERS = ('pyflakes', 'pep8', 'pep257')
+# settings that don't change the linting results
+VOLATILE_SETTINGS = ('parallel_linting', 'stream_linting')
+LINT_CACHE = LRUCache(max_items=512)
+_linter_versions = None
+
+
+def lint_executor():
+    """Return the (lazily created) thread pool used by the parallel linting
+    """
+
+    global _lint_executor
+    if _lint_executor is None:
+        _lint_executor = ThreadPoolExecutor(max_workers=LINT_WORKERS)
+
+    return _lint_executor
+
+
+def linter_versions():
+    """Return the versions of the (already imported) cacheable linters
+    """
+
+    global _linter_versions
+    if _linter_versions is None:
+        _linter_versions = tuple(
+            getattr(sys.modules.get(name), '__version__', None)
+            for name in ('pyflakes', 'pycodestyle', 'pydocstyle')
+        )
+
+    return _linter_versions
+
 
 class PythonLintHandler(AnacondaHandler):
     """Handle request to execute Python linting commands form the JsonServer"""
@@ -49,20 +97,41 @@ class PythonLintHandler(AnacondaHandler):
         }
         self._errors = []
         self._failures = []
+        self.source = None
 
     def lint(self, code=None, filename=None):
-        """This is called from the JsonServer"""
-        self._configure_linters()
-        for linter_name, expected in self._linters.items():
-            if expected is True:
-                func = getattr(self, linter_name)
-                func(code, filename)
+        """This is called from the JsonServer
 
+        The source is parsed (lazily) only once for every linter and the
+        time spent in every stage is sent back in the response timings
+        """
+        self.source = ParsedSource(code, filename)
+        self._configure_linters()
+        linters = [
+            linter_name for linter_name, expected in self._linters.items()
+            if expected is True
+        ]
+        parallel = self.settings.get('parallel_linting', False)
+        if parallel and ThreadPoolExecutor is not None and len(linters) > 1:
+            self._lint_parallel(linters, code, filename)
+        else:
+            for linter_name in linters:
+                errors, failures = self._run_linter(
+                    linter_name, code, filename
+                )
+                self._errors += errors
+                self._failures += failures
+
+        timings = dict(self.source.timings)
+        logging.debug('lint timings (ms) for {0}: {1}'.format(
+            filename, json.dumps(timings, sort_keys=True)
+        ))
         if len(self._errors) == 0 and len(self._failures) > 0:
             self.callback(
                 {
                     'success': False,
                     'errors': '. '.join([str(e) for e in self._failures]),
+                    'timings': timings,
                     'uid': self.uid,
                     'vid': self.vid,
                 }
@@ -73,11 +142,101 @@ class PythonLintHandler(AnacondaHandler):
             {
                 'success': True,
                 'errors': self._errors,
+                'timings': timings,
                 'uid': self.uid,
                 'vid': self.vid,
             }
         )
 
+    def _lint_parallel(self, linters, code, filename):
+        """Run every given linter at the same time in the lint thread pool
+
+        If `stream_linting` is set, the results of every linter are sent
+        back (tagged as partial) as soon as the linter finishes so the
+        fast linters marks don't have to wait for the slow ones
+        """
+
+        stream = self.settings.get('stream_linting', False)
+        futures = {
+            lint_executor().submit(self._run_linter, name, code, filename): name
+            for name in linters
+        }
+        for pending, future in enumerate(as_completed(futures), 1):
+            try:
+                errors, failures = future.result()
+            except Exception as error:
+                errors, failures = [], [str(error)]
+
+            self._errors += errors
+            self._failures += failures
+            if stream and errors and pending < len(futures):
+                self.callback({
+                    'success': True,
+                    'errors': errors,
+                    'partial': True,
+                    'linter': futures[future],
+                    'uid': self.uid,
+                    'vid': self.vid,
+                })
+
+    def _run_linter(self, linter_name, code, filename):
+        """Run a single linter in its own handler and return its results
+
+        Results of the cacheable linters are looked up in (and stored to)
+        the lint results cache so the same code is never linted twice
+        """
+
+        with self._parsed(code, filename).timed(linter_name):
+            key = self._cache_key(linter_name, code, filename)
+            cached = LINT_CACHE.get(key) if key is not None else None
+            if cached is not None:
+                return list(cached), []
+
+            handler = self.__class__(
+                self.command, self.data, self.uid, self.vid,
+                self.settings, None, self.debug
+            )
+            handler.source = self.source
+            handler._configure_linters()
+            getattr(handler, linter_name)(code, filename)
+            if key is not None and not handler._failures:
+                LINT_CACHE.set(key, tuple(handler._errors))
+
+            return handler._errors, handler._failures
+
+    def _parsed(self, code, filename):
+        """Return the parsed source shared by the linters of the request
+        """
+
+        if self.source is None or self.source.code is not code:
+            self.source = ParsedSource(code, filename)
+
+        return self.source
+
+    def _cache_key(self, linter_name, code, filename):
+        """Return the results cache key for the given linter (or None)
+        """
+
+        if linter_name not in CACHEABLE_LINTERS or code is None:
+            return None
+
+        settings = dict(
+            (name, value) for name, value in self.settings.items()
+            if name not in VOLATILE_SETTINGS
+        )
+        rcfile = settings.get('pep8_rcfile')
+        if linter_name == 'pep8' and rcfile:
+            try:
+                settings['pep8_rcfile_mtime'] = os.path.getmtime(rcfile)
+            except (OSError, TypeError):
+                pass
+
+        return (
+            linter_name, hash(code), filename,
+            json.dumps(settings, sort_keys=True, default=str),
+            linter_versions(),
+        )
+
     def pyflakes(self, code=None, filename=None):
         """Run the PyFlakes linter"""
 
@@ -88,7 +247,7 @@ class PythonLintHandler(AnacondaHandler):
             self.vid,
             lint,
             self.settings,
-            code,
+            self._parsed(code, filename),
             filename,
         )
 
@@ -102,7 +261,7 @@ class PythonLintHandler(AnacondaHandler):
             self.vid,
             lint,
             self.settings,
-            code,
+            self._parsed(code, filename),
             filename,
         )
 
@@ -111,7 +270,10 @@ class PythonLintHandler(AnacondaHandler):
 
         lint = AnacondaPep257
         ignore = self.settings.get('pep257_ignore')
-        PEP257(self._merge, self.uid, self.vid, lint, ignore, code, filename)
+        PEP257(
+            self._merge, self.uid, self.vid, lint, ignore,
+            self._parsed(code, filename), filename
+        )
 
     def pylint(self, code=None, filename=None):
         """Run the pyling linter"""
@@ -122,7 +284,17 @@ class PythonLintHandler(AnacondaHandler):
             return
 
         rcfile = self.settings.get('pylint_rcfile', False)
-        if numversion < (2, 4, 4):
+        in_process = self.settings.get('pylint_in_process', False)
+        if in_process and numversion >= (2, 5, 0):
+            PyLint(
+                self._normalize,
+                self.uid,
+                self.vid,
+                partial(WarmPyLinter, code=code),
+                rcfile,
+                filename,
+            )
+        elif numversion < (2, 4, 4):
             PyLint(
                 partial(self._normalize, self.settings),
                 self.uid,
@@ -139,13 +311,17 @@ class PythonLintHandler(AnacondaHandler):
     def import_validator(self, code, filename=None):
         """Run the import validator linter"""
 
-        lint = Validator
+        data = self.data or {}
+        # the validator uses its own jedi Script, no lane lock is needed
+        project = jedi_cache.project(
+            filename or '', data.get('extra_paths'), data.get('project_root')
+        )
         ImportValidator(
             self._merge,
             self.uid,
             self.vid,
-            lint,
-            code,
+            partial(Validator, project=project),
+            self._parsed(code, filename),
             filename,
             self.settings,
         )
@@ -154,6 +330,8 @@ class PythonLintHandler(AnacondaHandler):
         """Run the mypy linter"""
 
         lint = AnacondaMyPy
+        if self.settings.get('mypy_daemon', False):
+            lint = AnacondaDMyPy
         MyPy(
             self._merge,
             self.uid,
@@ -12,6 +12,7 @@ import logging
 import platform
 import asyncore
 import asynchat
+import select
 import threading
 import traceback
 import subprocess
@@ -19,6 +20,7 @@ from logging import handlers
 from optparse import OptionParser
 from os import chmod
 from os.path import dirname, join, abspath
+from functools import partial
 from operator import xor
 
 # we use ujson if it's available on the target interpreter
@@ -33,10 +35,17 @@ sys.path.insert(0, join(PROJECT_ROOT, 'anaconda_lib'))
 from lib.path import log_directory
 from jedi import set_debug_function
 from lib.contexts import json_decode
+from framing import HEADER, negotiate, offer
+from lib.documents import DocumentStore, DocumentOutOfSync
+from lib.sessions import SessionRegistry
+from lib.jedi_cache import jedi_cache, resident_memory
+from lib.executor import RequestExecutor, DEFAULT_WORKERS, INTERACTIVE
+from lib.executor import parse_weights
 from unix_socket import UnixSocketPath, get_current_umask
 from handlers import ANACONDA_HANDLERS
 from jedi import settings as jedi_settings
 from lib.anaconda_handler import AnacondaHandler
+from linting.anaconda_dmypy import shutdown_daemons
 
 
 DEBUG_MODE = False
@@ -51,17 +60,28 @@ class JSONHandler(asynchat.async_chat):
     def __init__(self, sock, server):
         self.server = server
         self.rbuffer = []
+        self.documents = DocumentStore()
+        self.framing = None
+        self.frame_flags = None
         asynchat.async_chat.__init__(self, sock)
         self.set_terminator(b"\r\n" if PY3 else "\r\n")
 
     def return_back(self, data):
-        """Send data back to the client
+        """Send data back to the client (from any thread)
         """
 
+        if threading.current_thread() is not self.server.io_thread:
+            # asynchat is not thread safe, push from the I/O thread
+            self.server.call_soon(self.return_back, data)
+            return
+
         if data is not None:
             print(data)
-            data = '{0}\r\n'.format(json.dumps(data))
-            data = bytes(data, 'utf8') if PY3 else data
+            if self.framing is not None:
+                data = self.framing.encode(data)
+            else:
+                data = '{0}\r\n'.format(json.dumps(data))
+                data = bytes(data, 'utf8') if PY3 else data
 
             if DEBUG_MODE is True:
                 print('About push back to ST3: {0}'.format(data))
@@ -81,44 +101,83 @@ class JSONHandler(asynchat.async_chat):
         message = b''.join(self.rbuffer) if PY3 else ''.join(self.rbuffer)
         self.rbuffer = []
 
+        if self.framing is not None:
+            data = self.read_frame(message)
+            if data is not None:
+                self.handle_message(data)
+            return
+
         with json_decode(message) as data:
-            if not data:
-                logging.info('No data received in the handler')
-                return
+            pass
 
-            if data['method'] == 'check':
-                logging.info('Check received')
-                self.return_back(message='Ok', uid=data['uid'])
-                return
+        # handled out of the context so errors in the handlers
+        # are not taken as errors decoding the message
+        self.handle_message(data)
 
-            self.server.last_call = time.time()
+    def read_frame(self, message):
+        """Read a frame header or payload returning the data when complete
+        """
 
-        if isinstance(data, dict):
-            logging.info(
-                'client requests: {0}'.format(data['method'])
-            )
+        if self.frame_flags is None:
+            length, flags = HEADER.unpack(message)
+            if length > 0:
+                self.frame_flags = flags
+                self.set_terminator(length)
+            return None
 
-            method = data.pop('method')
-            uid = data.pop('uid')
-            vid = data.pop('vid', None)
-            settings = data.pop('settings', {})
+        flags, self.frame_flags = self.frame_flags, None
+        self.set_terminator(HEADER.size)
+        return self.framing.decode(message, flags)
 
-            handler_type = data.pop('handler')
-            if DEBUG_MODE is True:
-                print('Received method: {0}, handler: {1}'.format(
-                    method, handler_type)
-                )
-            try:
-                self.handle_command(
-                    handler_type, method, uid, vid, settings, data,
-                )
-            except Exception as error:
-                logging.error(error)
-                log_traceback()
-                self.return_back({
-                    'success': False, 'uid': uid,
-                    'vid': vid, 'error': str(error)
-                })
+    def negotiate_framing(self, data):
+        """Switch to the binary framing offered by the client
+
+        The answer is still sent using the line based protocol, every
+        message after it (in both directions) is a frame
+        """
+
+        framing = negotiate(data.get('framing', {}))
+        self.return_back({
+            'success': True, 'uid': data['uid'],
+            'framing': framing.describe()
+        })
+        self.framing = framing
+        self.set_terminator(HEADER.size)
+
+    def handle_message(self, data):
+        """Handle a decoded message from the client
+        """
+
+        if not data:
+            logging.info('No data received in the handler')
+            return
+
+        if data['method'] == 'check':
+            logging.info('Check received')
+            self.return_back(message='Ok', uid=data['uid'])
+            return
+
+        if data['method'] == 'negotiate_framing':
+            self.negotiate_framing(data)
+            return
+
+        if data['method'] == 'cancel':
+            self.server.executor.cancel(data['uid'])
+            return
+
+        if data['method'] == 'ping':
+            # keepalive of the clients that share a connection
+            self.return_back({'success': True, 'uid': data['uid']})
+            return
+
+        if data['method'] in ('open_session', 'close_session'):
+            self.handle_session(data)
+            return
+
+        self.server.last_call = time.time()
+
+        if isinstance(data, dict):
+            self.submit(data)
         else:
             logging.error(
                 'client sent somethinf that I don\'t understand: {0}'.format(
@@ -126,6 +185,124 @@ class JSONHandler(asynchat.async_chat):
                 )
             )
 
+    def submit(self, data):
+        """Sync the document and queue the request in the executor
+
+        Documents are synced here as the deltas must be applied in order
+        """
+
+        uid, vid = data['uid'], data.get('vid')
+        if not self.sync_document(uid, vid, data):
+            return
+
+        session = self.server.sessions.get(id(self), data.pop('session', None))
+        if session is not None:
+            data['extra_paths'] = session.paths
+            data['project_root'] = session.root
+
+        self.server.executor.submit(
+            partial(self.handle_request, data), uid, data['method'], vid,
+            data.pop('supersede', False), id(self)
+        )
+
+    def handle_session(self, data):
+        """Open or close a session of a window using a shared server
+        """
+
+        if data['method'] == 'open_session':
+            self.server.sessions.open(
+                id(self), data['session'], data.get('paths'), data.get('root')
+            )
+        else:
+            self.server.sessions.close(id(self), data['session'])
+
+        self.return_back({'success': True, 'uid': data['uid']})
+
+    def handle_close(self):
+        """Called when the client closes the connection
+        """
+
+        self.server.sessions.close_client(id(self))
+        self.close()
+
+    def handle_read(self):
+        """Read the available messages and run the queued requests
+
+        When the requests are not run by a pool of workers the socket is
+        drained before every request so newer requests can supersede or
+        cancel the ones that are still waiting
+        """
+
+        asynchat.async_chat.handle_read(self)
+        while self.server.executor.inline and self.connected:
+            self.drain()
+            if not self.server.executor.run_next():
+                break
+
+    def drain(self):
+        """Read every message that is already waiting in the socket
+        """
+
+        while self.connected:
+            readable, _, _ = select.select([self.socket], [], [], 0)
+            if not readable:
+                break
+
+            asynchat.async_chat.handle_read(self)
+
+    def handle_request(self, data):
+        """Handle a request from the client
+        """
+
+        logging.info(
+            'client requests: {0}'.format(data['method'])
+        )
+
+        method = data.pop('method')
+        uid = data.pop('uid')
+        vid = data.pop('vid', None)
+        settings = data.pop('settings', {})
+
+        handler_type = data.pop('handler')
+        if DEBUG_MODE is True:
+            print('Received method: {0}, handler: {1}'.format(
+                method, handler_type)
+            )
+        try:
+            self.handle_command(
+                handler_type, method, uid, vid, settings, data,
+            )
+        except Exception as error:
+            logging.error(error)
+            log_traceback()
+            self.return_back({
+                'success': False, 'uid': uid,
+                'vid': vid, 'error': str(error)
+            })
+
+    def sync_document(self, uid, vid, data):
+        """Resolve the document text if the client sent versioned sync data
+        """
+
+        document = data.pop('document', None)
+        if document is None:
+            return True
+
+        key = document.get('key', 'source')
+        try:
+            data[key] = self.documents.resolve(
+                (vid, key), document, data.get(key)
+            )
+        except DocumentOutOfSync as error:
+            logging.info('requesting a full resync: {0}'.format(error))
+            self.return_back({
+                'success': False, 'uid': uid, 'vid': vid,
+                'error': str(error), 'resync': True
+            })
+            return False
+
+        return True
+
     def handle_command(self, handler_type, method, uid, vid, settings, data):
         """Call the right commands handler
         """
@@ -144,6 +321,44 @@ class JSONHandler(asynchat.async_chat):
         ).run()
 
 
+class Waker(asyncore.dispatcher):
+    """Wakes the asyncore loop up when other threads have work for it
+    """
+
+    def __init__(self, server):
+        self.server = server
+        reader, self.writer = socket.socketpair()
+        self.writer.setblocking(False)
+        asyncore.dispatcher.__init__(self, reader)
+
+    def writable(self):
+        return False
+
+    def wake(self):
+        """Make the loop return from select
+        """
+
+        try:
+            self.writer.send(b'x')
+        except socket.error:
+            pass  # the buffer is full so the loop is going to wake up anyway
+
+    def handle_read(self):
+        """Consume the wake up bytes and run the pending calls
+        """
+
+        try:
+            self.recv(4096)
+        except socket.error:
+            pass
+
+        self.server.run_pending_calls()
+
+    def close(self):
+        self.writer.close()
+        asyncore.dispatcher.close(self)
+
+
 class JSONServer(asyncore.dispatcher):
     """Asynchronous standard library TCP JSON server
     """
@@ -156,9 +371,18 @@ class JSONServer(asyncore.dispatcher):
         address_family = socket.AF_UNIX
     socket_type = socket.SOCK_STREAM
 
-    def __init__(self, address, handler=JSONHandler):
+    def __init__(self, address, handler=JSONHandler,
+                 workers=DEFAULT_WORKERS, weights=None):
         self.address = address
         self.handler = handler
+        self.executor = RequestExecutor(workers, weights)
+        self.sessions = SessionRegistry()
+        self.io_thread = threading.current_thread()
+        self.pending_calls = []
+        self._calls_lock = threading.Lock()
+        self.waker = None
+        if hasattr(socket, 'socketpair'):
+            self.waker = Waker(self)
 
         asyncore.dispatcher.__init__(self)
         self.create_socket(self.address_family, self.socket_type)
@@ -178,7 +402,39 @@ class JSONServer(asyncore.dispatcher):
         return self.socket.fileno()
 
     def serve_forever(self):
-        asyncore.loop()
+        self.io_thread = threading.current_thread()
+        if self.waker is not None:
+            asyncore.loop()
+            return
+
+        # no way to wake select up, poll for the pending calls
+        while asyncore.socket_map:
+            asyncore.loop(timeout=0.05, count=1)
+            self.run_pending_calls()
+
+    def call_soon(self, func, *args):
+        """Run the given function in the I/O thread (thread safe)
+        """
+
+        with self._calls_lock:
+            self.pending_calls.append((func, args))
+
+        if self.waker is not None:
+            self.waker.wake()
+
+    def run_pending_calls(self):
+        """Run the functions scheduled by other threads
+        """
+
+        with self._calls_lock:
+            calls, self.pending_calls = self.pending_calls, []
+
+        for func, args in calls:
+            try:
+                func(*args)
+            except Exception as error:
+                logging.error(error)
+                log_traceback()
 
     def shutdown(self):
         self.handle_close()
@@ -197,7 +453,9 @@ class JSONServer(asyncore.dispatcher):
         """
 
         logging.info('Closing the socket, server will be shutdown now...')
-        self.close()
+        self.executor.shutdown()
+        # close the clients connections too so the loop (and process) ends
+        asyncore.close_all()
 
 
 class Checker(threading.Thread):
@@ -205,11 +463,14 @@ class Checker(threading.Thread):
     """
 
     MAX_INACTIVITY = 1800  # 30 minutes in seconds
+    SESSIONS_GRACE = 10  # seconds a shared server lives without sessions
 
-    def __init__(self, server, pid, delta=5):
+    def __init__(self, server, pid, delta=5, max_memory=None, shared=False):
         threading.Thread.__init__(self)
         self.server = server
         self.delta = delta
+        self.max_memory = max_memory
+        self.shared = shared
         self.daemon = True
         self.die = False
         self.pid = int(pid)
@@ -225,11 +486,40 @@ class Checker(threading.Thread):
                 )
                 break
 
+            idle = self.server.sessions.idle_for()
+            if self.shared and idle is not None and \
+                    idle > self.SESSIONS_GRACE:
+                self.server.logger.info(
+                    'the last window using this server is gone, '
+                    'shuting down...'
+                )
+                break
+
+            if self._over_memory():
+                # the client starts a fresh server with its next request
+                self.server.logger.info(
+                    'resident memory is above {0} bytes, recycling...'.format(
+                        self.max_memory
+                    )
+                )
+                break
+
             self._check()
             if not self.die:
                 time.sleep(self.delta)
 
-        self.server.shutdown()
+        shutdown_daemons()
+        self.server.call_soon(self.server.shutdown)
+
+    def _over_memory(self):
+        """Return True if the process grew above the memory limit
+        """
+
+        if not self.max_memory:
+            return False
+
+        memory = resident_memory()
+        return memory is not None and memory > self.max_memory
 
     if os.name == 'nt':
         def _isprocessrunning(self, timeout=MAX_INACTIVITY * 1000):
@@ -289,6 +579,44 @@ def get_logger(path):
     return log
 
 
+def warm_up():
+    """Warm the Jedi caches up before the first request comes
+    """
+
+    try:
+        with jedi_cache.locks[INTERACTIVE]:
+            jedi_cache.script('import os\nos.').complete(2, 3)
+    except Exception as error:
+        logging.error('could not warm jedi up: {0}'.format(error))
+
+
+def report_ready(fd, server, address, options):
+    """Tell the process that started us that the server is listening
+
+    The message is a JSON line written to the pipe inherited as `fd` with
+    the address and capabilities of the server, the pipe is closed after
+    it so the client does not have to probe the socket to know we are up
+    """
+
+    message = json.dumps({
+        'status': 'listening',
+        'pid': os.getpid(),
+        'address': address,
+        'capabilities': {
+            'framing': offer(compression=True),
+            'workers': server.executor.workers,
+            'shared': options.shared,
+            'warm': options.warm,
+            'max_memory': options.max_memory or 0
+        }
+    })
+    try:
+        os.write(fd, '{0}\n'.format(message).encode('utf8'))
+        os.close(fd)
+    except OSError as error:
+        logging.error('could not report readiness: {0}'.format(error))
+
+
 def log_traceback():
     """Just log the traceback
     """
@@ -315,6 +643,37 @@ if __name__ == "__main__":
         help='extra paths (separed by comma) that should be added to sys.paths'
     )
 
+    opt_parser.add_option(
+        '-w', '--workers', action='store', type='int', dest='workers',
+        default=DEFAULT_WORKERS,
+        help='number of threads handling requests (0 to use the I/O thread)'
+    )
+
+    opt_parser.add_option(
+        '-m', '--max-memory', action='store', type='int', dest='max_memory',
+        help='exit when the resident memory goes above this many MB'
+    )
+
+    opt_parser.add_option(
+        '-s', '--shared', action='store_true', dest='shared', default=False,
+        help='shared by several windows, exit when the last one is closed'
+    )
+
+    opt_parser.add_option(
+        '-W', '--warm', action='store_true', dest='warm', default=False,
+        help='warm the jedi caches up at start (standby servers)'
+    )
+
+    opt_parser.add_option(
+        '-r', '--ready-fd', action='store', type='int', dest='ready_fd',
+        help='inherited pipe where the server reports that it is listening'
+    )
+
+    opt_parser.add_option(
+        '-l', '--lanes', action='store', dest='lanes',
+        help='lane weights as interactive:<weight>,background:<weight>'
+    )
+
     options, args = opt_parser.parse_args()
     port, PID = None, None
     if not LINUX:
@@ -347,15 +706,23 @@ if __name__ == "__main__":
 
     try:
         server = None
+        weights = None
+        if options.lanes is not None:
+            weights = parse_weights(options.lanes)
         if not LINUX:
-            server = JSONServer(('localhost', port))
+            server = JSONServer(
+                ('localhost', port), workers=options.workers, weights=weights
+            )
         else:
             unix_socket_path = UnixSocketPath(options.project)
             if not os.path.exists(dirname(unix_socket_path.socket)):
                 os.makedirs(dirname(unix_socket_path.socket))
             if os.path.exists(unix_socket_path.socket):
                 os.unlink(unix_socket_path.socket)
-            server = JSONServer(unix_socket_path.socket)
+            server = JSONServer(
+                unix_socket_path.socket,
+                workers=options.workers, weights=weights
+            )
 
         logger.info(
             'Anaconda Server started in {0} for '
@@ -375,10 +742,18 @@ if __name__ == "__main__":
         sys.exit(-1)
 
     server.logger = logger
+    if options.ready_fd is not None:
+        report_ready(
+            options.ready_fd, server, port or unix_socket_path.socket, options
+        )
 
     # start PID checker thread
     if PID != 'DEBUG':
-        checker = Checker(server, pid=PID, delta=1)
+        checker = Checker(
+            server, pid=PID, delta=1,
+            max_memory=(options.max_memory or 0) * 1024 * 1024,
+            shared=options.shared
+        )
         checker.start()
     else:
         logger.info('Anaconda Server started in DEBUG mode...')
@@ -386,5 +761,10 @@ if __name__ == "__main__":
         DEBUG_MODE = True
         set_debug_function(notices=True)
 
+    if options.warm:
+        warmer = threading.Thread(target=warm_up)
+        warmer.daemon = True
+        warmer.start()
+
     # start the server
     server.serve_forever()
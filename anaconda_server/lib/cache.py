@@ -0,0 +1,105 @@
+# Copyright (C) 2013 - Oscar Campos <oscar.campos@member.fsf.org>
+# This program is Free Software see LICENSE file for details
+
+"""Anaconda JsonServer bounded caches
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class LRUCache(object):
+    """Thread safe least recently used cache
+
+    The cache is bounded by the number of items and optionally by the
+    total size of the stored values, the size of every value is given
+    when it is stored.
+    """
+
+    def __init__(self, max_items=128, max_size=None):
+        self.max_items = max_items
+        self.max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        """Return the value for the given key marking it as recently used
+        """
+
+        with self._lock:
+            try:
+                value, size = self._data.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+
+            self._data[key] = (value, size)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, size=0):
+        """Store the given value evicting the least recently used ones
+        """
+
+        with self._lock:
+            self.pop(key)
+            self._data[key] = (value, size)
+            self.size += size
+            while self._data and (
+                len(self._data) > self.max_items or
+                    (self.max_size is not None and self.size > self.max_size)):
+                _, (_, evicted_size) = self._data.popitem(last=False)
+                self.size -= evicted_size
+
+    def pop(self, key, default=None):
+        """Remove the given key and return its value
+        """
+
+        with self._lock:
+            try:
+                value, size = self._data.pop(key)
+            except KeyError:
+                return default
+
+            self.size -= size
+            return value
+
+    def values(self):
+        """Return the stored values without marking them as used
+        """
+
+        with self._lock:
+            return [value for value, _ in self._data.values()]
+
+    def invalidate(self, predicate):
+        """Remove every entry which key matches the given predicate
+        """
+
+        with self._lock:
+            for key in [k for k in self._data if predicate(k)]:
+                self.pop(key)
+
+    def clear(self):
+        """Remove everything from the cache
+        """
+
+        with self._lock:
+            self._data.clear()
+            self.size = 0
+
+    @property
+    def hit_rate(self):
+        """Return the hit rate of the cache as a float between 0 and 1
+        """
+
+        total = self.hits + self.misses
+        return float(self.hits) / total if total else 0.0
@@ -0,0 +1,82 @@
+# Copyright (C) 2013 - Oscar Campos <oscar.campos@member.fsf.org>
+# This program is Free Software see LICENSE file for details
+
+"""Anaconda JsonServer versioned documents store
+"""
+
+from collections import OrderedDict
+
+
+class DocumentOutOfSync(Exception):
+    """Raised when a document delta can not be applied to the stored version
+    """
+
+
+class DocumentStore(object):
+    """Keeps the last synced text of every view the client talks about
+
+    The client sends the full buffer once per view and then only the
+    changes made since the last synced version, every change is a tuple
+    of (begin, end, text) expressed in characters over the previous text.
+    """
+
+    def __init__(self, max_documents=128):
+        self.max_documents = max_documents
+        self._documents = OrderedDict()
+
+    def __len__(self):
+        return len(self._documents)
+
+    def __contains__(self, vid):
+        return vid in self._documents
+
+    def resolve(self, vid, document, text=None):
+        """Apply the given sync data and return back the document text
+        """
+
+        if document.get('full', False):
+            if text is None:
+                raise DocumentOutOfSync(
+                    'full sync for view {0} without text'.format(vid)
+                )
+            self._store(vid, document['version'], text)
+            return text
+
+        version, current = self._documents.get(vid, (None, None))
+        if version is None or version != document.get('base'):
+            self._documents.pop(vid, None)
+            raise DocumentOutOfSync(
+                'view {0} is at version {1} but the client expected {2}'.format(
+                    vid, version, document.get('base')
+                )
+            )
+
+        for begin, end, chunk in document.get('changes', []):
+            current = current[:begin] + chunk + current[end:]
+
+        size = document.get('size')
+        if size is not None and size != len(current):
+            self._documents.pop(vid, None)
+            raise DocumentOutOfSync(
+                'view {0} size mismatch, expected {1} got {2}'.format(
+                    vid, size, len(current)
+                )
+            )
+
+        self._store(vid, document['version'], current)
+        return current
+
+    def forget(self, vid):
+        """Remove the given view from the store
+        """
+
+        self._documents.pop(vid, None)
+
+    def _store(self, vid, version, text):
+        """Store the given text as the last version of the view document
+        """
+
+        self._documents.pop(vid, None)
+        self._documents[vid] = (version, text)
+        while len(self._documents) > self.max_documents:
+            self._documents.popitem(last=False)
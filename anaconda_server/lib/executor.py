@@ -0,0 +1,163 @@
+# Copyright (C) 2013 - Oscar Campos <oscar.campos@member.fsf.org>
+# This program is Free Software see LICENSE file for details
+
+"""Anaconda JsonServer requests executor
+"""
+
+import logging
+import threading
+import traceback
+
+from .request_queue import RequestQueue
+
+INTERACTIVE = 'interactive'
+BACKGROUND = 'background'
+LANES = (INTERACTIVE, BACKGROUND)
+INTERACTIVE_METHODS = (
+    'autocomplete', 'parameters', 'doc', 'goto', 'goto_assignment'
+)
+DEFAULT_WORKERS = 4
+DEFAULT_WEIGHTS = {INTERACTIVE: 3, BACKGROUND: 1}
+
+
+def lane_for(method):
+    """Return the lane where requests for the given method are queued
+    """
+
+    return INTERACTIVE if method in INTERACTIVE_METHODS else BACKGROUND
+
+
+def parse_weights(text):
+    """Parse lane weights given as `interactive:3,background:1`
+    """
+
+    weights = dict(DEFAULT_WEIGHTS)
+    for item in text.split(','):
+        lane, _, weight = item.partition(':')
+        try:
+            if lane.strip() in weights:
+                weights[lane.strip()] = max(int(weight), 1)
+                continue
+        except ValueError:
+            pass
+
+        logging.warning('ignoring invalid lane weight {0}'.format(item))
+
+    return weights
+
+
+class RequestExecutor(object):
+    """Run the client requests in a bounded pool of threads
+
+    Requests are queued in lanes, the interactive ones (completions,
+    signatures, docs and gotos) have their own lane so they don't wait
+    behind slow lints or usages. Idle workers pick the next lane in a
+    weighted round robin (with the default weights, three interactive
+    requests for every background one) skipping the lanes without work.
+
+    With zero workers nothing runs in the background, the I/O thread
+    has to call `run_next` to run the queued requests one by one.
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, weights=None):
+        weights = weights or DEFAULT_WEIGHTS
+        self.workers = workers
+        self.lanes = dict((lane, RequestQueue()) for lane in LANES)
+        self._schedule = [
+            lane for lane in LANES for _ in range(weights.get(lane, 1))
+        ]
+        self._turn = 0
+        self._running = True
+        self._condition = threading.Condition()
+        for index in range(workers):
+            thread = threading.Thread(
+                target=self._work, name='anaconda-worker-{0}'.format(index)
+            )
+            thread.daemon = True
+            thread.start()
+
+    @property
+    def inline(self):
+        """True if the requests are run by the caller of `run_next`
+        """
+
+        return self.workers == 0
+
+    def submit(self, job, uid, method, vid=None, supersede=False, client=None):
+        """Queue the given callable to run the request with the given uid
+        """
+
+        with self._condition:
+            self.lanes[lane_for(method)].push({
+                'job': job, 'uid': uid, 'method': method, 'vid': vid,
+                'supersede': supersede, 'client': client
+            })
+            self._condition.notify()
+
+    def cancel(self, uid):
+        """Drop the queued request with the given uid
+        """
+
+        with self._condition:
+            return any(lane.cancel(uid) for lane in self.lanes.values())
+
+    def run_next(self):
+        """Run the next queued request, return False if there was none
+        """
+
+        with self._condition:
+            request = self._next()
+
+        if request is None:
+            return False
+
+        self._run(request)
+        return True
+
+    def shutdown(self):
+        """Stop the workers once they finish their current request
+        """
+
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+
+    def _work(self):
+        """Worker threads main loop
+        """
+
+        while True:
+            with self._condition:
+                request = self._next()
+                while request is None:
+                    if not self._running:
+                        return
+                    self._condition.wait()
+                    request = self._next()
+
+            self._run(request)
+
+    def _next(self):
+        """Pop the next request following the lanes schedule
+        """
+
+        for _ in range(len(self._schedule)):
+            lane = self.lanes[self._schedule[self._turn]]
+            self._turn = (self._turn + 1) % len(self._schedule)
+            if len(lane) > 0:
+                return lane.pop()
+
+        return None
+
+    def _run(self, request):
+        """Run the given request unless it has been superseded or cancelled
+        """
+
+        if request.get('dropped', False):
+            return
+
+        try:
+            request['job']()
+        except Exception as error:
+            logging.error(error)
+            logging.error(traceback.format_exc())
@@ -0,0 +1,180 @@
+# -*- coding: utf8 -*-
+
+# Copyright (C) 2014 - Oscar Campos <oscar.campos@member.fsf.org>
+# This program is Free Software see LICENSE file for details
+
+"""Long lived Jedi projects and scripts cache for the JsonServer
+"""
+
+import os
+import logging
+import threading
+
+import jedi
+
+from .cache import LRUCache
+from .executor import INTERACTIVE, LANES
+
+MAX_PROJECTS = 32
+MAX_SCRIPTS = 16
+MAX_SCRIPTS_SOURCE_SIZE = 16 * 1024 * 1024  # characters
+MEMORY_CEILING = 1024 * 1024 * 1024  # bytes of resident memory
+
+
+def resident_memory():
+    """Return the current resident memory of this process in bytes (or None)
+
+    getrusage is not used as it only gives the peak resident memory, that
+    never goes down once it is reached
+    """
+
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (IOError, OSError, ValueError, IndexError, AttributeError):
+        pass
+
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return None
+
+
+class JediCache(object):
+    """Reuse jedi Project and Script objects between requests
+
+    Projects are kept by project root and extra paths (the directory of
+    every file is mapped to its project root so discovery only runs once
+    per directory) and scripts by (filename, source hash, extra paths) so
+    several requests over the same buffer contents reuse the same
+    inference state. Extra paths are given by the windows sessions of
+    shared servers.
+
+    Jedi is not thread safe so every lane of the executor has its own
+    scripts (and inference states) and a lock that is held while they
+    are used, slow usages or renames never block the completions.
+    """
+
+    def __init__(self, max_projects=MAX_PROJECTS, max_scripts=MAX_SCRIPTS,
+                 max_source_size=MAX_SCRIPTS_SOURCE_SIZE,
+                 memory_ceiling=MEMORY_CEILING):
+        self.memory_ceiling = memory_ceiling
+        self._next_purge = memory_ceiling
+        self.projects = LRUCache(max_items=max_projects)
+        self.scripts = LRUCache(
+            max_items=max_scripts, max_size=max_source_size
+        )
+        self._roots = {}
+        self.locks = dict((lane, threading.RLock()) for lane in LANES)
+        self._lock = threading.RLock()
+
+    def project(self, filename, extra_paths=(), root=None):
+        """Return the jedi project for the given filename
+
+        Files without name belong to the given root (if any)
+        """
+
+        directory = os.path.dirname(filename) if filename else (root or '')
+        extra_paths = tuple(extra_paths or ())
+        with self._lock:
+            key = self._roots.get((directory, extra_paths))
+            project = self.projects.get(key) if key is not None else None
+            if project is None:
+                project = jedi.get_default_project(filename or root)
+                if extra_paths:
+                    project = jedi.Project(
+                        project.path, added_sys_path=list(extra_paths)
+                    )
+                key = (str(project.path), extra_paths)
+                cached = self.projects.get(key)
+                if cached is not None:
+                    project = cached
+                else:
+                    self.projects.set(key, project)
+                self._roots[(directory, extra_paths)] = key
+
+            return project
+
+    def script(self, source, filename='', extra_paths=(), root=None,
+               lane=INTERACTIVE):
+        """Return a (maybe already used) jedi Script for the given source
+
+        The caller must hold the lock of the given lane while using it
+        """
+
+        extra_paths = tuple(extra_paths or ())
+        key = (filename or '', hash(source), extra_paths, lane)
+        script = self.scripts.get(key)
+        if script is None:
+            script = jedi.Script(
+                source, path=filename or None,
+                project=self.project(filename, extra_paths, root)
+            )
+            self.scripts.set(key, script, len(source))
+
+        return script
+
+    def invalidate(self, filename=None):
+        """Invalidate the cached objects related to the given filename
+
+        Every script that belongs to the same project is dropped as its
+        inference state could be holding the old version of the file, if
+        no filename is given the whole cache is dropped.
+        """
+
+        with self._lock:
+            if not filename:
+                self.projects.clear()
+                self.scripts.clear()
+                self._roots.clear()
+                jedi.cache.clear_time_caches(True)
+                return
+
+            directory = os.path.dirname(filename)
+            roots = tuple(
+                key[0] for (path, _), key in self._roots.items()
+                if path == directory
+            )
+            self.scripts.invalidate(
+                lambda key: key[0] == filename or any(
+                    key[0] == root or key[0].startswith(
+                        root.rstrip(os.sep) + os.sep)
+                    for root in roots
+                )
+            )
+
+    def check_memory(self):
+        """Drop the scripts if the process grows above the memory ceiling
+
+        The memory freed by a purge is not always given back to the system
+        so the next purge waits until the process grows another quarter of
+        the ceiling (or goes below the ceiling and above it again)
+        """
+
+        memory = resident_memory()
+        if memory is None:
+            return
+
+        if memory < self.memory_ceiling:
+            self._next_purge = self.memory_ceiling
+            return
+
+        if memory < self._next_purge:
+            return
+
+        self._next_purge = memory + self.memory_ceiling // 4
+
+        logging.info(
+            'jedi cache: resident memory {0} is above the ceiling {1}, '
+            'purging cached scripts'.format(memory, self.memory_ceiling)
+        )
+        with self._lock:
+            self.scripts.clear()
+            try:
+                jedi.cache.clear_time_caches()
+            except Exception:
+                jedi.cache.clear_caches()
+
+
+jedi_cache = JediCache()
@@ -0,0 +1,107 @@
+# -*- coding: utf8 -*-
+
+# Copyright (C) 2013 - Oscar Campos <oscar.campos@member.fsf.org>
+# This program is Free Software see LICENSE file for details
+
+"""Multi file rename engine for the JsonServer
+"""
+
+import logging
+from collections import OrderedDict
+
+from parso import split_lines, python_bytes_to_unicode
+
+
+def read_source(path):
+    """Return the decoded contents of the given python file
+    """
+
+    with open(path, 'rb') as source:
+        return python_bytes_to_unicode(source.read(), errors='replace')
+
+
+class RenameEngine(object):
+    """Compute the lines changed by a rename file by file
+
+    The usages are grouped by file and the lines of every changed file are
+    split once, every usage is replaced in its line (from right to left so
+    the columns of the other usages in the same line are still valid) and
+    the changes of a file are given as soon as the file is done so they
+    can be sent back while the next file is processed.
+
+    Usages without module path belong to the buffer of the request that
+    is given as `filename` (that can be empty for unsaved buffers) and
+    `source`, the other files are read from disk.
+    """
+
+    def __init__(self, new_name, filename='', source=None, read=read_source):
+        self.new_name = new_name
+        self.filename = filename or ''
+        self.sources = {self.filename: source} if source is not None else {}
+        self.read = read
+        self.renamed = 0
+
+    def group(self, usages):
+        """Return the (line, column, name) of the usages grouped by file
+        """
+
+        files = OrderedDict()
+        for usage in usages:
+            path = str(usage.module_path) if usage.module_path is not None \
+                else self.filename
+            files.setdefault(path, set()).add(
+                (usage.line, usage.column, usage.name)
+            )
+
+        return files
+
+    def files(self, usages):
+        """Yield the (path, changes) of every file changed by the rename
+        """
+
+        for path, positions in self.group(usages).items():
+            changes = self.changes(path, positions)
+            if changes:
+                yield path, changes
+
+    def changes(self, path, positions):
+        """Return the changed lines of the given file
+
+        Every change is a dict with the (0 based) `lineno` and the new
+        `line` without its line ending
+        """
+
+        source = self.sources.get(path)
+        if source is None:
+            try:
+                source = self.read(path)
+            except (IOError, OSError) as error:
+                logging.error('rename: can not read {0}: {1}'.format(
+                    path, error
+                ))
+                return []
+
+        lines = split_lines(source)
+        usages = {}
+        for line, column, name in positions:
+            usages.setdefault(line, []).append((column, name))
+
+        changes = []
+        for lineno in sorted(usages):
+            if not 0 < lineno <= len(lines):
+                continue
+
+            text = original = lines[lineno - 1]
+            for column, name in sorted(usages[lineno], reverse=True):
+                if text[column:column + len(name)] != name:
+                    # not a name in the text (the module of an import)
+                    continue
+
+                end = column + len(name)
+                text = text[:column] + self.new_name + text[end:]
+                self.renamed += 1
+
+            if text != original:
+                changes.append({'lineno': lineno - 1, 'line': text})
+
+        return changes
@@ -0,0 +1,62 @@
+# Copyright (C) 2013 - Oscar Campos <oscar.campos@member.fsf.org>
+# This program is Free Software see LICENSE file for details
+
+"""Anaconda JsonServer pending requests queue
+"""
+
+from collections import deque
+
+
+class RequestQueue(object):
+    """Requests read from the client that are still waiting to be handled
+
+    A request sent with `supersede` set drops every pending request with
+    the same method, view and client (only the latest completion or
+    signature for a view is ever used), and any pending request can be
+    cancelled by uid.
+
+    Dropped requests are not removed but marked, the consumer decides what
+    to do with them when they are popped.
+    """
+
+    def __init__(self):
+        self._requests = deque()
+
+    def __len__(self):
+        return len(self._requests)
+
+    def push(self, request):
+        """Queue the given request superseding older ones if requested
+        """
+
+        if request.get('supersede', False):
+            key = self._key(request)
+            for pending in self._requests:
+                if pending.get('supersede', False) and \
+                        key == self._key(pending):
+                    pending['dropped'] = True
+
+        self._requests.append(request)
+
+    def cancel(self, uid):
+        """Drop the pending request with the given uid, return True if found
+        """
+
+        for pending in self._requests:
+            if pending.get('uid') == uid:
+                pending['dropped'] = True
+                return True
+
+        return False
+
+    def pop(self):
+        """Return the oldest pending request
+        """
+
+        return self._requests.popleft()
+
+    def _key(self, request):
+        """Return the key used to know if a request supersedes another
+        """
+
+        return request.get('method'), request.get('vid'), request.get('client')
@@ -0,0 +1,82 @@
+# Copyright (C) 2013 - Oscar Campos <oscar.campos@member.fsf.org>
+# This program is Free Software see LICENSE file for details
+
+"""Anaconda JsonServer sessions for servers shared by several windows
+"""
+
+import time
+import threading
+
+
+class Session(object):
+    """The context of a window served by a shared JsonServer
+    """
+
+    def __init__(self, name, paths=None, root=None):
+        self.name = name
+        self.paths = tuple(paths or ())
+        self.root = root or None
+
+
+class SessionRegistry(object):
+    """Reference counts the sessions opened by the clients of the server
+
+    Sessions are opened by every window that uses the server and closed
+    when the window is closed or the client connection is lost, a shared
+    server shuts itself down once it has been without sessions for a while.
+    """
+
+    def __init__(self):
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._emptied = None
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def open(self, client, name, paths=None, root=None):
+        """Open (or update) the given session for the given client
+        """
+
+        with self._lock:
+            self._sessions[(client, name)] = Session(name, paths, root)
+            self._emptied = None
+
+    def get(self, client, name):
+        """Return the given session of the given client (or None)
+        """
+
+        return self._sessions.get((client, name))
+
+    def close(self, client, name):
+        """Close the given session of the given client
+        """
+
+        with self._lock:
+            self._release([(client, name)])
+
+    def close_client(self, client):
+        """Close every session opened by the given client
+        """
+
+        with self._lock:
+            self._release([key for key in self._sessions if key[0] == client])
+
+    def idle_for(self):
+        """Return the seconds without sessions or None if there are sessions
+        """
+
+        if self._emptied is None:
+            return None
+
+        return time.time() - self._emptied
+
+    def _release(self, keys):
+        """Remove the given sessions recording when the last one is gone
+        """
+
+        for key in keys:
+            self._sessions.pop(key, None)
+
+        if keys and not self._sessions:
+            self._emptied = time.time()
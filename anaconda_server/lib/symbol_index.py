@@ -0,0 +1,354 @@
+# -*- coding: utf8 -*-
+
+# Copyright (C) 2014 - Oscar Campos <oscar.campos@member.fsf.org>
+# This program is Free Software see LICENSE file for details
+
+"""Persistent project symbol index for the JsonServer
+
+Jedi looks for the references of a name reading every python file of the
+project and inferring every one that contains the name as text, that takes
+tens of seconds in big projects. The index keeps the names defined and
+referenced in every file of the project (extracted from parso trees) so
+jedi only opens the files that can contain the name it is looking for.
+"""
+
+import os
+import time
+import pickle
+import hashlib
+import logging
+import threading
+
+import parso
+from jedi import settings as jedi_settings
+from jedi.file_io import FolderIO
+from jedi.inference import references
+from parso import python_bytes_to_unicode
+
+from .cache import LRUCache
+
+INDEX_VERSION = 1
+MAX_INDEXES = 8
+MAX_FILES = 100000
+MAX_FILE_SIZE = 4 * 1024 * 1024  # bytes
+REFRESH_INTERVAL = 5  # seconds between two walks of the project
+SAVE_INTERVAL = 60  # seconds between two writes of the index to disk
+IMPORTS = ('import_from', 'import_name')
+
+
+def file_stamp(path):
+    """Return the (mtime, size) of the given file or None if it is gone
+    """
+
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    return (stat.st_mtime, stat.st_size)
+
+
+def extract_names(code):
+    """Return {name: (definitions, references)} for the given source
+
+    Definitions and references are tuples of (line, column) positions,
+    imported names are references to the names defined in other modules
+    """
+
+    module = parso.load_grammar().parse(code, error_recovery=True)
+    names = {}
+    for name, leaves in module.get_used_names().items():
+        definitions, used = [], []
+        for leaf in leaves:
+            definition = leaf.get_definition()
+            if definition is not None and definition.type not in IMPORTS:
+                definitions.append(leaf.start_pos)
+            else:
+                used.append(leaf.start_pos)
+        names[name] = (tuple(definitions), tuple(used))
+
+    return names
+
+
+class SymbolIndex(object):
+    """Names defined and referenced in every python file of a project
+
+    Every file is stored with the (mtime, size) that it had when it was
+    indexed so the index is refreshed by mtime, it is built and refreshed
+    in a background thread and stored on disk under the jedi cache
+    directory so a new server starts from the previous index. While the
+    index is not ready (it never has been built) it can't answer anything
+    and `may_contain` answers True for every file.
+    """
+
+    def __init__(self, root, cache_directory=None, max_files=MAX_FILES):
+        self.root = root
+        self.max_files = max_files
+        self.files = {}  # path: (stamp, names or None)
+        self.ready = False
+        self.refreshed = 0
+        self.saved = 0
+        self.dirty = False
+        self.path = None
+        if cache_directory is not None:
+            self.path = os.path.join(
+                cache_directory, 'anaconda_symbols', '{0}.pickle'.format(
+                    hashlib.sha1(root.encode('utf8')).hexdigest()[:16]
+                )
+            )
+        self._lock = threading.RLock()
+        self._refreshing = None
+
+    def load(self):
+        """Load the index stored on disk (if any)
+        """
+
+        if self.path is None or not os.path.exists(self.path):
+            return False
+
+        try:
+            with open(self.path, 'rb') as stored:
+                data = pickle.load(stored)
+            if data['version'] != INDEX_VERSION or data['root'] != self.root:
+                return False
+        except Exception as error:
+            logging.info(
+                'symbol index: can not load {0}: {1}'.format(self.path, error)
+            )
+            return False
+
+        with self._lock:
+            self.files = data['files']
+            self.ready = True
+            self.saved = time.time()
+
+        return True
+
+    def save(self):
+        """Store the index on disk (written aside and moved into place)
+        """
+
+        if self.path is None:
+            return
+
+        with self._lock:
+            data = {
+                'version': INDEX_VERSION, 'root': self.root,
+                'files': dict(self.files)
+            }
+            self.dirty = False
+            self.saved = time.time()
+
+        try:
+            directory = os.path.dirname(self.path)
+            if not os.path.exists(directory):
+                os.makedirs(directory)
+            temporary = '{0}.{1}'.format(self.path, os.getpid())
+            with open(temporary, 'wb') as stored:
+                pickle.dump(data, stored, 2)
+            getattr(os, 'replace', os.rename)(temporary, self.path)
+        except (IOError, OSError) as error:
+            logging.info(
+                'symbol index: can not save {0}: {1}'.format(self.path, error)
+            )
+
+    def walk(self):
+        """Yield the python files of the project that jedi would look into
+        """
+
+        for file_io in references.recurse_find_python_files(
+                FolderIO(self.root)):
+            yield str(file_io.path)
+
+    def index_file(self, path, stamp=None):
+        """Index (or index again) the given file
+        """
+
+        stamp = stamp or file_stamp(path)
+        if stamp is None:
+            with self._lock:
+                self.files.pop(path, None)
+            return
+
+        names = None
+        if stamp[1] <= MAX_FILE_SIZE:
+            try:
+                with open(path, 'rb') as source:
+                    code = python_bytes_to_unicode(
+                        source.read(), errors='replace'
+                    )
+                names = extract_names(code)
+            except Exception as error:
+                logging.debug(
+                    'symbol index: can not index {0}: {1}'.format(path, error)
+                )
+
+        with self._lock:
+            self.files[path] = (stamp, names)
+            self.dirty = True
+
+    def refresh(self):
+        """Index the files that changed since they were indexed
+        """
+
+        start, indexed, seen = time.time(), 0, set()
+        for path in self.walk():
+            if len(seen) >= self.max_files:
+                logging.info(
+                    'symbol index: {0} has more than {1} python files, '
+                    'the rest are not indexed'.format(
+                        self.root, self.max_files
+                    )
+                )
+                break
+
+            seen.add(path)
+            stamp = file_stamp(path)
+            entry = self.files.get(path)
+            if entry is None or entry[0] != stamp:
+                self.index_file(path, stamp)
+                indexed += 1
+
+        with self._lock:
+            for path in set(self.files) - seen:
+                del self.files[path]
+                self.dirty = True
+            self.ready = True
+            self.refreshed = time.time()
+
+        if self.dirty and (indexed == len(seen) or
+                           time.time() - self.saved > SAVE_INTERVAL):
+            self.save()
+
+        logging.debug(
+            'symbol index: {0} refreshed in {1:.3f}s ({2} of {3} files '
+            'indexed)'.format(
+                self.root, time.time() - start, indexed, len(seen)
+            )
+        )
+
+    def schedule_refresh(self, force=False):
+        """Refresh the index in a background thread if it is due
+        """
+
+        with self._lock:
+            if self._refreshing is not None and self._refreshing.is_alive():
+                return
+            if not force and time.time() - self.refreshed < REFRESH_INTERVAL:
+                return
+
+            self.refreshed = time.time()
+            self._refreshing = threading.Thread(target=self._refresh)
+            self._refreshing.daemon = True
+            self._refreshing.start()
+
+    def _refresh(self):
+        """Refresh the index logging any error
+        """
+
+        try:
+            self.refresh()
+        except Exception as error:
+            logging.error(
+                'symbol index: refreshing {0}: {1}'.format(self.root, error)
+            )
+
+    def may_contain(self, path, name):
+        """Return False only if the given file can't contain the given name
+        """
+
+        if not self.ready:
+            return True
+
+        entry = self.files.get(path)
+        if entry is None or entry[1] is None or entry[0] != file_stamp(path):
+            # not indexed yet or modified since it was indexed
+            return True
+
+        return name in entry[1]
+
+    def definitions(self, name):
+        """Return the (path, line, column) where the given name is defined
+        """
+
+        return self._locations(name, 0)
+
+    def references(self, name):
+        """Return the (path, line, column) where the given name is used
+        """
+
+        return self._locations(name, 1)
+
+    def _locations(self, name, kind):
+        """Return the locations of the given kind of the given name
+        """
+
+        found = []
+        for path, (_, names) in sorted(self.files.items()):
+            if names is not None and name in names:
+                found.extend(
+                    (path, line, column) for line, column in names[name][kind]
+                )
+
+        return found
+
+
+class SymbolIndexes(object):
+    """The symbol index of every project root that jedi works with
+    """
+
+    def __init__(self, max_indexes=MAX_INDEXES):
+        self.indexes = LRUCache(max_items=max_indexes)
+        self._lock = threading.RLock()
+
+    def index(self, root):
+        """Return the index of the given root, built in background if new
+        """
+
+        with self._lock:
+            index = self.indexes.get(root)
+            if index is None:
+                index = SymbolIndex(root, jedi_settings.cache_directory)
+                index.load()
+                self.indexes.set(root, index)
+
+        index.schedule_refresh()
+        return index
+
+    def invalidate(self, filename=None):
+        """Index the given (saved) file again in the indexes that have it
+        """
+
+        for index in self.indexes.values():
+            if not filename:
+                index.schedule_refresh(force=True)
+            elif filename in index.files:
+                index.index_file(filename)
+
+    def search_in_file_ios(self, inference_state, file_io_iterator, name,
+                           limit_reduction=1, complete=False):
+        """Jedi search of a name in files that skips the files without it
+        """
+
+        if not complete and len(name) > 2:
+            index = self.index(str(inference_state.project.path))
+            file_io_iterator = (
+                file_io for file_io in file_io_iterator
+                if index.may_contain(str(file_io.path), name)
+            )
+
+        return _search_in_file_ios(
+            inference_state, file_io_iterator, name,
+            limit_reduction=limit_reduction, complete=complete
+        )
+
+
+symbol_indexes = SymbolIndexes()
+_search_in_file_ios = references.search_in_file_ios
+
+
+def install():
+    """Make jedi pre-filter the files it searches names in with the index
+    """
+
+    references.search_in_file_ios = symbol_indexes.search_in_file_ios
@@ -10,6 +10,7 @@ import socket
 import logging
 import asyncore
 import asynchat
+import select
 import traceback
 from logging import handlers
 from optparse import OptionParser
@@ -27,6 +28,9 @@ from jedi import settings as jedi_settings
 
 from lib.path import log_directory
 from lib.contexts import json_decode
+from framing import HEADER, negotiate
+from lib.documents import DocumentStore, DocumentOutOfSync
+from lib.request_queue import RequestQueue
 from handlers import ANACONDA_HANDLERS
 from lib.anaconda_handler import AnacondaHandler
 
@@ -42,6 +46,10 @@ class JSONHandler(asynchat.async_chat):
     def __init__(self, sock, server):
         self.server = server
         self.rbuffer = []
+        self.documents = DocumentStore()
+        self.framing = None
+        self.frame_flags = None
+        self.requests = RequestQueue()
         asynchat.async_chat.__init__(self, sock)
         self.set_terminator(b"\r\n" if PY3 else "\r\n")
 
@@ -50,8 +58,11 @@ class JSONHandler(asynchat.async_chat):
         """
 
         if data is not None:
-            data = '{0}\r\n'.format(json.dumps(data))
-            data = bytes(data, 'utf8') if PY3 else data
+            if self.framing is not None:
+                data = self.framing.encode(data)
+            else:
+                data = '{0}\r\n'.format(json.dumps(data))
+                data = bytes(data, 'utf8') if PY3 else data
 
             if DEBUG_MODE is True:
                 print('About push back to ST3: {0}'.format(data))
@@ -71,27 +82,78 @@ class JSONHandler(asynchat.async_chat):
         message = b''.join(self.rbuffer) if PY3 else ''.join(self.rbuffer)
         self.rbuffer = []
 
+        if self.framing is not None:
+            data = self.read_frame(message)
+            if data is not None:
+                self.handle_message(data)
+            return
+
         with json_decode(message) as data:
-            if not data:
-                logging.info('No data received in the handler')
-                return
+            pass
 
-            if data['method'] == 'check':
-                self.return_back(message='Ok', uid=data['uid'])
-                return
+        # handled out of the context so errors in the handlers
+        # are not taken as errors decoding the message
+        self.handle_message(data)
 
-            self.server.last_call = time.time()
+    def read_frame(self, message):
+        """Read a frame header or payload returning the data when complete
+        """
 
-        if type(data) is dict:
-            logging.info(
-                'client requests: {0}'.format(data['method'])
-            )
+        if self.frame_flags is None:
+            length, flags = HEADER.unpack(message)
+            if length > 0:
+                self.frame_flags = flags
+                self.set_terminator(length)
+            return None
+
+        flags, self.frame_flags = self.frame_flags, None
+        self.set_terminator(HEADER.size)
+        return self.framing.decode(message, flags)
 
-            method = data.pop('method')
-            uid = data.pop('uid')
-            vid = data.pop('vid', None)
-            handler_type = data.pop('handler')
-            self.handle_command(handler_type, method, uid, vid, data)
+    def negotiate_framing(self, data):
+        """Switch to the binary framing offered by the client
+
+        The answer is still sent using the line based protocol, every
+        message after it (in both directions) is a frame
+        """
+
+        framing = negotiate(data.get('framing', {}))
+        self.return_back({
+            'success': True, 'uid': data['uid'],
+            'framing': framing.describe()
+        })
+        self.framing = framing
+        self.set_terminator(HEADER.size)
+
+    def handle_message(self, data):
+        """Handle a decoded message from the client
+        """
+
+        if not data:
+            logging.info('No data received in the handler')
+            return
+
+        if data['method'] == 'check':
+            self.return_back(message='Ok', uid=data['uid'])
+            return
+
+        if data['method'] == 'negotiate_framing':
+            self.negotiate_framing(data)
+            return
+
+        if data['method'] == 'cancel':
+            self.requests.cancel(data['uid'])
+            return
+
+        if data['method'] == 'ping':
+            # keepalive of the clients that share a connection
+            self.return_back({'success': True, 'uid': data['uid']})
+            return
+
+        self.server.last_call = time.time()
+
+        if type(data) is dict:
+            self.requests.push(data)
         else:
             logging.error(
                 'client sent something that I don\'t understand: {0}'.format(
@@ -99,7 +161,74 @@ class JSONHandler(asynchat.async_chat):
                 )
             )
 
-    def handle_command(self, handler_type, method, uid, vid, data):
+    def handle_read(self):
+        """Read the available messages and handle the queued requests
+
+        The socket is drained before every request so newer requests can
+        supersede or cancel the ones that are still waiting
+        """
+
+        asynchat.async_chat.handle_read(self)
+        while len(self.requests) > 0 and self.connected:
+            self.drain()
+            self.handle_request(self.requests.pop())
+
+    def drain(self):
+        """Read every message that is already waiting in the socket
+        """
+
+        while self.connected:
+            readable, _, _ = select.select([self.socket], [], [], 0)
+            if not readable:
+                break
+
+            asynchat.async_chat.handle_read(self)
+
+    def handle_request(self, data):
+        """Handle a request from the client
+        """
+
+        dropped = data.pop('dropped', False)
+        data.pop('supersede', None)
+        logging.info(
+            'client requests: {0}'.format(data['method'])
+        )
+
+        method = data.pop('method')
+        uid = data.pop('uid')
+        vid = data.pop('vid', None)
+        handler_type = data.pop('handler')
+        settings = data.pop('settings', {})
+        if not self.sync_document(uid, vid, data) or dropped:
+            # superseded or cancelled requests only keep the document synced
+            return
+
+        self.handle_command(handler_type, method, uid, vid, settings, data)
+
+    def sync_document(self, uid, vid, data):
+        """Resolve the document text if the client sent versioned sync data
+        """
+
+        document = data.pop('document', None)
+        if document is None:
+            return True
+
+        key = document.get('key', 'source')
+        try:
+            data[key] = self.documents.resolve(
+                (vid, key), document, data.get(key)
+            )
+        except DocumentOutOfSync as error:
+            logging.info('requesting a full resync: {0}'.format(error))
+            self.return_back({
+                'success': False, 'uid': uid, 'vid': vid,
+                'error': str(error), 'resync': True
+            })
+            return False
+
+        return True
+
+    def handle_command(self, handler_type, method, uid, vid, settings, data):
         """Call the right commands handler
         """
 
@@ -109,7 +238,9 @@ class JSONHandler(asynchat.async_chat):
 
         handler = ANACONDA_HANDLERS.get(
             handler_type, AnacondaHandler.get_handler(handler_type))
-        handler(method, data, uid, vid, self.return_back, DEBUG_MODE).run()
+        handler(
+            method, data, uid, vid, settings, self.return_back, DEBUG_MODE
+        ).run()
 
 
 class JSONServer(asyncore.dispatcher):
@@ -128,6 +259,10 @@ class JSONServer(asyncore.dispatcher):
         asyncore.dispatcher.__init__(self)
         self.create_socket(self.address_familty, self.socket_type)
         self.last_call = time.time()
+        if os.name == 'posix':
+            # clients reconnect on their own, let a restarted server bind
+            # while the connections of the previous one are in TIME_WAIT
+            self.set_reuse_addr()
 
         self.bind(self.address)
         logging.debug('bind: address=%s' % (address,))
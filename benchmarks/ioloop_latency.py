@@ -0,0 +1,115 @@
+# -*- coding: utf8 -*-
+
+# Copyright (C) 2013 - Oscar Campos <oscar.campos@member.fsf.org>
+# This program is Free Software see LICENSE file for details
+
+"""Round-trip latency of the anaconda ioloop over an Unix domain socket
+
+Compares the selectors based loop against the old select + sleep polling
+loop, run it from the root of the package:
+
+    python benchmarks/ioloop_latency.py [round_trips]
+"""
+
+import os
+import sys
+import time
+import socket
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from anaconda_lib import ioloop  # noqa
+
+
+class EchoServer(threading.Thread):
+    """Blocking echo server that replies every line it receives
+    """
+
+    def __init__(self, path):
+        super(EchoServer, self).__init__()
+        self.daemon = True
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.bind(path)
+        self.sock.listen(1)
+
+    def run(self):
+        conn, _ = self.sock.accept()
+        buffer = b''
+        while True:
+            data = conn.recv(4096)
+            if not data:
+                break
+
+            buffer += data
+            while b'\r\n' in buffer:
+                line, buffer = buffer.split(b'\r\n', 1)
+                conn.sendall(line + b'\r\n')
+
+        conn.close()
+        self.sock.close()
+
+
+class EchoClient(ioloop.EventHandler):
+    """Client that signals an event for every echoed line
+    """
+
+    def __init__(self, path):
+        self.replied = threading.Event()
+        ioloop.EventHandler.__init__(
+            self, path, socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        )
+
+    def ready_to_write(self):
+        return True if self.outbuffer else False
+
+    def handle_read(self, data):
+        pass
+
+    def process_message(self):
+        self.replied.set()
+
+
+def measure(use_selectors, round_trips):
+    """Return the list of round-trip times for the given loop flavour
+    """
+
+    path = os.path.join(tempfile.mkdtemp(), 'anaconda_bench.sock')
+    server = EchoServer(path)
+    server.start()
+
+    ioloop.USE_SELECTORS = use_selectors
+    ioloop.NOT_TERMINATE = True
+    client = EchoClient(path)
+    thread = ioloop.loop()
+
+    timings = []
+    for _ in range(round_trips):
+        client.replied.clear()
+        start = time.perf_counter()
+        client.push(b'{"method": "ping"}\r\n')
+        client.replied.wait()
+        timings.append(time.perf_counter() - start)
+
+    ioloop.terminate()
+    thread.join()
+    os.unlink(path)
+    return timings
+
+
+def report(name, timings):
+    timings = sorted(timings)
+    print('{0:>10}: total {1:8.3f}s  mean {2:8.3f}ms  p50 {3:8.3f}ms  '
+          'p99 {4:8.3f}ms'.format(
+              name, sum(timings), sum(timings) / len(timings) * 1000,
+              timings[len(timings) // 2] * 1000,
+              timings[int(len(timings) * 0.99)] * 1000))
+
+
+if __name__ == '__main__':
+    round_trips = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    print('{0} round-trips over an Unix domain socket'.format(round_trips))
+    if ioloop.USE_SELECTORS:
+        report('selectors', measure(True, round_trips))
+    report('select', measure(False, round_trips))
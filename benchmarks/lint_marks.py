@@ -0,0 +1,311 @@
+# -*- coding: utf8 -*-
+
+# Copyright (C) 2013 - Oscar Campos <oscar.campos@member.fsf.org>
+# This program is Free Software see LICENSE file for details
+
+"""Cost of drawing the lint marks of a file with thousands of errors
+
+Compares the diff based marks renderer against the previous renderer
+(one region per character, one buffer read per error and a full redraw
+every time) on a fake view that counts the calls to the Sublime Text
+API. Every call goes from the plugin host to the editor process, the
+time that the calls would take at CALL_COST seconds each is reported
+beside the time spent in python. Run it from the root of the package:
+
+    python benchmarks/lint_marks.py [errors]
+"""
+
+import os
+import sys
+import time
+import types
+import importlib
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, os.path.dirname(ROOT))
+
+CALL_COST = 0.00002
+
+SCOPES = {
+    True: 'source.python meta.statement.python',
+    False: 'source.python comment.line.number-sign.python'
+}
+
+
+class Region(object):
+    """Minimal sublime.Region
+    """
+
+    def __init__(self, a, b=None):
+        self.a = a
+        self.b = a if b is None else b
+
+    def __eq__(self, other):
+        return self.a == other.a and self.b == other.b
+
+    def begin(self):
+        return min(self.a, self.b)
+
+    def end(self):
+        return max(self.a, self.b)
+
+
+class Settings(object):
+    """Empty settings
+    """
+
+    def has(self, name):
+        return False
+
+    def get(self, name, default=None):
+        return default
+
+    def add_on_change(self, key, callback):
+        pass
+
+
+class FakeView(object):
+    """A view over the given text that counts the API calls it gets
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.calls = 0
+        self.sent = 0
+        self.regions = {}
+        self.code = []
+        self.starts = []
+        for line in text.split('\n'):
+            self.starts.append(len(self.code))
+            comment = line.find('#')
+            comment = len(line) if comment < 0 else comment
+            self.code.extend([True] * comment)
+            self.code.extend([False] * (len(line) - comment + 1))
+
+    def _call(self):
+        self.calls += 1
+
+    def id(self):
+        return 1
+
+    def size(self):
+        self._call()
+        return len(self.text)
+
+    def substr(self, region):
+        self._call()
+        return self.text[region.begin():region.end()]
+
+    def text_point(self, row, col):
+        self._call()
+        return self.starts[min(row, len(self.starts) - 1)] + col
+
+    def full_line(self, point):
+        self._call()
+        begin = self.text.rfind('\n', 0, point) + 1
+        end = self.text.find('\n', point)
+        return Region(begin, len(self.text) if end < 0 else end + 1)
+
+    def match_selector(self, point, selector):
+        self._call()
+        return point < len(self.code) and self.code[point]
+
+    def add_regions(self, key, regions, *args):
+        self._call()
+        self.sent += len(regions)
+        self.regions[key] = [Region(r.a, r.b) for r in regions]
+
+    def erase_regions(self, key):
+        self._call()
+        self.regions.pop(key, None)
+
+    def get_regions(self, key):
+        self._call()
+        return self.regions.get(key, [])
+
+    def settings(self):
+        return Settings()
+
+    def window(self):
+        return None
+
+    def file_name(self):
+        return None
+
+
+class FakeView4(FakeView):
+    """A Sublime Text 4 view that extracts the scopes of a whole region
+    """
+
+    def __init__(self, text):
+        super(FakeView4, self).__init__(text)
+        self.tokens = {}
+        for row, begin in enumerate(self.starts):
+            end = len(self.code) if row + 1 == len(self.starts) \
+                else self.starts[row + 1]
+            comment = self.code.index(False, begin, end) \
+                if False in self.code[begin:end] else end
+            self.tokens[begin] = [
+                (Region(begin, comment), SCOPES[True]),
+                (Region(comment, end), SCOPES[False])
+            ]
+
+    def extract_tokens_with_scopes(self, region):
+        self._call()
+        return self.tokens[region.begin()]
+
+
+class Window(object):
+    """A window without views
+    """
+
+    def id(self):
+        return 1
+
+    def active_view(self):
+        return None
+
+    def folders(self):
+        return []
+
+
+def fake_sublime():
+    """Install the parts of the sublime module that the renderer uses
+    """
+
+    sublime = types.ModuleType('sublime')
+    sublime.Region = Region
+    sublime.View = FakeView
+    sublime.sublime_api = None
+    sublime.load_settings = lambda name: Settings()
+    sublime.set_timeout = sublime.set_timeout_async = lambda *args: None
+    sublime.platform = lambda: 'linux'
+    sublime.version = lambda: '4000'
+    sublime.active_window = Window
+    sublime.score_selector = lambda scope, selector: int(
+        'comment' not in scope
+    )
+    for number, flag in enumerate((
+            'DRAW_EMPTY_AS_OVERWRITE', 'DRAW_NO_FILL', 'DRAW_NO_OUTLINE',
+            'DRAW_OUTLINED', 'DRAW_SOLID_UNDERLINE', 'DRAW_SQUIGGLY_UNDERLINE',
+            'DRAW_STIPPLED_UNDERLINE', 'HIDDEN', 'LAYOUT_BLOCK')):
+        setattr(sublime, flag, 1 << number)
+    sys.modules['sublime'] = sublime
+    sys.modules['sublime_plugin'] = types.ModuleType('sublime_plugin')
+
+
+def build(errors):
+    """Return a source and its pep8 and pyflakes like errors
+    """
+
+    lines, results = [], []
+    for lineno in range(1, errors // 3 + 2):
+        lines.append('value{0}=compute(a,b)  # value {0}'.format(lineno))
+        results.extend([
+            {'level': 'W', 'lineno': lineno, 'offset': 5 + len(str(lineno)),
+             'underline_range': True, 'raw_error': '[W] PEP 8 (E225): x'},
+            {'level': 'V', 'lineno': lineno, 'offset': 15 + len(
+                str(lineno)), 'underline_range': True,
+             'raw_error': '[V] PEP 8 (E231): x'},
+            {'level': 'E', 'lineno': lineno, 'underline_range': False,
+             'raw_error': "[E] undefined name 'compute'", 'len': 7,
+             'regex': r'((and|or|not|if|elif|while|in)\s+|[+\-*^%%<>=\(\{{])'
+                      r'*\s*(?P<underline>[\w\.]*compute[\w]*)'},
+        ])
+
+    return '\n'.join(lines), results[:errors]
+
+
+def legacy_render(view, errors):
+    """The previous renderer, kept here as the reference
+    """
+
+    import re
+    underlines, outlines = {}, {}
+    for error in errors:
+        lineno = error['lineno'] - 1
+        line = view.full_line(view.text_point(lineno, 0))
+        if '# noqa' in view.substr(line):
+            continue
+
+        outlines.setdefault(error['level'], set()).add(lineno)
+        spans = underlines.setdefault(error['level'], [])
+        if error['underline_range']:
+            found = [(error['offset'], error['offset'] + 1)]
+        else:
+            line = view.full_line(view.text_point(lineno, 0))
+            found = [
+                (m.start('underline'), m.end('underline'))
+                for m in re.finditer(error['regex'], view.substr(line))
+            ]
+        for start, end in found:
+            line = view.full_line(view.text_point(lineno, 0))
+            for point in range(line.begin() + start, line.begin() + end):
+                if view.match_selector(point, 'source.python - comment'):
+                    spans.append(Region(point))
+
+    for level in ('E', 'W', 'V'):
+        view.erase_regions('underline-{0}'.format(level))
+        view.erase_regions('outlines-{0}'.format(level))
+    for level, spans in underlines.items():
+        view.add_regions('underline-{0}'.format(level), spans)
+    for level, lines in outlines.items():
+        view.add_regions('outlines-{0}'.format(level), [
+            view.full_line(view.text_point(l, 0)) for l in lines
+        ])
+
+
+def render(marks, view, errors):
+    """Draw the errors as parse_results does
+    """
+
+    for level in ('ERRORS', 'WARNINGS', 'VIOLATIONS'):
+        marks.ANACONDA[level][view.id()] = {}
+
+    table = marks.LineTable(view)
+    results = marks.Linter(view, table).parse_errors(errors)
+    levels = results['results']
+    marks.add_lint_marks(
+        view, results['lines'], table,
+        error_underlines=levels['E']['underlines'],
+        warning_underlines=levels['W']['underlines'],
+        violation_underlines=levels['V']['underlines']
+    )
+
+
+def measure(name, draw, text, errors, view_class=FakeView):
+    """Report the time and API calls of the first and the next draws
+    """
+
+    view = view_class(text)
+    edited = [dict(error) for error in errors]
+    # move one of the pep8 errors
+    edited[len(edited) // 6 * 3]['offset'] += 1
+    for label, current in (
+            ('first', errors), ('same', errors), ('one edit', edited)):
+        view.calls = view.sent = 0
+        start = time.perf_counter()
+        draw(view, current)
+        print(
+            '{0:>10} {1:>9}: {2:7.1f}ms {3:7} API calls ({4:6.1f}ms) '
+            '{5:6} regions drawn'.format(
+                name, label, (time.perf_counter() - start) * 1000,
+                view.calls, view.calls * CALL_COST * 1000, view.sent
+            )
+        )
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    fake_sublime()
+    marks = importlib.import_module(
+        '{0}.anaconda_lib.linting.sublime'.format(os.path.basename(ROOT))
+    )
+    text, errors = build(count)
+    print('{0} errors in {1} lines'.format(len(errors), text.count('\n') + 1))
+    measure('legacy', legacy_render, text, errors)
+    measure('diff (ST3)', lambda v, e: render(marks, v, e), text, errors)
+    measure(
+        'diff (ST4)', lambda v, e: render(marks, v, e), text, errors,
+        FakeView4
+    )
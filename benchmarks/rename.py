@@ -0,0 +1,124 @@
+# -*- coding: utf8 -*-
+
+# Copyright (C) 2013 - Oscar Campos <oscar.campos@member.fsf.org>
+# This program is Free Software see LICENSE file for details
+
+"""Cost of renaming a symbol with more than a thousand references
+
+Builds a project where a function is used from many files and compares
+the rename engine against the previous rename (that asked the jedi
+refactoring for the new contents of the file and split its lines again
+for every single usage). The search of the references is the same for
+both and it is reported apart. Run it from the root of the package:
+
+    python benchmarks/rename.py [files] [usages per file]
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, os.path.join(ROOT, 'anaconda_lib'))
+sys.path.insert(0, os.path.join(ROOT, 'anaconda_server'))
+
+import jedi  # noqa
+from lib.rename_engine import RenameEngine  # noqa
+
+FILLER = 'def filler_{0}(a, b):\n    """Do nothing"""\n    return a + b\n\n'
+
+
+def build(root, files, usages):
+    """Write a project where `shared_helper` is used from every file
+    """
+
+    with open(os.path.join(root, 'target.py'), 'w') as target:
+        target.write('def shared_helper(value):\n    return value\n')
+
+    for number in range(files):
+        lines = ['from target import shared_helper\n\n']
+        for usage in range(usages):
+            lines.append(FILLER.format(usage))
+            lines.append('result_{0} = shared_helper({0})\n\n'.format(usage))
+        with open(os.path.join(root, 'user{0}.py'.format(number)), 'w') as f:
+            f.write(''.join(lines))
+
+
+def legacy_rename(script, usages, new_name):
+    """The previous rename, kept here as the reference
+    """
+
+    renames = {}
+    proposals = script.rename(1, 4, new_name=new_name)
+    for usage in usages:
+        renames.setdefault(str(usage.module_path), [])
+        thefile = proposals.get_changed_files().get(usage.module_path)
+        if thefile is None:
+            continue
+
+        lineno = usage.line - 1
+        line = thefile.get_new_code().splitlines()[lineno]
+        renames[str(usage.module_path)].append({
+            'lineno': lineno, 'line': line
+        })
+
+    return renames
+
+
+def engine_rename(usages, new_name, on_file):
+    """Rename with the engine calling on_file as every file is done
+    """
+
+    renames = {}
+    for path, changes in RenameEngine(new_name).files(usages):
+        renames[path] = changes
+        on_file()
+
+    return renames
+
+
+def main(files, usages):
+    root = tempfile.mkdtemp()
+    try:
+        build(root, files, usages)
+        path = os.path.join(root, 'target.py')
+        with open(path) as target:
+            source = target.read()
+        script = jedi.Script(source, path=path, project=jedi.Project(root))
+
+        start = time.perf_counter()
+        references = script.get_references(1, 4)
+        print('{0} references in {1} files found in {2:.2f}s'.format(
+            len(references), len(set(r.module_path for r in references)),
+            time.perf_counter() - start
+        ))
+
+        start = time.perf_counter()
+        legacy = legacy_rename(script, references, 'renamed_helper')
+        print('{0:>8}: {1:8.3f}s'.format(
+            'legacy', time.perf_counter() - start
+        ))
+
+        first = []
+        start = time.perf_counter()
+        renames = engine_rename(
+            references, 'renamed_helper',
+            lambda: first or first.append(time.perf_counter() - start)
+        )
+        print('{0:>8}: {1:8.3f}s (first file sent after {2:.3f}s)'.format(
+            'engine', time.perf_counter() - start, first[0]
+        ))
+
+        # the previous rename gave a change per usage, one per line here
+        assert renames == legacy, 'the renames differ'
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 20,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 60
+    )
@@ -2,7 +2,7 @@
 # This program is Free Software see LICENSE file for details
 
 from .doc import AnacondaDoc
-from .rename import AnacondaRename
+from .rename import AnacondaRename, AnacondaApplyRenames
 from .mccabe import AnacondaMcCabe
 from .get_lines import AnacondaGetLines
 from .autoimport import AnacondaAutoImport
@@ -33,6 +33,7 @@ __all__ = [
     'AnacondaGotoAssignment',
     'AnacondaGotoPythonObject',
     'AnacondaRename',
+    'AnacondaApplyRenames',
     'AnacondaMcCabe',
     'AnacondaGetLines',
     'AnacondaVagrantUp',
@@ -1,7 +1,6 @@
 # Copyright (C) 2013 - Oscar Campos <oscar.campos@member.fsf.org>
 # This program is Free Software see LICENSE file for details
 
-import time
 import logging
 import traceback
 
@@ -9,30 +8,29 @@ import sublime
 import sublime_plugin
 
 from ..anaconda_lib.worker import Worker
-from ..anaconda_lib._typing import Dict, Any
-from ..anaconda_lib.callback import Callback
+from ..anaconda_lib._typing import Callable, Dict, List, Any  # noqa
+from ..anaconda_lib.callback import Callback, HookedCallback
 from ..anaconda_lib.helpers import prepare_send_data, is_python
 
 
 class AnacondaRename(sublime_plugin.TextCommand):
     """Rename the word under the cursor to the given one in its total scope
-    """
 
-    data = None  # type: Dict[str, Any]
+    The JsonServer sends the changes file by file as it computes them and
+    they are applied as they arrive, every file is opened once and its
+    changed lines are replaced in a single edit.
+    """
 
     def run(self, edit: sublime.Edit) -> None:
-        if self.data is None:
-            try:
-                location = self.view.word(self.view.sel()[0].begin())
-                old_name = self.view.substr(location)
-                sublime.active_window().show_input_panel(
-                    "Replace with:", old_name, self.input_replacement,
-                    None, None
-                )
-            except Exception:
-                logging.error(traceback.format_exc())
-        else:
-            self.rename(edit)
+        try:
+            location = self.view.word(self.view.sel()[0].begin())
+            old_name = self.view.substr(location)
+            sublime.active_window().show_input_panel(
+                "Replace with:", old_name, self.input_replacement,
+                None, None
+            )
+        except Exception:
+            logging.error(traceback.format_exc())
 
     def is_enabled(self) -> bool:
         """Determine if this command is enabled or not
@@ -45,31 +43,77 @@ class AnacondaRename(sublime_plugin.TextCommand):
         data = prepare_send_data(location, 'rename', 'jedi')
         data['directories'] = sublime.active_window().folders()
         data['new_word'] = replacement
-        Worker().execute(Callback(on_success=self.store_data), **data)
+        callback = Callback(on_success=self.renamed, on_failure=self.failed)
+        Worker().execute(stream_renames(callback, self.apply), **data)
+
+    def apply(self, renames: Dict[str, List[Dict[str, Any]]]) -> None:
+        """Apply the changes of the given files
+        """
 
-    def store_data(self, data: Dict[str, Any]) -> None:
-        """Just store the data an call the command again
+        window = self.view.window() or sublime.active_window()
+        for filename, changes in renames.items():
+            if not filename or filename == self.view.file_name():
+                view = self.view
+            else:
+                view = window.open_file(filename)
+
+            when_loaded(view, lambda view=view, changes=changes: (
+                view.run_command('anaconda_apply_renames', {
+                    'changes': changes
+                })
+            ))
+
+    def renamed(self, data: Dict[str, Any]) -> None:
+        """The rename is done, apply any remaining change and report it
         """
 
-        self.data = data
-        self.view.run_command('anaconda_rename')
+        self.apply(data.get('renames', {}))
+        sublime.status_message(
+            'Anaconda: {} occurrences renamed in {} files'.format(
+                data.get('occurrences', 0), data.get('files', 0)
+            )
+        )
 
-    def rename(self, edit: sublime.Edit) -> None:
-        """Rename in the buffer
+    def failed(self, data: Dict[str, Any]) -> None:
+        """The rename failed (the files already done keep their changes)
         """
 
-        data = self.data
-        if data['success'] is True:
-            for filename, data in data['renames'].items():
-                for line in data:
-                    view = sublime.active_window().open_file(
-                        '{}:{}:0'.format(filename, line['lineno']),
-                        sublime.ENCODED_POSITION
-                    )
-                    while view.is_loading():
-                        time.sleep(0.01)
-
-                    lines = view.lines(sublime.Region(0, view.size()))
-                    view.replace(edit, lines[line['lineno']], line['line'])
-
-        self.data = None
+        sublime.status_message('Anaconda: the rename failed')
+
+
+class AnacondaApplyRenames(sublime_plugin.TextCommand):
+    """Replace the given lines of the view in a single edit
+    """
+
+    def run(self, edit: sublime.Edit, changes: List[Dict[str, Any]]) -> None:
+        lines = self.view.lines(sublime.Region(0, self.view.size()))
+        # from the bottom up so the regions above are still valid
+        for change in sorted(changes, key=lambda c: -c['lineno']):
+            lineno = change['lineno']
+            if lineno < len(lines):
+                self.view.replace(edit, lines[lineno], change['line'])
+
+
+def stream_renames(callback: Callable, on_partial: Callable) -> Callable:
+    """Apply the partial renames as they come, the last message closes it
+
+    Everything runs in the main thread and in the order it was received
+    """
+
+    def _stream(callback: Callable, data: Dict[str, Any]) -> None:
+        if data.get('partial', False):
+            sublime.set_timeout(lambda: on_partial(data['renames']), 0)
+        else:
+            sublime.set_timeout(lambda: callback(data), 0)
+
+    return HookedCallback(callback, _stream)
+
+
+def when_loaded(view: sublime.View, action: Callable) -> None:
+    """Run the given action once the given view is loaded
+    """
+
+    if view.is_loading():
+        sublime.set_timeout(lambda: when_loaded(view, action), 10)
+    else:
+        action()
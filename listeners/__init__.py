@@ -6,11 +6,25 @@ from .linting import BackgroundLinter
 from .completion import AnacondaCompletionEventListener
 from .signatures import AnacondaSignaturesEventListener
 from .autopep8 import AnacondaAutoformatPEP8EventListener
+from .workers import AnacondaWorkersEventListener
+from .settings import AnacondaSettingsEventListener
+from .document_sync import AnacondaDocumentSyncEventListener
 
 
 __all__ = [
     'BackgroundLinter',
     'AnacondaCompletionEventListener',
     'AnacondaSignaturesEventListener',
-    'AnacondaAutoformatPEP8EventListener'
+    'AnacondaAutoformatPEP8EventListener',
+    'AnacondaDocumentSyncEventListener',
+    'AnacondaWorkersEventListener',
+    'AnacondaSettingsEventListener'
 ]
+
+try:
+    from .document_sync import AnacondaDocumentSyncListener
+except ImportError:
+    # text change listeners are only available in Sublime Text 4
+    pass
+else:
+    __all__.append('AnacondaDocumentSyncListener')
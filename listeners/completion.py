@@ -57,11 +57,27 @@ class AnacondaCompletionEventListener(sublime_plugin.EventListener):
 
         location = view.rowcol(locations[0])
         data = prepare_send_data(location, 'autocomplete', 'jedi')
+        data['supersede'] = True
         data["settings"] = {
             'python_interpreter': get_settings(view, 'python_interpreter', ''),
         }
         Worker().execute(self._complete, **data)
 
+    def on_post_save(self, view: sublime.View) -> None:
+        """Called after a view has been saved, invalidates the jedi cache
+        """
+
+        if not is_python(view, ignore_comments=True) or view.is_scratch():
+            return
+
+        Worker().execute(
+            lambda data: None,
+            method='invalidate_cache',
+            handler='jedi',
+            vid=view.id(),
+            filename=view.file_name() or ''
+        )
+
     def on_modified(self, view: sublime.View) -> None:
         """Called after changes has been made to a view.
         """
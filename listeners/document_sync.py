@@ -0,0 +1,32 @@
+# Copyright (C) 2013 - Oscar Campos <oscar.campos@member.fsf.org>
+# This program is Free Software see LICENSE file for details
+
+import sublime
+import sublime_plugin
+
+from ..anaconda_lib._typing import List, Any
+from ..anaconda_lib.document_sync import DocumentSync
+
+
+class AnacondaDocumentSyncEventListener(sublime_plugin.EventListener):
+    """Forget the synced documents of closed views
+    """
+
+    def on_close(self, view: sublime.View) -> None:
+        """Called when a view is closed
+        """
+
+        DocumentSync.forget(view.id())
+
+
+if DocumentSync.enabled:
+    class AnacondaDocumentSyncListener(sublime_plugin.TextChangeListener):
+        """Record buffer changes so only deltas are sent to the JsonServer
+        """
+
+        def on_text_changed(self, changes: List[Any]) -> None:
+            """Called right after the buffer has been changed
+            """
+
+            for view in self.buffer.views():
+                DocumentSync.record(view, changes)
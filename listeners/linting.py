@@ -2,7 +2,7 @@
 # Copyright (C) 2013 - Oscar Campos <oscar.campos@member.fsf.org>
 # This program is Free Software see LICENSE file for details
 
-import time
+import inspect
 
 import sublime
 import sublime_plugin
@@ -16,13 +16,15 @@ from ..anaconda_lib.linting.sublime import (
     ANACONDA, erase_lint_marks, run_linter,
     last_selected_lineno, update_statusbar
 )
+from ..anaconda_lib.linting.scheduler import LintScheduler
 
 
 class BackgroundLinter(sublime_plugin.EventListener):
     """Background linter, can be turned off via plugin settings
-    """
 
-    check_auto_lint = False
+    Every view is linted on its own by a LintScheduler once it has not
+    been modified for a while, nothing runs while the views are idle
+    """
 
     def __init__(self, lang: str='Python', linter: Callable=run_linter, non_auto: bool=False) -> None:  # noqa
         super(BackgroundLinter, self).__init__()
@@ -30,24 +32,39 @@ class BackgroundLinter(sublime_plugin.EventListener):
         self._force_non_auto = non_auto
         self.run_linter = linter
         self.last_selected_line = -1
-        sublime.set_timeout(self.lint, 1000)
+        try:
+            parameters = inspect.signature(linter).parameters
+        except (TypeError, ValueError):
+            parameters = {}
+        self._tracks_done = 'on_done' in parameters
+        self.scheduler = LintScheduler(self._start_lint)
+
+    def lint(self, view: sublime.View=None) -> None:
+        """Lint the given (or the active) view as soon as possible
+        """
 
-    def lint(self) -> None:
-        view = sublime.active_window().active_view()
-        if get_settings(view, 'anaconda_linting_behaviour') != 'always':
-            if not self.check_auto_lint:
-                self.check_auto_lint = True
-            return
+        if view is None:
+            view = sublime.active_window().active_view()
+
+        if view is not None and is_code(view, lang=self.lang.lower()):
+            self.scheduler.lint_now(view)
 
-        delay = get_settings(view, 'anaconda_linter_delay', 0.5)
-        valid_code = is_code(view, lang=self.lang.lower())
-        if not ANACONDA['ALREADY_LINTED'] and valid_code:
-            if time.time() - ANACONDA['LAST_PULSE'] >= delay:
-                ANACONDA['ALREADY_LINTED'] = True
-                self.run_linter(view)
+    def _start_lint(self, view: sublime.View, hook: Callable, done: Callable) -> bool:  # noqa
+        """Start the lint of the given view for the scheduler
+
+        Linters that can't tell when their results arrive are never taken
+        as in flight
+        """
+
+        if self._tracks_done:
+            return self.run_linter(view, hook, on_done=done) is not False
+
+        if hook is None:
+            self.run_linter(view)
+        else:
+            self.run_linter(view, hook)
 
-        if not self._force_non_auto:
-            sublime.set_timeout(lambda: self.lint(), int(delay * 1000))
+        return False
 
     def on_modified(self, view: sublime.View) -> None:
         """
@@ -65,10 +82,8 @@ class BackgroundLinter(sublime_plugin.EventListener):
             if check_linting_behaviour(view, ['always']):
                 # update the last selected line number
                 self.last_selected_line = -1
-                ANACONDA['LAST_PULSE'] = time.time()
-                ANACONDA['ALREADY_LINTED'] = False
-                if self.check_auto_lint:
-                    self.lint()
+                if not self._force_non_auto:
+                    self.scheduler.modified(view)
         else:
             self._erase_marks_if_no_linting(view)
 
@@ -79,7 +94,7 @@ class BackgroundLinter(sublime_plugin.EventListener):
         if (check_linting(view, ONLY_CODE, code=self.lang.lower()) and
                 check_linting_behaviour(view, ['always', 'load-save'])):
             if self.lang in view.settings().get('syntax'):
-                self.run_linter(view)
+                self.scheduler.lint_now(view)
         else:
             self._erase_marks_if_no_linting(view)
 
@@ -88,6 +103,7 @@ class BackgroundLinter(sublime_plugin.EventListener):
         """
 
         self._erase_marks(view)
+        self.scheduler.forget(view.id())
         for severity in ['VIOLATIONS', 'WARNINGS', 'ERRORS']:
             ANACONDA[severity][view.id()] = {}
 
@@ -100,9 +116,9 @@ class BackgroundLinter(sublime_plugin.EventListener):
             if self.lang in view.settings().get('syntax'):
                 if get_settings(
                         view, "anaconda_linter_show_errors_on_save", False):
-                    self.run_linter(view, self._show_errors_list)
+                    self.scheduler.lint_now(view, self._show_errors_list)
                 else:
-                    self.run_linter(view)
+                    self.scheduler.lint_now(view)
         else:
             self._erase_marks_if_no_linting(view)
 
@@ -121,7 +137,7 @@ class BackgroundLinter(sublime_plugin.EventListener):
                 view, ONLY_CODE | LINTING_ENABLED, code=self.lang.lower()) and
                 check_linting_behaviour(view, ['always'])):
             if self.lang in view.settings().get('syntax'):
-                self.run_linter(view)
+                self.scheduler.lint_now(view)
         else:
             self._erase_marks_if_no_linting(view)
 
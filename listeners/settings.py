@@ -0,0 +1,30 @@
+# Copyright (C) 2013 - Oscar Campos <oscar.campos@member.fsf.org>
+# This program is Free Software see LICENSE file for details
+
+import sublime
+import sublime_plugin
+
+from ..anaconda_lib.settings_cache import SettingsCache
+
+
+class AnacondaSettingsEventListener(sublime_plugin.EventListener):
+    """Keep the settings cache in sync with views and projects
+    """
+
+    def on_close(self, view: sublime.View) -> None:
+        """Called when a view is closed
+        """
+
+        SettingsCache.forget(view.id())
+
+    def on_load_project(self, window: sublime.Window) -> None:
+        """Called when a project is loaded
+        """
+
+        SettingsCache.invalidate()
+
+    def on_post_save_project(self, window: sublime.Window) -> None:
+        """Called after a project is saved
+        """
+
+        SettingsCache.invalidate()
@@ -45,6 +45,7 @@ class AnacondaSignaturesEventListener(sublime_plugin.EventListener):
                 location = (location[0], location[1] - 1)
 
             data = prepare_send_data(location, 'doc', 'jedi')
+            data['supersede'] = True
             use_tooltips = get_settings(
                 view, 'enable_signatures_tooltip', True
             )
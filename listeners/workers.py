@@ -0,0 +1,18 @@
+# Copyright (C) 2013 - Oscar Campos <oscar.campos@member.fsf.org>
+# This program is Free Software see LICENSE file for details
+
+import sublime
+import sublime_plugin
+
+from ..anaconda_lib.worker import Worker
+
+
+class AnacondaWorkersEventListener(sublime_plugin.EventListener):
+    """Release the worker of the windows that are closed
+    """
+
+    def on_pre_close_window(self, window: sublime.Window) -> None:
+        """Called right before a window is closed
+        """
+
+        Worker.release(window.id())
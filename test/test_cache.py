@@ -0,0 +1,96 @@
+# Copyright (C) 2012-2016 - Oscar Campos <oscar.campos@member.fsf.org>
+# This program is Free Software see LICENSE file for details
+
+import os
+
+from lib.cache import LRUCache
+from lib import jedi_cache
+from lib.jedi_cache import JediCache
+
+
+class TestCache(object):
+    """Bounded LRU cache test suite
+    """
+
+    def setUp(self):
+        self.cache = LRUCache(max_items=2, max_size=10)
+
+    def test_lru_eviction(self):
+        self.cache.set('a', 1)
+        self.cache.set('b', 2)
+        assert self.cache.get('a') == 1
+        self.cache.set('c', 3)
+        assert 'b' not in self.cache
+        assert 'a' in self.cache and 'c' in self.cache
+
+    def test_size_eviction(self):
+        self.cache.set('a', 1, 6)
+        self.cache.set('b', 2, 6)
+        assert len(self.cache) == 1
+        assert self.cache.size == 6
+
+    def test_invalidate(self):
+        self.cache.set(('x.py', 1), 1)
+        self.cache.set(('y.py', 1), 2)
+        self.cache.invalidate(lambda key: key[0] == 'x.py')
+        assert len(self.cache) == 1 and ('y.py', 1) in self.cache
+
+    def test_hit_rate(self):
+        self.cache.set('a', 1)
+        self.cache.get('a')
+        self.cache.get('b')
+        assert self.cache.hit_rate == 0.5
+
+
+class TestJediCache(object):
+    """Jedi scripts cache test suite
+    """
+
+    def setUp(self):
+        self.cache = JediCache()
+        self.filename = os.path.abspath(__file__)
+
+    def test_script_reused(self):
+        script = self.cache.script('import os\nos.', self.filename)
+        assert self.cache.script('import os\nos.', self.filename) is script
+        assert self.cache.script('import re\nre.', self.filename) is not script
+
+    def test_lanes_do_not_share_scripts(self):
+        script = self.cache.script('import os\nos.', self.filename)
+        other = self.cache.script(
+            'import os\nos.', self.filename, lane='background'
+        )
+        assert other is not script
+        assert self.cache.locks['interactive'] is not \
+            self.cache.locks['background']
+
+    def test_project_reused(self):
+        project = self.cache.project(self.filename)
+        assert self.cache.project(self.filename) is project
+
+    def test_invalidate(self):
+        script = self.cache.script('import os\nos.', self.filename)
+        self.cache.invalidate(self.filename)
+        assert self.cache.script('import os\nos.', self.filename) is not script
+
+    def test_invalidate_keeps_sibling_projects(self):
+        root = str(self.cache.project(self.filename).path)
+        sibling = os.path.join(root + '_sibling', 'module.py')
+        script = self.cache.script('import os\nos.', sibling)
+        self.cache.invalidate(self.filename)
+        assert self.cache.script('import os\nos.', sibling) is script
+
+    def test_memory_that_does_not_shrink_purges_once(self):
+        resident_memory = jedi_cache.resident_memory
+        jedi_cache.resident_memory = lambda: 2048
+        try:
+            cache = JediCache(memory_ceiling=1024)
+            script = cache.script('import os\nos.', self.filename)
+            cache.check_memory()
+            assert cache.script('import os\nos.', self.filename) is not script
+            script = cache.script('import os\nos.', self.filename)
+            cache.check_memory()
+            cache.check_memory()
+            assert cache.script('import os\nos.', self.filename) is script
+        finally:
+            jedi_cache.resident_memory = resident_memory
@@ -0,0 +1,59 @@
+# Copyright (C) 2012-2016 - Oscar Campos <oscar.campos@member.fsf.org>
+# This program is Free Software see LICENSE file for details
+
+from lib.documents import DocumentStore, DocumentOutOfSync
+
+
+class TestDocuments(object):
+    """Versioned documents store test suite
+    """
+
+    def setUp(self):
+        self.store = DocumentStore(max_documents=2)
+        self.store.resolve(1, {'version': 1, 'full': True}, 'import os\n')
+
+    def test_full_sync(self):
+        assert 1 in self.store
+        assert self._apply(1, 1, 1, []) == 'import os\n'
+
+    def test_apply_changes(self):
+        text = self._apply(1, 1, 2, [(9, 9, '; os.'), (0, 6, 'from x')])
+        assert text == 'from x os; os.\n'
+        assert self._apply(1, 2, 3, [(15, 15, 'path')]) == 'from x os; os.\npath'
+
+    def test_version_mismatch(self):
+        try:
+            self._apply(1, 5, 6, [(0, 0, 'a')])
+        except DocumentOutOfSync:
+            assert 1 not in self.store
+        else:
+            assert False, 'DocumentOutOfSync not raised'
+
+    def test_size_mismatch(self):
+        try:
+            self.store.resolve(
+                1, {'base': 1, 'version': 2, 'changes': [], 'size': 3}
+            )
+        except DocumentOutOfSync:
+            assert 1 not in self.store
+        else:
+            assert False, 'DocumentOutOfSync not raised'
+
+    def test_unknown_view(self):
+        try:
+            self._apply(42, 1, 2, [])
+        except DocumentOutOfSync:
+            pass
+        else:
+            assert False, 'DocumentOutOfSync not raised'
+
+    def test_eviction(self):
+        self.store.resolve(2, {'version': 1, 'full': True}, 'a')
+        self.store.resolve(3, {'version': 1, 'full': True}, 'b')
+        assert len(self.store) == 2
+        assert 1 not in self.store
+
+    def _apply(self, vid, base, version, changes):
+        return self.store.resolve(
+            vid, {'base': base, 'version': version, 'changes': changes}
+        )
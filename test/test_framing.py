@@ -0,0 +1,38 @@
+# Copyright (C) 2012-2016 - Oscar Campos <oscar.campos@member.fsf.org>
+# This program is Free Software see LICENSE file for details
+
+from framing import Framing, FrameReader, HEADER, ZLIB, negotiate, offer
+
+
+class TestFraming(object):
+    """Binary framing test suite
+    """
+
+    def setUp(self):
+        self.data = {'uid': 'abc', 'source': 'import os\n' * 5000}
+
+    def test_negotiate(self):
+        framing = negotiate(offer(compression=True))
+        assert framing.compression == 'zlib'
+        assert negotiate({}).compression is None
+        assert negotiate({'encodings': ['json']}).encoding == 'json'
+
+    def test_round_trip(self):
+        framing = Framing(compression='zlib', threshold=1024)
+        frame = framing.encode(self.data)
+        length, flags = HEADER.unpack(frame[:HEADER.size])
+        assert flags & ZLIB and length == len(frame) - HEADER.size
+        assert framing.decode(frame[HEADER.size:], flags) == self.data
+
+    def test_reader_split_feeds(self):
+        framing = Framing()
+        stream = framing.encode(self.data) + framing.encode({'uid': 'x'})
+        reader = FrameReader()
+        frames = []
+        for i in range(0, len(stream), 7):
+            frames.extend(reader.feed(stream[i:i + 7]))
+
+        assert [framing.decode(*frame) for frame in frames] == [
+            self.data, {'uid': 'x'}
+        ]
+        assert len(reader.buffer) == 0
@@ -0,0 +1,81 @@
+# Copyright (C) 2012-2016 - Oscar Campos <oscar.campos@member.fsf.org>
+# This program is Free Software see LICENSE file for details
+
+import os
+import shutil
+import tempfile
+
+import jedi
+
+from import_validator import Validator, ModuleCache, ModuleResolver
+
+_code = '''import os
+import os.path
+import idontexists
+import xml.etree.ElementTree as ET
+from os import getcwd, nothere
+from idontexists2 import foo
+from . import helpers, missing
+from .package import sub
+import nope  # noqa
+'''
+
+
+class TestImportValidator(object):
+    """Batched import validator test suite
+    """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self.root, 'package'))
+        for filename in ('helpers.py', '__init__.py', 'sub.py'):
+            directory = 'package' if filename != 'helpers.py' else ''
+            open(os.path.join(self.root, directory, filename), 'w').close()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def _validator(self, code, filename='main.py'):
+        return Validator(
+            code, os.path.join(self.root, filename), {},
+            jedi.Project(self.root)
+        )
+
+    def test_invalid_imports(self):
+        validator = self._validator(_code)
+        assert validator.is_valid() is False
+        assert validator.errors == [
+            ("can't import idontexists", 3),
+            ("can't import nothere", 5),
+            ("can't import idontexists2 foo", 6),
+            ("can't import missing", 7),
+        ]
+
+    def test_valid_imports(self):
+        validator = self._validator('import json\nfrom package import sub\n')
+        assert validator.is_valid() is True
+        assert validator.errors == []
+
+    def test_resolver_finds_modules_in_the_search_path(self):
+        resolver = ModuleResolver((self.root,), ModuleCache())
+        assert resolver.found('helpers')
+        assert resolver.found('package.sub')
+        assert resolver.found('sys')
+        assert not resolver.found('package.missing')
+        assert resolver.found('sub', os.path.join(self.root, 'package'))
+
+    def test_listings_follow_the_directories_mtime(self):
+        cache = ModuleCache()
+        assert not ModuleResolver((self.root,), cache).found('created')
+        open(os.path.join(self.root, 'created.py'), 'w').close()
+        os.utime(self.root, (0, 0))
+        assert ModuleResolver((self.root,), cache).found('created')
+
+    def test_verdicts_are_dropped_when_the_search_path_changes(self):
+        cache = ModuleCache()
+        ModuleResolver((self.root,), cache).verdicts['zipped'] = True
+        assert ModuleResolver((self.root,), cache).verdicts == {
+            'zipped': True
+        }
+        os.utime(self.root, (0, 0))
+        assert ModuleResolver((self.root,), cache).verdicts == {}
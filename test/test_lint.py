@@ -7,7 +7,9 @@ import tempfile
 import os
 from nose.plugins.skip import SkipTest
 
-from handlers.python_lint_handler import PythonLintHandler
+from handlers.python_lint_handler import PythonLintHandler, LINT_CACHE
+from linting.anaconda_dmypy import project_root
+from linting.anaconda_pep8 import Pep8Linter, STYLE_OPTIONS
 
 PYTHON38 = sys.version_info >= (3, 8)
 PYTHON3 = sys.version_info >= (3, 0)
@@ -159,6 +161,56 @@ async def f(a: int) -> int:
             handler = PythonLintHandler('lint', None, 0, 0, self._settings, self._check_mypy_async)  # noqa
             handler.lint(self._type_checkable_code, temp_file_name)  # noqa
 
+    def test_parallel_lint(self):
+        if not PYTHON3:
+            raise SkipTest()
+        results = []
+        self._settings.update({
+            'use_pyflakes': True, 'pep8': True,
+            'parallel_linting': True, 'stream_linting': True
+        })
+        handler = PythonLintHandler('lint', None, 0, 0, self._settings, results.append)  # noqa
+        handler.lint(self._lintable_code)
+        partial, final = results
+        assert partial['partial'] is True
+        assert partial['linter'] in ('pyflakes', 'pep8')
+        assert final.get('partial') is None
+        assert len(final['errors']) == 3
+        assert all(error in final['errors'] for error in partial['errors'])
+
+    def test_lint_cache(self):
+        results = []
+        self._settings['pep8'] = True
+        for _ in range(2):
+            handler = PythonLintHandler('lint', None, 0, 0, self._settings, results.append)  # noqa
+            handler.lint(self._lintable_code + '\n# cache')
+        hits = LINT_CACHE.hits
+        handler = PythonLintHandler('lint', None, 0, 0, self._settings, results.append)  # noqa
+        handler.lint(self._lintable_code + '\n# cache')
+        assert LINT_CACHE.hits == hits + 1
+        assert results[0]['errors'] == results[1]['errors'] == results[2]['errors']  # noqa
+        self._settings['pep8_ignore'] = ['W291']
+        handler = PythonLintHandler('lint', None, 0, 0, self._settings, results.append)  # noqa
+        handler.lint(self._lintable_code + '\n# cache')
+        assert LINT_CACHE.hits == hits + 1
+
+    def test_pep8_incremental(self):
+        settings = {'pep8_ignore': [], 'pep8_max_line_length': 79}
+        code = self._lintable_code + 'x=1\nclass A:\n  def f(self): pass\n'
+        edited = code.replace('a = 1', 'a=1 ;  b = 2')
+        Pep8Linter().lint(settings, code, '')
+        incremental = Pep8Linter().lint(settings, edited, '')
+        STYLE_OPTIONS.clear()
+        assert incremental == Pep8Linter().lint(settings, edited, '')
+        assert len(incremental) > 5
+
+    def test_dmypy_project_root(self):
+        package = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        assert project_root(os.path.abspath(__file__)) == package
+        with real_temp_file('') as temp_file_name:
+            directory = os.path.dirname(temp_file_name)
+            assert directory.startswith(project_root(temp_file_name))
+
     def _check_pyflakes(self, result):
         assert result['success'] is True
         assert len(result['errors']) == 1
@@ -0,0 +1,61 @@
+# Copyright (C) 2012-2016 - Oscar Campos <oscar.campos@member.fsf.org>
+# This program is Free Software see LICENSE file for details
+
+from handlers.python_lint_handler import PythonLintHandler, LINT_CACHE
+from linting.anaconda_pep8 import Pep8Linter
+from linting.parsed_source import ParsedSource
+
+
+class TestParsedSource(object):
+    """Parsed source shared by the linters test suite
+    """
+
+    _code = 'import os\n\n\ndef f(a):\n    """Doc."""\n    return a'
+
+    def setUp(self):
+        LINT_CACHE.clear()
+
+    def test_lazy_and_computed_once(self):
+        source = ParsedSource(self._code, 'f.py')
+        assert source.timings == {}
+        tree = source.tree
+        assert source.tree is tree
+        assert source.tokens is source.tokens
+        assert source.lines[-1] == '    return a'
+        assert ''.join(source.lines) == self._code
+        assert set(source.timings) == set(
+            ('encode', 'parse', 'lines', 'tokenize')
+        )
+
+    def test_errors_are_cached(self):
+        source = ParsedSource('def f(:\n    pass', 'f.py')
+        for _ in range(2):
+            try:
+                source.tree
+            except SyntaxError:
+                pass
+            else:
+                assert False, 'SyntaxError expected'
+        assert len(source.partial_tokens) > 0
+
+    def test_of_keeps_parsed_sources(self):
+        source = ParsedSource(self._code)
+        assert ParsedSource.of(source) is source
+        assert ParsedSource.of(self._code).code == self._code
+
+    def test_shared_tokens_give_the_same_pep8_results(self):
+        for code in (self._code, 'x = (1,\n 2', 'def f():\n  x = """a\n'):
+            shared = Pep8Linter().lint({}, ParsedSource(code, 'f.py'), '')
+            assert shared == Pep8Linter().lint({}, code, '')
+
+    def test_lint_reports_timings(self):
+        results = []
+        settings = {'use_pyflakes': True, 'pep8': True, 'use_pep257': True}
+        handler = PythonLintHandler(
+            'lint', None, 0, 0, settings, results.append
+        )
+        handler.lint(self._code, 'f.py')
+        timings = results[0]['timings']
+        for stage in ('pyflakes', 'pep8', 'pep257', 'parse', 'tokenize'):
+            assert stage in timings
+        assert timings['parse'] >= 0
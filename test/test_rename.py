@@ -0,0 +1,82 @@
+# Copyright (C) 2012-2016 - Oscar Campos <oscar.campos@member.fsf.org>
+# This program is Free Software see LICENSE file for details
+
+import os
+import shutil
+import tempfile
+
+from handlers.jedi_handler import JediHandler
+from lib.rename_engine import RenameEngine
+
+_helpers = 'def usages_helper():\n    return 42\n'
+_main = (
+    'from helpers import usages_helper\n\n'
+    'value = usages_helper() + usages_helper()\n'
+)
+
+
+class Usage(object):
+    """Minimal jedi Name
+    """
+
+    def __init__(self, module_path, line, column, name='usages_helper'):
+        self.module_path = module_path
+        self.line = line
+        self.column = column
+        self.name = name
+
+
+class TestRename(object):
+    """Rename engine and command test suite
+    """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        for filename, code in (('helpers.py', _helpers), ('main.py', _main)):
+            with open(os.path.join(self.root, filename), 'w') as source:
+                source.write(code)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_engine_replaces_every_usage_of_a_line(self):
+        main = os.path.join(self.root, 'main.py')
+        engine = RenameEngine('renamed', 'buffer.py', 'usages_helper()\n')
+        files = list(engine.files([
+            Usage(None, 1, 0), Usage(main, 3, 26), Usage(main, 3, 8),
+            Usage(main, 1, 5), Usage(main, 1, 20),
+        ]))
+        assert files == [
+            ('buffer.py', [{'lineno': 0, 'line': 'renamed()'}]),
+            (main, [
+                {'lineno': 0, 'line': 'from helpers import renamed'},
+                {'lineno': 2, 'line': 'value = renamed() + renamed()'}
+            ])
+        ]
+        assert engine.renamed == 4
+
+    def test_rename_handler_streams_every_file(self):
+        results = []
+        data = {
+            'source': _helpers, 'line': 1, 'offset': 6,
+            'filename': os.path.join(self.root, 'helpers.py'),
+            'project_root': self.root, 'directories': [self.root],
+            'new_word': 'renamed'
+        }
+        JediHandler('rename', data, 0, 0, {}, results.append).run()
+        partial, final = results[:-1], results[-1]
+        renames = {}
+        for result in partial:
+            assert result['partial'] is True
+            assert len(result['renames']) == 1
+            renames.update(result['renames'])
+        assert renames == {
+            data['filename']: [{'lineno': 0, 'line': 'def renamed():'}],
+            os.path.join(self.root, 'main.py'): [
+                {'lineno': 0, 'line': 'from helpers import renamed'},
+                {'lineno': 2, 'line': 'value = renamed() + renamed()'}
+            ]
+        }
+        assert final['success'] is True
+        assert final.get('partial') is None
+        assert final['files'] == 2 and final['occurrences'] == 4
@@ -0,0 +1,88 @@
+# Copyright (C) 2012-2016 - Oscar Campos <oscar.campos@member.fsf.org>
+# This program is Free Software see LICENSE file for details
+
+import threading
+
+from lib.request_queue import RequestQueue
+from lib.executor import RequestExecutor, parse_weights
+
+
+class TestRequestQueue(object):
+    """Pending requests queue test suite
+    """
+
+    def setUp(self):
+        self.queue = RequestQueue()
+
+    def _request(self, uid, method='autocomplete', vid=1, supersede=True):
+        return {'uid': uid, 'method': method, 'vid': vid,
+                'supersede': supersede}
+
+    def test_supersede(self):
+        self.queue.push(self._request('a'))
+        self.queue.push(self._request('b', vid=2))
+        self.queue.push(self._request('c', method='doc'))
+        self.queue.push(self._request('d', supersede=False))
+        self.queue.push(self._request('e'))
+        dropped = [r['uid'] for r in [self.queue.pop() for _ in range(5)]
+                   if r.get('dropped')]
+        assert dropped == ['a']
+
+    def test_cancel(self):
+        self.queue.push(self._request('a', supersede=False))
+        assert self.queue.cancel('a') is True
+        assert self.queue.cancel('b') is False
+        assert self.queue.pop().get('dropped') is True
+        assert len(self.queue) == 0
+
+
+class TestRequestExecutor(object):
+    """Requests executor lanes test suite
+    """
+
+    def setUp(self):
+        self.executor = RequestExecutor(workers=0)
+        self.ran = []
+
+    def _submit(self, uid, method, **kwargs):
+        self.executor.submit(
+            lambda: self.ran.append(uid), uid, method, **kwargs
+        )
+
+    def test_lanes_schedule(self):
+        for index in range(3):
+            self._submit('lint{0}'.format(index), 'lint')
+        for index in range(4):
+            self._submit('cpl{0}'.format(index), 'autocomplete', vid=index)
+
+        while self.executor.run_next():
+            pass
+
+        assert self.ran == [
+            'cpl0', 'cpl1', 'cpl2', 'lint0', 'cpl3', 'lint1', 'lint2'
+        ]
+
+    def test_supersede_and_cancel(self):
+        self._submit('a', 'autocomplete', vid=1, supersede=True)
+        self._submit('b', 'autocomplete', vid=1, supersede=True, client=2)
+        self._submit('c', 'autocomplete', vid=1, supersede=True)
+        self._submit('d', 'lint')
+        assert self.executor.cancel('d') is True
+
+        while self.executor.run_next():
+            pass
+
+        assert self.ran == ['b', 'c']
+
+    def test_workers(self):
+        executor = RequestExecutor(workers=2)
+        done = threading.Event()
+        executor.submit(done.set, 'a', 'lint')
+        assert done.wait(5)
+        executor.shutdown()
+
+    def test_parse_weights(self):
+        assert parse_weights('interactive:5,background:0') == {
+            'interactive': 5, 'background': 1
+        }
+        assert parse_weights('foo:2')['interactive'] == 3
@@ -0,0 +1,31 @@
+# Copyright (C) 2012-2016 - Oscar Campos <oscar.campos@member.fsf.org>
+# This program is Free Software see LICENSE file for details
+
+from lib.sessions import SessionRegistry
+
+
+class TestSessions(object):
+    """Shared server sessions test suite
+    """
+
+    def setUp(self):
+        self.sessions = SessionRegistry()
+
+    def test_open_and_get(self):
+        self.sessions.open(1, 'w1', ['/tmp'], '/tmp')
+        session = self.sessions.get(1, 'w1')
+        assert session.paths == ('/tmp',) and session.root == '/tmp'
+        assert self.sessions.get(2, 'w1') is None
+
+    def test_reference_counting(self):
+        assert self.sessions.idle_for() is None
+        self.sessions.open(1, 'w1')
+        self.sessions.open(1, 'w2')
+        self.sessions.open(2, 'w3')
+        self.sessions.close(1, 'w1')
+        self.sessions.close_client(1)
+        assert len(self.sessions) == 1 and self.sessions.idle_for() is None
+        self.sessions.close(2, 'w3')
+        assert self.sessions.idle_for() >= 0
+        self.sessions.open(2, 'w3')
+        assert self.sessions.idle_for() is None
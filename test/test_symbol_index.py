@@ -0,0 +1,102 @@
+# Copyright (C) 2012-2016 - Oscar Campos <oscar.campos@member.fsf.org>
+# This program is Free Software see LICENSE file for details
+
+import os
+import shutil
+import tempfile
+
+import jedi
+
+from lib import symbol_index
+from lib.symbol_index import SymbolIndex
+
+_files = {
+    'helpers.py': 'def usages_helper():\n    return 42\n',
+    'main.py': (
+        'from helpers import usages_helper\n\n'
+        'value = usages_helper()\n'
+    ),
+    'other.py': 'def unrelated():\n    return None\n',
+}
+
+
+class TestSymbolIndex(object):
+    """Project symbol index test suite
+    """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.cache = tempfile.mkdtemp()
+        for filename, code in _files.items():
+            with open(os.path.join(self.root, filename), 'w') as source:
+                source.write(code)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+        shutil.rmtree(self.cache)
+
+    def _path(self, filename):
+        return os.path.join(self.root, filename)
+
+    def test_definitions_and_references(self):
+        index = SymbolIndex(self.root, self.cache)
+        assert index.may_contain(self._path('other.py'), 'usages_helper')
+        index.refresh()
+        assert index.ready
+        assert index.definitions('usages_helper') == [
+            (self._path('helpers.py'), 1, 4)
+        ]
+        assert index.references('usages_helper') == [
+            (self._path('main.py'), 1, 20), (self._path('main.py'), 3, 8)
+        ]
+        assert index.may_contain(self._path('main.py'), 'usages_helper')
+        assert not index.may_contain(self._path('other.py'), 'usages_helper')
+
+    def test_refreshed_by_mtime(self):
+        index = SymbolIndex(self.root, self.cache)
+        index.refresh()
+        path = self._path('other.py')
+        with open(path, 'w') as source:
+            source.write('from helpers import usages_helper\n')
+        os.utime(path, (0, 0))
+        # modified files can contain anything until they are indexed again
+        assert index.may_contain(path, 'usages_helper')
+        os.remove(self._path('main.py'))
+        index.refresh()
+        assert index.references('usages_helper') == [(path, 1, 20)]
+        assert self._path('main.py') not in index.files
+
+    def test_stored_on_disk(self):
+        index = SymbolIndex(self.root, self.cache)
+        index.refresh()
+        assert os.path.exists(index.path)
+        stored = SymbolIndex(self.root, self.cache)
+        assert stored.load()
+        assert stored.ready
+        assert stored.files == index.files
+        assert not SymbolIndex(self.root + 'x', self.cache).load()
+
+    def test_jedi_only_reads_files_with_the_name(self):
+        index = SymbolIndex(self.root, self.cache)
+        index.refresh()
+        searched = []
+
+        def may_contain(path, name):
+            searched.append(os.path.basename(path))
+            return SymbolIndex.may_contain(index, path, name)
+
+        index.may_contain = may_contain
+        symbol_index.symbol_indexes.indexes.set(self.root, index)
+        symbol_index.install()
+        project = jedi.Project(self.root)
+        with open(self._path('helpers.py')) as source:
+            script = jedi.Script(
+                source.read(), path=self._path('helpers.py'), project=project
+            )
+        usages = script.get_references(line=1, column=6)
+        assert sorted((os.path.basename(str(u.module_path)), u.line)
+                      for u in usages) == [
+            ('helpers.py', 1), ('main.py', 1), ('main.py', 3)
+        ]
+        assert 'other.py' in searched
+        symbol_index.symbol_indexes.indexes.pop(self.root)